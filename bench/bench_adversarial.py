@@ -0,0 +1,92 @@
+"""
+Time the inline parser on adversarial inputs (unclosed brackets, stacked
+link openers, thousands of links) at growing sizes. Each size is 4x the
+previous one, so a linear parser shows a growth factor near 4 and a
+quadratic one near 16.
+
+    python bench/bench_adversarial.py [--size CHARS] [--steps N] [--seed N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inline_markdown import (  # noqa: E402
+    extract_markdown_links,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, text_type_text  # noqa: E402
+
+FUZZ_ALPHABET = "[]()!*` a\n"
+
+
+def repeat_to(unit, size):
+    return unit * (size // len(unit) + 1)
+
+
+def adversarial_inputs(size, seed=0):
+    """
+    Return {name: text} of about `size` characters each.
+    """
+    rng = random.Random(seed)
+    return {
+        "open brackets": "[" * size,
+        "unclosed label": "[" + "a" * size,
+        "stacked link openers": repeat_to("[a](", size),
+        "stacked image openers": repeat_to("![a](", size),
+        "labels without urls": repeat_to("[a]", size),
+        "nested brackets": "[" * (size // 2) + "a" + "]" * (size // 2) + "(b)",
+        "many links": repeat_to("[a](b) ", size),
+        "many images": repeat_to("![a](b) ", size),
+        "url never closed": repeat_to("[a](b", size),
+        "random": "".join(rng.choice(FUZZ_ALPHABET) for _ in range(size)).replace("*", "").replace("`", ""),
+    }
+
+
+def parse(text):
+    try:
+        text_to_textnodes(text)
+    except ValueError:
+        pass
+
+
+def split_links_and_images(text):
+    split_nodes_link(split_nodes_image([TextNode(text, text_type_text)]))
+
+
+def timed(func, text):
+    start = time.perf_counter()
+    func(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    functions = [
+        ("text_to_textnodes", parse),
+        ("split_nodes_*", split_links_and_images),
+        ("extract_links", extract_markdown_links),
+    ]
+    sizes = [args.size * 4 ** step for step in range(args.steps)]
+    corpora = [adversarial_inputs(size, args.seed) for size in sizes]
+    print(f"{'input':<24} {'function':<18} " + " ".join(f"{size:>10}" for size in sizes) + "   growth")
+    for name in corpora[0]:
+        for label, func in functions:
+            times = [timed(func, corpus[name]) for corpus in corpora]
+            growth = times[-1] / times[-2] if len(times) > 1 and times[-2] else 0.0
+            cells = " ".join(f"{seconds * 1000:8.2f}ms" for seconds in times)
+            print(f"{name:<24} {label:<18} {cells}   {growth:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Micro-benchmarks for the block stage on ~1 MB inputs: markdown_to_blocks,
+block_to_block_type and the combined iter_blocks scanner, each against
+the previous regex-split implementation.
+
+    python bench/bench_blocks.py [--size BYTES] [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inline_markdown import block_to_block_type, iter_blocks, markdown_to_blocks  # noqa: E402
+from textnode import (  # noqa: E402
+    block_type_paragraph,
+    block_type_heading,
+    block_type_code,
+    block_type_quote,
+    block_type_unordered_list,
+    block_type_ordered_list,
+)
+
+BLOCKS = [
+    "## A heading",
+    "A paragraph of prose that runs on for a while\nand wraps onto a second line.",
+    "* first item\n* second item\n* third item\n* fourth item",
+    "1. one\n2. two\n3. three\n4. four\n5. five",
+    "> quoted text\n> more quoted text",
+    "```\nprint('hello')\n```",
+    "Short paragraph.",
+]
+
+
+def regex_markdown_to_blocks(markdown):
+    blocks = re.split(r'\n\s*\n', markdown)
+    return [block.strip() for block in blocks if block.strip()]
+
+
+def regex_block_to_block_type(block):
+    if re.match(r'^#{1,6}\s', block):
+        return block_type_heading
+    if block.startswith('```') and block.endswith('```'):
+        return block_type_code
+    if all(line.strip().startswith('>') for line in block.split('\n')):
+        return block_type_quote
+    if all(line.strip().startswith(('*', '-')) for line in block.split('\n')):
+        return block_type_unordered_list
+    lines = block.split('\n')
+    if all(re.match(r'^\d+\.\s', line.strip()) for line in lines):
+        numbers = [int(line.split('.')[0]) for line in lines]
+        if numbers == list(range(1, len(numbers) + 1)):
+            return block_type_ordered_list
+    return block_type_paragraph
+
+
+def make_document(size):
+    parts = []
+    total = 0
+    i = 0
+    while total < size:
+        block = BLOCKS[i % len(BLOCKS)]
+        parts.append(block)
+        total += len(block) + 2
+        i += 1
+    return "\n\n".join(parts)
+
+
+def bench(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1 << 20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    markdown = make_document(args.size)
+    blocks = markdown_to_blocks(markdown)
+    assert blocks == regex_markdown_to_blocks(markdown)
+    assert [block_to_block_type(b) for b in blocks] == [regex_block_to_block_type(b) for b in blocks]
+
+    results = [
+        ("markdown_to_blocks",
+         lambda: regex_markdown_to_blocks(markdown),
+         lambda: markdown_to_blocks(markdown)),
+        ("block_to_block_type",
+         lambda: [regex_block_to_block_type(b) for b in blocks],
+         lambda: [block_to_block_type(b) for b in blocks]),
+        ("split + classify",
+         lambda: [(b, regex_block_to_block_type(b)) for b in regex_markdown_to_blocks(markdown)],
+         lambda: list(iter_blocks(markdown))),
+    ]
+    print(f"input: {len(markdown) / 1e6:.2f} MB, {len(blocks)} blocks")
+    for name, before, after in results:
+        old = bench(before, args.repeat)
+        new = bench(after, args.repeat)
+        print(f"{name:<20} before {old * 1000:7.1f} ms  after {new * 1000:7.1f} ms  {old / new:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
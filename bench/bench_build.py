@@ -0,0 +1,119 @@
+"""
+Time each stage of the build pipeline over a synthetic (or existing)
+content tree and print the results as JSON.
+
+    python bench/bench_build.py [--content DIR] [corpus options] [--output FILE]
+
+Stages: walk (collect_pages), read, blocks (iter_blocks), inline (block
+to node conversion), to_html, template and write. Without --content a
+corpus is generated into a temporary directory from the corpus options.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import DEFAULT_BLOCK_MIX, add_corpus_arguments, generate_corpus  # noqa: E402
+from htmlnode import HTMLNode  # noqa: E402
+from inline_markdown import block_to_html_node, iter_blocks  # noqa: E402
+from main import collect_pages  # noqa: E402
+from metadata import PageMetadata, split_front_matter  # noqa: E402
+from renderer import page_context  # noqa: E402
+from template import Template  # noqa: E402
+
+STAGES = ["walk", "read", "blocks", "inline", "to_html", "template", "write"]
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+
+def run_stages(content_dir, dest_dir, template):
+    timings = dict.fromkeys(STAGES, 0.0)
+    clock = time.perf_counter
+
+    start = clock()
+    pages = collect_pages(content_dir, dest_dir)
+    timings["walk"] = clock() - start
+
+    counts = {"pages": len(pages), "blocks": 0, "markdown_bytes": 0, "html_bytes": 0}
+    for from_path, dest_path in pages:
+        start = clock()
+        with open(from_path, "r") as file:
+            markdown = file.read()
+        variables, body = split_front_matter(markdown)
+        after_read = clock()
+        metadata = PageMetadata(variables)
+        blocks = list(metadata.observe(iter_blocks(body)))
+        after_blocks = clock()
+        node = HTMLNode("div", None, [block_to_html_node(block, block_type) for block, block_type in blocks])
+        after_inline = clock()
+        content = node.to_html()
+        after_to_html = clock()
+        html = template.render(page_context(variables, metadata, content))
+        after_template = clock()
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        with open(dest_path, "w") as file:
+            file.write(html)
+        after_write = clock()
+
+        timings["read"] += after_read - start
+        timings["blocks"] += after_blocks - after_read
+        timings["inline"] += after_inline - after_blocks
+        timings["to_html"] += after_to_html - after_inline
+        timings["template"] += after_template - after_to_html
+        timings["write"] += after_write - after_template
+        counts["blocks"] += len(blocks)
+        counts["markdown_bytes"] += len(markdown)
+        counts["html_bytes"] += len(html)
+    return timings, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--content", help="benchmark an existing content tree")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    template = Template.load(args.template)
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = args.content
+        corpus = None
+        if content_dir is None:
+            content_dir = os.path.join(tmp, "content")
+            corpus = {
+                "pages": args.pages,
+                "depth": args.depth,
+                "page_size": args.page_size,
+                "inline_density": args.inline_density,
+                "block_mix": args.block_mix or DEFAULT_BLOCK_MIX,
+                "seed": args.seed,
+            }
+            generate_corpus(content_dir, **corpus)
+        timings, counts = run_stages(content_dir, os.path.join(tmp, "public"), template)
+
+    total = sum(timings.values())
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "content": args.content,
+        "corpus": corpus,
+        "counts": counts,
+        "seconds": {stage: round(seconds, 6) for stage, seconds in timings.items()},
+        "total_seconds": round(total, 6),
+        "pages_per_second": round(counts["pages"] / total, 1) if total else None,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
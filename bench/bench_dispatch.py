@@ -0,0 +1,126 @@
+"""
+Compare table dispatch on integer node and block types against the
+if-chains over string type constants it replaced, by timing the same
+conversions in the current src/ and in src/ as of a baseline commit
+(extracted with git). Each side runs in its own interpreter, alternating,
+and the best of all rounds is kept.
+
+With six built-in types the tables are no faster than the if-chains,
+even with plain text converted without going through the table: on the
+machine they were written on, conversions ran at 0.75-1.1x the speed of
+the baseline, with plain text and the node list anywhere in that range
+from one run to the next. They are there so types can be registered.
+
+    python bench/bench_dispatch.py [--baseline REV] [--nodes N] [--rounds N] [--repeat N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# The commit before text and block types became integer-coded
+BASELINE = "843770e^"
+
+PARAGRAPH = (
+    "Frodo carried the **One Ring** from the *Shire* to `Mount Doom`, "
+    "guided by [Gandalf](https://example.com/gandalf) and followed by "
+    "![Gollum](https://example.com/gollum.png) most of the way."
+)
+
+MARKDOWN = "\n\n".join([
+    "## A heading",
+    PARAGRAPH,
+    "* first item\n* second item",
+    "1. one\n2. two",
+    "> quoted text",
+    "```\nprint('hello')\n```",
+])
+
+
+def extract_baseline(rev, directory):
+    archive = subprocess.run(["git", "archive", "--format=tar", rev, "src"], cwd=ROOT,
+                             check=True, capture_output=True).stdout
+    with tempfile.TemporaryFile() as file:
+        file.write(archive)
+        file.seek(0)
+        with tarfile.open(fileobj=file) as tar:
+            tar.extractall(directory, filter="data")
+    return os.path.join(directory, "src")
+
+
+def worker(nodes, repeat):
+    # Time the conversions with whichever src/ is first on sys.path;
+    # only names both trees have are used
+    from inline_markdown import block_to_html_node, iter_blocks, text_to_children, text_to_textnodes
+    import textnode
+    from textnode import text_node_to_html_node
+
+    # The list conversion text_to_children does; the baseline converts
+    # node by node
+    convert_all = getattr(textnode, "text_nodes_to_html_nodes", None)
+    if convert_all is None:
+        convert_all = lambda nodes: [text_node_to_html_node(node) for node in nodes]
+
+    def best(func):
+        return min(timeit.repeat(func, number=1, repeat=repeat))
+
+    parsed = text_to_textnodes(PARAGRAPH)
+    parsed = (parsed * (nodes // len(parsed) + 1))[:nodes]
+    blocks = list(iter_blocks(MARKDOWN))
+    blocks = (blocks * (nodes // 10 // len(blocks) + 1))[:nodes // 10]
+    paragraphs = [PARAGRAPH] * (nodes // len(text_to_textnodes(PARAGRAPH)))
+    times = {
+        "all text nodes": best(lambda: [text_node_to_html_node(node) for node in parsed]),
+        "node list": best(lambda: convert_all(parsed)),
+        "text_to_children": best(lambda: [text_to_children(text) for text in paragraphs]),
+        "blocks": best(lambda: [block_to_html_node(*block) for block in blocks]),
+    }
+    # Per type: the if-chain costs more the later a type's branch is
+    for text_type in sorted({str(node.text_type) for node in parsed}):
+        typed = [node for node in parsed if str(node.text_type) == text_type]
+        times[f"  {text_type}"] = best(lambda: [text_node_to_html_node(node) for node in typed])
+    return times
+
+
+def run_worker(src, args):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", src,
+               "--nodes", str(args.nodes), "--repeat", str(args.repeat)]
+    return json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=BASELINE, help="git revision of the if-chain code")
+    parser.add_argument("--nodes", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=6, help="alternating runs of each side")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per run")
+    parser.add_argument("--worker", metavar="SRC", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, args.worker)
+        print(json.dumps(worker(args.nodes, args.repeat)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        sides = {"if-chain": extract_baseline(args.baseline, directory), "table": os.path.join(ROOT, "src")}
+        best = {side: {} for side in sides}
+        for _ in range(args.rounds):
+            for side, src in sides.items():
+                for name, seconds in run_worker(src, args).items():
+                    best[side][name] = min(seconds, best[side].get(name, seconds))
+
+    print(f"{'':18} {'if-chain':>10} {'table':>10} {'speedup':>8}")
+    for name, chained in best["if-chain"].items():
+        table = best["table"][name]
+        print(f"{name:18} {chained * 1000:8.1f}ms {table * 1000:8.1f}ms {chained / table:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare the single-pass inline tokenizer against the original chain of
+five splitters on a paragraph-heavy document.
+
+    python bench/bench_inline.py [--paragraphs N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inline_markdown import (  # noqa: E402
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import (  # noqa: E402
+    TextNode,
+    text_type_text,
+    text_type_bold,
+    text_type_italic,
+    text_type_code,
+)
+
+PARAGRAPH = (
+    "Frodo carried the **One Ring** from the *Shire* to `Mount Doom`, "
+    "guided by [Gandalf](https://example.com/gandalf) and followed by "
+    "![Gollum](https://example.com/gollum.png) most of the way. "
+    "Along the road the company passed **Rivendell**, *Moria* and "
+    "[Lothlorien](https://example.com/lorien) before breaking apart."
+)
+
+
+def chained_text_to_textnodes(text):
+    nodes = [TextNode(text, text_type_text)]
+    nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
+    nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
+    nodes = split_nodes_delimiter(nodes, "`", text_type_code)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def bench(func, paragraphs, repeat):
+    best = min(timeit.repeat(lambda: [func(p) for p in paragraphs], number=1, repeat=repeat))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paragraphs = [f"{PARAGRAPH} ({i})" for i in range(args.paragraphs)]
+    assert [chained_text_to_textnodes(p) for p in paragraphs[:10]] == [
+        text_to_textnodes(p) for p in paragraphs[:10]
+    ]
+
+    chained = bench(chained_text_to_textnodes, paragraphs, args.repeat)
+    single = bench(text_to_textnodes, paragraphs, args.repeat)
+    print(f"paragraphs:        {args.paragraphs}")
+    print(f"chained splitters: {chained * 1000:8.1f} ms")
+    print(f"single pass:       {single * 1000:8.1f} ms")
+    print(f"speedup:           {chained / single:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Time listing generation for a large number of dated, tagged pages and
+report its peak memory, which should grow with the number of entries but
+not with the size of the page bodies. A second run with a manifest shows
+the cost of a build where no listing changed.
+
+    python bench/bench_listings.py [--pages N] [--body-size CHARS] [--per-page N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from listings import generate_listings  # noqa: E402
+from manifest import BuildManifest  # noqa: E402
+from template import Template  # noqa: E402
+
+TAGS = ["python", "web", "performance", "markdown", "release", "howto", "notes", "design"]
+
+
+def write_pages(root, count, body_size, seed=0):
+    rng = random.Random(seed)
+    body = ("Some *text* with a [link](/a).\n\n" * (body_size // 32 + 1))[:body_size]
+    pages = []
+    for index in range(count):
+        path = os.path.join(root, "content", f"{index // 1000:03}", f"post{index}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        date = f"{rng.randint(2010, 2024)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}"
+        tags = ", ".join(rng.sample(TAGS, rng.randint(0, 3)))
+        with open(path, "w") as file:
+            file.write(f"---\ndate: {date}\ntags: [{tags}]\n---\n# Post {index}\n\n{body}")
+        pages.append((path, os.path.join(root, "public", f"{index // 1000:03}", f"post{index}.html")))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100000)
+    parser.add_argument("--body-size", type=int, default=4000)
+    parser.add_argument("--per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        pages = write_pages(root, args.pages, args.body_size)
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        site = os.path.join(root, "public")
+        manifest = BuildManifest(os.path.join(root, "manifest.json"))
+        for label in ("full", "unchanged"):
+            manifest.reset()
+            start = time.perf_counter()
+            written = generate_listings(pages, site, template, None, manifest, args.per_page)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<10} {args.pages} pages: {written:6} listing pages written in {elapsed:7.2f}s")
+
+        # Traced separately since tracemalloc slows everything down
+        tracemalloc.start()
+        generate_listings(pages, site, template, per_page=args.per_page)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak traced memory of a full run: {peak / 1e6:.1f} MB ({peak / args.pages:.0f} bytes per page)")
+
+
+if __name__ == "__main__":
+    main()
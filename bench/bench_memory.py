@@ -0,0 +1,95 @@
+"""
+Measure bytes per node of the HTML tree for a large generated document,
+comparing the current __slots__ nodes against the previous dict-backed
+representation (which wrapped every bold/italic/code/link span in a second
+node and gave each node its own children list and props dict).
+
+    python bench/bench_memory.py [--paragraphs N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from htmlnode import HTMLNode  # noqa: E402
+from inline_markdown import markdown_to_html_node  # noqa: E402
+
+PARAGRAPH = (
+    "The **Fellowship** set out from *Rivendell* with `nine walkers`, "
+    "see [the map](https://example.com/map) and "
+    "![the gate](https://example.com/gate.png) for the route."
+)
+LIST = "* Frodo\n* Sam\n* Merry\n* Pippin"
+
+
+class LegacyHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children or []
+        self.props = props or {}
+
+
+def to_legacy(node):
+    # Rebuild the tree the way the dict-backed classes represented it
+    if not isinstance(node, HTMLNode):
+        return node
+    if node.tag in ("b", "i", "code", "a") and not node.children:
+        return LegacyHTMLNode(node.tag, None, [LegacyHTMLNode(None, node.value)], dict(node.props))
+    children = [to_legacy(child) for child in node.children]
+    return LegacyHTMLNode(node.tag, node.value, children, dict(node.props))
+
+
+def tree_size(root):
+    """
+    Return (node count, bytes) for the node objects, their __dict__,
+    children containers and props dicts, counting shared objects once.
+    Text values are excluded since both representations share them.
+    """
+    seen = set()
+    nodes = 0
+    size = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str) or id(node) in seen:
+            continue
+        seen.add(id(node))
+        nodes += 1
+        size += sys.getsizeof(node)
+        for extra in (getattr(node, "__dict__", None), node.children, node.props):
+            if extra is not None and id(extra) not in seen:
+                seen.add(id(extra))
+                size += sys.getsizeof(extra)
+        stack.extend(node.children)
+    return nodes, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    args = parser.parse_args()
+
+    blocks = []
+    for i in range(args.paragraphs):
+        blocks.append(f"## Section {i}" if i % 10 == 0 else PARAGRAPH)
+        if i % 5 == 0:
+            blocks.append(LIST)
+    markdown = "\n\n".join(blocks)
+
+    current = markdown_to_html_node(markdown)
+    legacy = to_legacy(current)
+    legacy_nodes, legacy_bytes = tree_size(legacy)
+    current_nodes, current_bytes = tree_size(current)
+
+    print(f"document:        {len(markdown) / 1e6:.1f} MB of markdown")
+    print(f"before (dict):   {legacy_nodes:>9} nodes {legacy_bytes / 1e6:8.1f} MB "
+          f"{legacy_bytes / legacy_nodes:6.1f} bytes/node")
+    print(f"after (slots):   {current_nodes:>9} nodes {current_bytes / 1e6:8.1f} MB "
+          f"{current_bytes / current_nodes:6.1f} bytes/node")
+    print(f"reduction:       {1 - current_bytes / legacy_bytes:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare a parse cache hit against parsing the page, for generated pages
+of growing size and the pages of content/. A hit must be cheaper than a
+parse for --parse-cache to speed up builds.
+
+    python bench/bench_parse_cache.py [--sizes BYTES,...] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import CorpusGenerator  # noqa: E402
+from inline_markdown import markdown_to_html_node  # noqa: E402
+from metadata import PageMetadata, split_front_matter  # noqa: E402
+from parse_cache import ParseCache  # noqa: E402
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "content")
+
+
+def parse(markdown):
+    markdown_to_html_node(markdown, metadata=PageMetadata())
+
+
+def best(func, repeat):
+    # Best of `repeat` single runs, in milliseconds
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def pages(sizes):
+    generator = CorpusGenerator(seed=0)
+    for size in sizes:
+        yield f"generated {size // 1000} KB", generator.page("Page", size)
+    for directory, _, files in sorted(os.walk(CONTENT_DIR)):
+        for name in sorted(files):
+            if name.endswith(".md"):
+                path = os.path.join(directory, name)
+                with open(path, "r") as file:
+                    yield os.path.relpath(path, CONTENT_DIR), split_front_matter(file.read())[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="4000,40000,300000",
+                        help="comma-separated sizes of the generated pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(f"{'page':<24} {'parse':>10} {'cache hit':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ParseCache(directory)
+        for name, markdown in pages(sizes):
+            cache.parse(markdown)
+            parse_ms = best(lambda: parse(markdown), args.repeat)
+            hit_ms = best(lambda: cache.get(markdown), args.repeat)
+            print(f"{name:<24} {parse_ms:8.2f}ms {hit_ms:8.2f}ms {parse_ms / hit_ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Generate a synthetic content tree for benchmarking the build pipeline.
+
+    python bench/corpus.py OUTPUT_DIR [--pages N] [--depth N] [--page-size BYTES]
+                           [--inline-density P] [--block-mix SPEC] [--seed N]
+"""
+import argparse
+import os
+import random
+
+WORDS = (
+    "hobbit shire ring wizard elf dwarf mountain river forest road tower "
+    "king sword shadow light fellowship journey gate bridge council horse "
+    "valley fire stone tree song map lantern wind night morning"
+).split()
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 6,
+    "heading": 1,
+    "unordered_list": 1,
+    "ordered_list": 1,
+    "quote": 1,
+    "code": 1,
+}
+
+
+def parse_block_mix(spec):
+    """
+    Parse "paragraph=6,heading=1,..." into a {block kind: weight} dict.
+    """
+    mix = {}
+    for item in spec.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_BLOCK_MIX:
+            raise ValueError(f"Unknown block kind: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+class CorpusGenerator:
+    def __init__(self, inline_density=0.1, block_mix=None, seed=0):
+        self.inline_density = inline_density
+        self.block_mix = block_mix or DEFAULT_BLOCK_MIX
+        self.random = random.Random(seed)
+
+    def word(self):
+        word = self.random.choice(WORDS)
+        if self.random.random() >= self.inline_density:
+            return word
+        kind = self.random.randrange(5)
+        if kind == 0:
+            return f"**{word}**"
+        if kind == 1:
+            return f"*{word}*"
+        if kind == 2:
+            return f"`{word}`"
+        if kind == 3:
+            return f"[{word}](/{word}/)"
+        return f"![{word}](/images/{word}.png)"
+
+    def sentence(self, words):
+        # The first word is always plain: list items are stripped of
+        # leading '*' and '-', which would eat a bold or italic marker
+        return " ".join([self.random.choice(WORDS)] + [self.word() for _ in range(words - 1)])
+
+    def block(self):
+        kinds = list(self.block_mix)
+        kind = self.random.choices(kinds, weights=[self.block_mix[k] for k in kinds])[0]
+        if kind == "paragraph":
+            return "\n".join(self.sentence(12) for _ in range(self.random.randint(1, 4)))
+        if kind == "heading":
+            return "#" * self.random.randint(2, 4) + " " + self.sentence(4)
+        if kind == "unordered_list":
+            return "\n".join(f"* {self.sentence(6)}" for _ in range(self.random.randint(2, 6)))
+        if kind == "ordered_list":
+            return "\n".join(f"{i}. {self.sentence(6)}" for i in range(1, self.random.randint(2, 6) + 1))
+        if kind == "quote":
+            return "\n".join(f"> {self.sentence(10)}" for _ in range(self.random.randint(1, 3)))
+        return "```\n" + "\n".join(" ".join(self.random.choices(WORDS, k=6)) for _ in range(4)) + "\n```"
+
+    def page(self, title, page_size):
+        blocks = [f"# {title}"]
+        size = len(blocks[0])
+        while size < page_size:
+            block = self.block()
+            blocks.append(block)
+            size += len(block) + 2
+        return "\n\n".join(blocks) + "\n"
+
+
+def page_path(root, index, depth, fanout=10):
+    # Spread pages over a tree `depth` directories deep, `fanout` wide
+    parts = []
+    n = index
+    for _ in range(depth):
+        parts.append(f"section{n % fanout}")
+        n //= fanout
+    return os.path.join(root, *parts, f"page{index}.md")
+
+
+def generate_corpus(root, pages=1000, depth=2, page_size=4000, inline_density=0.1,
+                    block_mix=None, seed=0):
+    """
+    Write `pages` markdown files under `root` and return their total size
+    in bytes. The same arguments always produce the same tree.
+    """
+    generator = CorpusGenerator(inline_density, block_mix, seed)
+    total = 0
+    for index in range(pages):
+        path = page_path(root, index, depth)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        content = generator.page(f"Page {index}", page_size)
+        with open(path, "w") as file:
+            file.write(content)
+        total += len(content)
+    return total
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--page-size", type=int, default=4000,
+                        help="approximate markdown bytes per page")
+    parser.add_argument("--inline-density", type=float, default=0.1,
+                        help="probability that a word carries inline markup")
+    parser.add_argument("--block-mix", type=parse_block_mix, default=None,
+                        help="block weights, e.g. paragraph=6,heading=1,code=1")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    total = generate_corpus(args.output, args.pages, args.depth, args.page_size,
+                            args.inline_density, args.block_mix, args.seed)
+    print(f"Wrote {args.pages} pages ({total / 1e6:.1f} MB) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,4 @@
 #!/bin/bash
 
-# Run the Python script
-python src/main.py
-
-# Change to the public directory
-cd src/public
-
-# Start the web server
-python -m http.server 8888
\ No newline at end of file
+# Build the site, serve src/public on port 8888 and rebuild changed pages
+python src/main.py --watch --port 8888
@@ -0,0 +1,153 @@
+import os
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from walker import Walker
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request that clones a file's extents (reflink) on Linux
+# filesystems that support it (btrfs, xfs, overlayfs on those)
+FICLONE = 0x40049409
+
+
+class AssetSyncReport:
+    def __init__(self):
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+
+    def add(self, size, copied):
+        if copied:
+            self.copied_files += 1
+            self.copied_bytes += size
+        else:
+            self.skipped_files += 1
+            self.skipped_bytes += size
+
+    def __repr__(self):
+        return (
+            f"AssetSyncReport(copied: {self.copied_files} files, {self.copied_bytes} bytes, "
+            f"skipped: {self.skipped_files} files, {self.skipped_bytes} bytes)"
+        )
+
+
+def is_unchanged(src_stat, dest):
+    # copy_asset preserves mtimes, so a destination with the same size and
+    # mtime as its source is an earlier copy of it
+    try:
+        dest_stat = os.stat(dest)
+    except FileNotFoundError:
+        return False
+    return dest_stat.st_size == src_stat.st_size and dest_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+
+def siblings_are_stale(src_stat, siblings):
+    # Precompressed siblings are written after the copy they compress, so
+    # one older than its source (or missing) predates the source's last
+    # edit. This also catches in-place edits of hardlinked assets, which
+    # is_unchanged cannot tell from an up-to-date copy.
+    for path in siblings:
+        try:
+            if os.stat(path).st_mtime_ns < src_stat.st_mtime_ns:
+                return True
+        except FileNotFoundError:
+            return True
+    return False
+
+
+def reflink(src, dest):
+    """
+    Clone src into dest without copying data. Returns False when the
+    platform or filesystem does not support it.
+    """
+    if fcntl is None:
+        return False
+    with open(src, 'rb') as src_file, open(dest, 'wb') as dest_file:
+        try:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+            return True
+        except OSError:
+            return False
+
+
+def copy_asset(src, dest, src_stat, hardlink=False):
+    """
+    Make dest a copy of src using the cheapest mechanism available: a
+    hardlink when requested, else a reflink, else shutil.copyfile (which
+    uses sendfile or the platform copy call). Timestamps are carried over
+    so the next sync can skip the file.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if os.path.lexists(dest):
+        os.remove(dest)
+    if hardlink:
+        try:
+            os.link(src, dest)
+            return
+        except OSError:
+            pass
+    if not reflink(src, dest):
+        shutil.copyfile(src, dest)
+    shutil.copymode(src, dest)
+    os.utime(dest, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+
+def list_assets(src_dir, dest_dir, walker=None):
+    """
+    Return sorted (source path, destination path, stat) triples for every
+    file under src_dir that `walker` (a walker.Walker) lists.
+    """
+    if walker is None:
+        walker = Walker()
+    return [(path, os.path.join(dest_dir, rel_path), stat) for path, rel_path, stat in walker.walk(src_dir, stat=True)]
+
+
+def asset_outputs(dest, compressor=None):
+    return [dest] + (compressor.outputs(dest) if compressor is not None else [])
+
+
+def sync_asset(src, dest, manifest=None, hardlink=False, src_stat=None, compressor=None):
+    """
+    Copy one asset unless dest is already up to date. Returns True if the
+    file was copied. With a compress.Compressor, precompressed siblings are
+    written for copied assets and for any whose siblings are missing or
+    older than the source.
+    """
+    if src_stat is None:
+        src_stat = os.stat(src)
+    copied = not is_unchanged(src_stat, dest)
+    if copied:
+        copy_asset(src, dest, src_stat, hardlink)
+        logging.debug(f"Copied file: {src} to {dest}")
+    if compressor is not None:
+        if copied or siblings_are_stale(src_stat, compressor.outputs(dest)):
+            compressor.submit_file(dest)
+    if manifest is not None:
+        # Only the outputs are tracked, so removed assets get pruned
+        manifest.record(src, [], asset_outputs(dest, compressor))
+    return copied
+
+
+def sync_assets(src_dir, dest_dir, manifest=None, hardlink=False, jobs=None, compressor=None, walker=None):
+    """
+    Mirror src_dir (the files `walker` lists) into dest_dir, skipping
+    files whose size and mtime match and copying the rest on a thread pool
+    of `jobs` threads. Returns an AssetSyncReport.
+    """
+    report = AssetSyncReport()
+    assets = list_assets(src_dir, dest_dir, walker)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(
+            lambda asset: sync_asset(asset[0], asset[1], None, hardlink, asset[2], compressor),
+            assets,
+        )
+        for (src, dest, src_stat), copied in zip(assets, results):
+            report.add(src_stat.st_size, copied)
+            if manifest is not None:
+                manifest.record(src, [], asset_outputs(dest, compressor))
+    return report
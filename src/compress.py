@@ -0,0 +1,262 @@
+import os
+import gzip
+import zlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# File types whose contents are already compressed; a .gz or .br sibling
+# would be about as large as the original
+ALREADY_COMPRESSED = frozenset((
+    '.gz', '.br', '.zst', '.zip', '.bz2', '.xz', '.7z',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico',
+    '.woff', '.woff2', '.mp3', '.mp4', '.m4a', '.ogg', '.webm', '.pdf',
+))
+
+
+def available_formats():
+    # gzip always; brotli when the module is installed
+    return ('gz', 'br') if brotli is not None else ('gz',)
+
+
+def is_compressible(path):
+    return os.path.splitext(path)[1].lower() not in ALREADY_COMPRESSED
+
+
+def compressed_paths(path, formats):
+    """
+    Return the precompressed siblings written for `path` (e.g. page.html.gz).
+    """
+    if not is_compressible(path):
+        return []
+    return [f"{path}.{format}" for format in formats]
+
+
+def compress_bytes(data, format):
+    if format == 'gz':
+        # A fixed mtime keeps the output identical between builds
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if format == 'br':
+        return brotli.compress(data)
+    raise ValueError(f"Unknown compression format: {format}")
+
+
+class _BrotliStream:
+    # brotli.Compressor with zlib's compress/flush interface
+    def __init__(self):
+        self.compressor = brotli.Compressor()
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+def stream_compressor(format):
+    """
+    Return an incremental compressor for `format` with compress(data) and
+    flush() methods, each returning the next piece of compressed output.
+    """
+    if format == 'gz':
+        # wbits=31 writes a gzip header, with a zero mtime
+        return zlib.compressobj(9, zlib.DEFLATED, 31)
+    if format == 'br':
+        return _BrotliStream()
+    raise ValueError(f"Unknown compression format: {format}")
+
+
+class CompressedSiblings:
+    """
+    The compressed siblings of one file, written incrementally: each
+    write() compresses a chunk into every sibling, so no copy of the whole
+    content is kept. Siblings are written to temporary files and only
+    replace the previous ones on commit().
+    """
+
+    def __init__(self, path, formats):
+        self.paths = compressed_paths(path, formats)
+        self.streams = []
+        try:
+            for sibling, format in zip(self.paths, formats):
+                self.streams.append((stream_compressor(format), open(sibling + '.tmp', 'wb')))
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, data):
+        for stream, file in self.streams:
+            file.write(stream.compress(data))
+
+    def commit(self):
+        for stream, file in self.streams:
+            file.write(stream.flush())
+            file.close()
+        for sibling in self.paths:
+            os.replace(sibling + '.tmp', sibling)
+        return self.paths
+
+    def abort(self):
+        for _, file in self.streams:
+            file.close()
+            try:
+                os.remove(file.name)
+            except FileNotFoundError:
+                pass
+
+
+def write_compressed(path, data, formats):
+    """
+    Write a compressed sibling of `path` for each format from its contents.
+    Returns the list of files written.
+    """
+    written = []
+    for sibling, format in zip(compressed_paths(path, formats), formats):
+        tmp_path = sibling + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(compress_bytes(data, format))
+        os.replace(tmp_path, sibling)
+        written.append(sibling)
+    return written
+
+
+def compress_file(path, formats):
+    # Read in chunks so large files are not held in memory
+    siblings = CompressedSiblings(path, formats)
+    try:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                siblings.write(chunk)
+    except BaseException:
+        siblings.abort()
+        raise
+    return siblings.commit()
+
+
+class CompressingWriter:
+    """
+    Text file wrapper that passes writes through to the file and compresses
+    each one into the file's siblings as it goes.
+    """
+
+    def __init__(self, file, siblings):
+        self.file = file
+        self.siblings = siblings
+
+    def write(self, text):
+        self.siblings.write(text.encode(self.file.encoding))
+        return self.file.write(text)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+
+class Compressor:
+    """
+    Writes precompressed .gz (and .br) siblings of build outputs while
+    they are written (open) or from content that is still in memory
+    (submit), so no separate pass has to read the output tree back.
+    Submitted content runs on a thread pool of `jobs` threads (zlib and
+    brotli release the GIL), or inline with jobs=0 as in worker processes
+    that are a pool of their own. wait() blocks until every
+    pending file is written and re-raises the first compression error;
+    close() also shuts the pool down.
+    """
+
+    def __init__(self, formats=None, jobs=None):
+        self.formats = tuple(formats) if formats is not None else available_formats()
+        self.files = 0
+        self._executor = ThreadPoolExecutor(max_workers=jobs) if jobs != 0 else None
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def outputs(self, path):
+        return compressed_paths(path, self.formats)
+
+    def _run(self, function, *args):
+        # May be called from several threads, e.g. by sync_assets
+        if self._executor is None:
+            function(*args)
+            future = None
+        else:
+            future = self._executor.submit(function, *args)
+        with self._lock:
+            if future is not None:
+                self._futures.append(future)
+            self.files += 1
+
+    def submit(self, path, data):
+        """
+        Compress `data`, the bytes (or UTF-8 text) just written to `path`.
+        """
+        if not is_compressible(path):
+            return
+        if isinstance(data, str):
+            data = data.encode()
+        self._run(write_compressed, path, data, self.formats)
+
+    def submit_file(self, path):
+        # For outputs that were copied rather than rendered, such as assets
+        if is_compressible(path):
+            self._run(compress_file, path, self.formats)
+
+    def open(self, path):
+        """
+        Open `path` for writing text through a CompressingWriter. Chunks
+        are compressed on the writing thread as they are written, so the
+        content is never held whole; the siblings are put in place when
+        the returned context exits without an error.
+        """
+        return _CompressingFile(self, path)
+
+    def wait(self):
+        with self._lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+        logging.debug(f"Compressed {self.files} files as {', '.join(self.formats)}")
+
+
+class _CompressingFile:
+    def __init__(self, compressor, path):
+        self.compressor = compressor
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if not is_compressible(self.path):
+            self.file = open(self.path, 'w')
+            self.siblings = None
+            return self.file
+        self.siblings = CompressedSiblings(self.path, self.compressor.formats)
+        try:
+            self.file = open(self.path, 'w')
+        except BaseException:
+            self.siblings.abort()
+            raise
+        return CompressingWriter(self.file, self.siblings)
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.file.close()
+        if self.siblings is None:
+            return False
+        if exc_type is None:
+            self.siblings.commit()
+            with self.compressor._lock:
+                self.compressor.files += 1
+        else:
+            self.siblings.abort()
+        return False
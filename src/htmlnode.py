@@ -1,22 +1,46 @@
+from types import MappingProxyType
+
+# Shared read-only defaults so nodes without children or attributes don't
+# each allocate an empty list and dict
+EMPTY_CHILDREN = ()
+EMPTY_PROPS = MappingProxyType({})
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
-        self.children = children or []
-        self.props = props or {}
+        self.children = children or EMPTY_CHILDREN
+        self.props = props or EMPTY_PROPS
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        # Yield the HTML in chunks so a document can be streamed to a file
+        # while only holding one chunk per tree level.
         if self.tag is None:
-            return self.value or ""
+            yield self.value or ""
+            return
         
         attrs = " ".join([f'{key}="{value}"' for key, value in self.props.items()])
         attrs = " " + attrs if attrs else ""
         
         if self.children:
-            children_html = "".join(child.to_html() if isinstance(child, HTMLNode) else str(child) for child in self.children)
-            return f"<{self.tag}{attrs}>{children_html}</{self.tag}>"
+            yield f"<{self.tag}{attrs}>"
+            for child in self.children:
+                if isinstance(child, HTMLNode):
+                    yield from child.iter_html()
+                else:
+                    yield str(child)
+            yield f"</{self.tag}>"
         else:
-            return f"<{self.tag}{attrs}>{self.value or ''}</{self.tag}>"
+            yield f"<{self.tag}{attrs}>{self.value or ''}</{self.tag}>"
+
+    def write_html(self, fp):
+        fp.writelines(self.iter_html())
 
     def props_to_html(self):
         if self.props is None:
@@ -27,37 +51,76 @@ class HTMLNode:
         return props_html
 
     def __repr__(self):
-        return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
+        return f"HTMLNode({self.tag}, {self.value}, children: {list(self.children)}, {dict(self.props)})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def iter_html(self):
         if self.value is None:
             raise ValueError("Invalid HTML: no value")
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            yield self.value
+            return
+        yield f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+    def __repr__(self):
+        return f"LeafNode({self.tag}, {self.value}, {dict(self.props)})"
+
+
+class RawHTMLNode(LeafNode):
+    """
+    A rendered HTML fragment, e.g. a block served from the block cache,
+    with the plain text of the leaves it was rendered from so the text
+    can be read back without parsing the HTML.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, html, text):
+        super().__init__(None, html)
+        self.text = text
 
     def __repr__(self):
-        return f"LeafNode({self.tag}, {self.value}, {self.props})"
+        return f"RawHTMLNode({self.value}, {self.text})"
+
+
+def iter_text(node):
+    """
+    Yield the text of every leaf of a tree in document order.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            yield node
+        elif isinstance(node, RawHTMLNode):
+            yield node.text
+        elif node.children:
+            stack.extend(reversed(node.children))
+        elif node.value:
+            yield node.value
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def iter_html(self):
         if self.tag is None:
             raise ValueError("Invalid HTML: no tag")
         if self.children is None:
             raise ValueError("Invalid HTML: no children")
-        children_html = ""
+        yield f"<{self.tag}{self.props_to_html()}>"
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {len(self.children)})"
@@ -1,8 +1,11 @@
 import re
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, LeafNode, RawHTMLNode, iter_text
 from textnode import (
+    NodeType,
     TextNode,
-    text_node_to_html_node,
+    text_nodes_to_html_nodes,
+    save_text_types,
+    restore_text_types,
     text_type_text,
     text_type_bold,
     text_type_italic,
@@ -40,88 +43,205 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 
+# Link text stops at brackets and urls at parentheses, so a failed match
+# never scans past the next bracket or parenthesis: extraction is linear
+# even on unclosed or nested input
+_EXTRACT_IMAGES_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^()]*)\)")
+_EXTRACT_LINKS_PATTERN = re.compile(r"\[([^\[\]]*)\]\(([^()]*)\)")
+
 def extract_markdown_images(text):
-    pattern = r"!\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return _EXTRACT_IMAGES_PATTERN.findall(text)
 
 def extract_markdown_links(text):
-    pattern = r"\[(.*?)\]\((.*?)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return _EXTRACT_LINKS_PATTERN.findall(text)
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != text_type_text:
-            new_nodes.append(old_node)
-            continue
-        
-        images = extract_markdown_images(old_node.text)
-        if not images:
-            new_nodes.append(old_node)
-            continue
-        
-        remaining_text = old_node.text
-        for alt_text, url in images:
-            parts = remaining_text.split(f"![{alt_text}]({url})", 1)
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], text_type_text))
-            new_nodes.append(TextNode(alt_text, text_type_image, url))
-            remaining_text = parts[1] if len(parts) > 1 else ""
-        
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, text_type_text))
-    
-    return new_nodes
+    return _split_nodes_pattern(old_nodes, _EXTRACT_IMAGES_PATTERN, text_type_image)
 
 def split_nodes_link(old_nodes):
+    return _split_nodes_pattern(old_nodes, _EXTRACT_LINKS_PATTERN, text_type_link)
+
+def _split_nodes_pattern(old_nodes, pattern, text_type):
+    # Cut each text node at the pattern's matches, slicing the original
+    # text by match offsets rather than re-splitting what remains
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != text_type_text:
             new_nodes.append(old_node)
             continue
-        
-        links = extract_markdown_links(old_node.text)
-        if not links:
+
+        text = old_node.text
+        last = 0
+        for match in pattern.finditer(text):
+            if match.start() > last:
+                new_nodes.append(TextNode(text[last:match.start()], text_type_text))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            last = match.end()
+
+        if last == 0:
             new_nodes.append(old_node)
-            continue
-        
-        remaining_text = old_node.text
-        for text, url in links:
-            parts = remaining_text.split(f"[{text}]({url})", 1)
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], text_type_text))
-            new_nodes.append(TextNode(text, text_type_link, url))
-            remaining_text = parts[1] if len(parts) > 1 else ""
-        
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, text_type_text))
-    
+        elif last < len(text):
+            new_nodes.append(TextNode(text[last:], text_type_text))
+
     return new_nodes
 
+_DELIMITER_TYPES = {
+    "**": text_type_bold,
+    "*": text_type_italic,
+    "`": text_type_code,
+}
+_URL_CLOSE_PATTERN = re.compile(r"\)")
+
+def _compile_delimiter_patterns():
+    # Derive the tokenizer's patterns from the registered delimiters. Link
+    # text and urls stop at delimiters because the chained splitters would
+    # already have cut the text there before looking for links.
+    global _DELIMITERS, _INLINE_SPECIAL_PATTERN, _LABEL_END_PATTERN, _URL_END_PATTERN
+    # Delimiters by first character, longest first so ** wins over *
+    _DELIMITERS = {}
+    for delimiter in sorted(_DELIMITER_TYPES, key=len, reverse=True):
+        _DELIMITERS.setdefault(delimiter[0], []).append(delimiter)
+    # A delimiter that starts with a single-character delimiter is covered
+    # by that character in the pattern's character class
+    singles = "".join(re.escape(delimiter) for delimiter in _DELIMITER_TYPES if len(delimiter) == 1)
+    longer = "".join(
+        f"|{re.escape(delimiter)}" for delimiter in _DELIMITER_TYPES
+        if len(delimiter) > 1 and delimiter[0] not in _DELIMITER_TYPES
+    )
+    firsts = "".join(re.escape(char) for char in _DELIMITERS)
+    _INLINE_SPECIAL_PATTERN = re.compile(f"[{firsts}!\\[]")
+    _LABEL_END_PATTERN = re.compile(f"[\\[\\]\\n{singles}]{longer}")
+    _URL_END_PATTERN = re.compile(f"[\\n{singles}]{longer}")
+
+_compile_delimiter_patterns()
+
+def register_delimiter(delimiter, text_type):
+    """
+    Make text_to_textnodes turn text between a pair of `delimiter` (e.g.
+    "~~") into nodes of `text_type` (see textnode.register_text_type).
+    """
+    if not delimiter or delimiter[0] in "![":
+        raise ValueError(f"Invalid delimiter: {delimiter!r}")
+    _DELIMITER_TYPES[delimiter] = text_type
+    _compile_delimiter_patterns()
+
+class _NextFinder:
+    """
+    Finds the next occurrence of a pattern at or after a position, for
+    positions that never decrease: a found occurrence is reused until the
+    position passes it, so all lookups together scan the text once.
+    """
+
+    __slots__ = ("text", "search", "found", "searched_from")
+
+    def __init__(self, text, search):
+        self.text = text
+        self.search = search
+        self.found = -1
+        self.searched_from = len(text) + 1
+
+    def find(self, pos):
+        if self.found >= pos:
+            return self.found
+        if self.found == -1 and self.searched_from <= pos:
+            return -1
+        match = self.search(self.text, pos)
+        self.found = match.start() if match is not None else -1
+        self.searched_from = pos
+        return self.found
+
+def _match_link(text, start, url_close, url_end):
+    # Match [label](url) with `text[start]` being "[": returns
+    # (label, url, end) or None. The label stops at the next bracket,
+    # newline, * or `, so label scans never overlap; the url's end is
+    # found through the shared finders so its scans do not either.
+    label_end = _LABEL_END_PATTERN.search(text, start + 1)
+    if label_end is None:
+        return None
+    label_end = label_end.start()
+    if not text.startswith("](", label_end):
+        return None
+    url_start = label_end + 2
+    close = url_close.find(url_start)
+    if close == -1:
+        return None
+    stop = url_end.find(url_start)
+    if stop != -1 and stop < close:
+        return None
+    return text[start + 1:label_end], text[url_start:close], close + 1
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, text_type_text)]
-    nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
-    nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
-    nodes = split_nodes_delimiter(nodes, "`", text_type_code)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return [text_node_to_html_node(node) for node in nodes]
+    # Single left-to-right scan that emits the same nodes as running
+    # split_nodes_delimiter for **, * and `, then split_nodes_image and
+    # split_nodes_link, without building intermediate node lists. Every
+    # search starts past the previous one (see _match_link), so the scan
+    # takes time linear in the length of the text whatever its content.
+    nodes = []
+    plain_start = 0
+    pos = 0
+    search = _INLINE_SPECIAL_PATTERN.search
+    delimiters = _DELIMITERS
+    url_close = url_end = None
+    while True:
+        special = search(text, pos)
+        if special is None:
+            break
+        start = special.start()
+        char = text[start]
+        if char == "!" or char == "[":
+            if url_close is None:
+                url_close = _NextFinder(text, _URL_CLOSE_PATTERN.search)
+                url_end = _NextFinder(text, _URL_END_PATTERN.search)
+            match = None
+            if char == "[":
+                match = _match_link(text, start, url_close, url_end)
+            elif text.startswith("[", start + 1):
+                match = _match_link(text, start + 1, url_close, url_end)
+            if match is None:
+                pos = start + 1
+                continue
+            label, url, end = match
+            token = TextNode(label, text_type_image if char == "!" else text_type_link, url)
+        else:
+            for delimiter in delimiters[char]:
+                if text.startswith(delimiter, start):
+                    break
+            else:
+                pos = start + 1
+                continue
+            content_start = start + len(delimiter)
+            close = text.find(delimiter, content_start)
+            if close == -1:
+                raise ValueError("Invalid markdown, formatted section not closed")
+            token = None
+            if close > content_start:
+                token = TextNode(text[content_start:close], _DELIMITER_TYPES[delimiter])
+            end = close + len(delimiter)
+        if start > plain_start:
+            nodes.append(TextNode(text[plain_start:start], text_type_text))
+        if token is not None:
+            nodes.append(token)
+        plain_start = pos = end
+    if plain_start < len(text):
+        nodes.append(TextNode(text[plain_start:], text_type_text))
+    return nodes
+
+def text_to_children(text):
+    return text_nodes_to_html_nodes(text_to_textnodes(text))
 
 def paragraph_to_html_node(block):
-    html_nodes = text_to_textnodes(block)
+    html_nodes = text_to_children(block)
     return HTMLNode("p", None, html_nodes)
 
 def heading_to_html_node(block):
     level = len(block.split()[0])  # Count the number of '#' characters
     text = block.lstrip('#').strip()
-    html_nodes = text_to_textnodes(text)
+    html_nodes = text_to_children(text)
     return HTMLNode(f"h{level}", None, html_nodes)
 
 def code_to_html_node(block):
     code_content = block.strip('`').strip()
-    return HTMLNode("pre", None, [HTMLNode("code", None, [code_content])])
+    return HTMLNode("pre", None, [LeafNode("code", code_content)])
 
 def quote_to_html_node(block):
     lines = [line.lstrip('>').strip() for line in block.split('\n')]
@@ -132,7 +252,7 @@ def quote_to_html_node(block):
 def unordered_list_to_html_node(block):
     items = [line.lstrip('*-').strip() for line in block.split('\n')]
     html_items = [
-        HTMLNode("li", None, text_to_textnodes(item))
+        HTMLNode("li", None, text_to_children(item))
         for item in items
     ]
     return HTMLNode("ul", None, html_items)
@@ -140,62 +260,222 @@ def unordered_list_to_html_node(block):
 def ordered_list_to_html_node(block):
     items = [line.split('.', 1)[1].strip() for line in block.split('\n')]
     html_items = [
-        HTMLNode("li", None, text_to_textnodes(item))
+        HTMLNode("li", None, text_to_children(item))
         for item in items
     ]
     return HTMLNode("ol", None, html_items)
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    html_nodes = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == block_type_paragraph:
-            html_nodes.append(paragraph_to_html_node(block))
-        elif block_type == block_type_heading:
-            html_nodes.append(heading_to_html_node(block))
-        elif block_type == block_type_code:
-            html_nodes.append(code_to_html_node(block))
-        elif block_type == block_type_quote:
-            html_nodes.append(quote_to_html_node(block))
-        elif block_type == block_type_unordered_list:
-            html_nodes.append(unordered_list_to_html_node(block))
-        elif block_type == block_type_ordered_list:
-            html_nodes.append(ordered_list_to_html_node(block))
-    return HTMLNode("div", None, html_nodes)
+# Converters from block text to HTML node, indexed by block type
+_BLOCK_CONVERTERS = [
+    paragraph_to_html_node,
+    heading_to_html_node,
+    code_to_html_node,
+    quote_to_html_node,
+    unordered_list_to_html_node,
+    ordered_list_to_html_node,
+]
 
-def markdown_to_blocks(markdown):
-    # Split the markdown into blocks based on one or more blank lines
-    blocks = re.split(r'\n\s*\n', markdown)
-    
-    # Strip leading and trailing whitespace from each block and filter out empty blocks
-    blocks = [block.strip() for block in blocks if block.strip()]
-    
-    return blocks
+# (block type, matches) pairs of registered block types, tried in order
+# on blocks that would otherwise be paragraphs
+_CUSTOM_BLOCK_TYPES = []
 
-def block_to_block_type(block):
-    # Check for heading
-    if re.match(r'^#{1,6}\s', block):
+def register_block_type(name, converter, matches):
+    """
+    Add a block type and return its type code. Blocks that are not
+    headings, code, quotes or lists and for which `matches(block)` is true
+    get the new type and are converted by `converter(block)`. Use
+    text_to_children to render inline markdown inside the block.
+    """
+    block_type = NodeType(len(_BLOCK_CONVERTERS), name)
+    _BLOCK_CONVERTERS.append(converter)
+    _CUSTOM_BLOCK_TYPES.append((block_type, matches))
+    return block_type
+
+def save_registries():
+    """
+    Return the registered text types, delimiters and block types, to put
+    back with restore_registries (e.g. after a test registering its own).
+    """
+    return save_text_types(), dict(_DELIMITER_TYPES), list(_BLOCK_CONVERTERS), list(_CUSTOM_BLOCK_TYPES)
+
+def restore_registries(saved):
+    # Forget whatever was registered since save_registries
+    text_types, delimiters, converters, custom_block_types = saved
+    restore_text_types(text_types)
+    _DELIMITER_TYPES.clear()
+    _DELIMITER_TYPES.update(delimiters)
+    _BLOCK_CONVERTERS[:] = converters
+    _CUSTOM_BLOCK_TYPES[:] = custom_block_types
+    _compile_delimiter_patterns()
+
+def parser_signature():
+    """
+    Describe the registered delimiters and block types, for caches of
+    parse results that must not outlive a change to them.
+    """
+    delimiters = ",".join(f"{delimiter}={text_type}" for delimiter, text_type in _DELIMITER_TYPES.items())
+    block_types = ",".join(str(block_type) for block_type, _ in _CUSTOM_BLOCK_TYPES)
+    return f"{delimiters};{block_types}"
+
+def block_to_html_node(block, block_type):
+    try:
+        converter = _BLOCK_CONVERTERS[block_type]
+    except (IndexError, TypeError):
+        raise ValueError(f"Invalid block type: {block_type}") from None
+    return converter(block)
+
+def markdown_to_html_node(markdown, cache=None, metadata=None):
+    # With a metadata.PageMetadata, the title, outline and word count are
+    # collected from the same pass over the blocks
+    blocks = iter_blocks(markdown)
+    if metadata is not None:
+        blocks = metadata.observe(blocks)
+    return blocks_to_html_node(blocks, cache)
+
+def blocks_to_html_node(blocks, cache=None):
+    # Convert (block, block type) pairs into the document tree. With a
+    # BlockCache, each block is rendered to an HTML fragment once and
+    # reused for identical blocks on any page, as a RawHTMLNode.
+    return HTMLNode("div", None, list(iter_block_nodes(blocks, cache)))
+
+def iter_block_nodes(blocks, cache=None):
+    for block, block_type in blocks:
+        if cache is None:
+            yield block_to_html_node(block, block_type)
+            continue
+        key = (block_type, block)
+        cached = cache.get(key)
+        if cached is None:
+            node = block_to_html_node(block, block_type)
+            # Leaf texts are joined with a line break so words split
+            # across leaves stay apart
+            cached = (node.to_html(), "\n".join(iter_text(node)))
+            cache.put(key, cached)
+        yield RawHTMLNode(*cached)
+
+class StreamedDocument:
+    """
+    Document root (the same <div> as markdown_to_html_node) whose blocks
+    are converted one at a time as it is written, so blocks can flow from
+    iter_file_blocks to the output without the tree being built. It can be
+    written once. `on_node` is called with each block's node.
+    """
+
+    def __init__(self, blocks, cache=None, on_node=None):
+        self.blocks = blocks
+        self.cache = cache
+        self.on_node = on_node
+
+    def iter_html(self):
+        yield "<div>"
+        for node in iter_block_nodes(self.blocks, self.cache):
+            if self.on_node is not None:
+                self.on_node(node)
+            yield from node.iter_html()
+        yield "</div>"
+
+    def write_html(self, fp):
+        fp.writelines(self.iter_html())
+
+    def to_html(self):
+        return "".join(self.iter_html())
+
+_HEADING_PATTERN = re.compile(r"#{1,6}\s")
+_ORDERED_ITEM_PATTERN = re.compile(r"(\d+)\.\s")
+
+def iter_blocks(markdown):
+    """
+    Split markdown into blocks and classify them in a single pass over its
+    lines. Blocks are separated by whitespace-only lines and yielded as
+    (stripped block, block type) pairs. While a block's lines are
+    collected, the checks that must hold for every line (quote, unordered
+    and ordered list) are folded into flags, and once all of them have
+    failed the remaining lines are only checked for blankness. A block
+    that opens with a ``` fence runs to its closing fence, blank lines
+    included, or to the end of the document if it is never closed.
+    """
+    return iter_line_blocks(markdown.split("\n"))
+
+def iter_file_blocks(file):
+    """
+    iter_blocks for a text file object: lines are read as blocks are
+    consumed, so only the current block is held in memory.
+    """
+    return iter_line_blocks(line.rstrip("\n") for line in file)
+
+def iter_line_blocks(lines):
+    block_lines = []
+    quote = unordered = ordered = True
+    fenced = False
+    for line in lines:
+        stripped = line.strip()
+        if fenced:
+            # Inside a code fence every line belongs to the block until
+            # one closes it
+            block_lines.append(line)
+            fenced = not stripped.endswith("```")
+            continue
+        if not stripped:
+            if block_lines:
+                block = "\n".join(block_lines).strip()
+                yield block, _classify_block(block, quote, unordered, ordered)
+                block_lines = []
+                quote = unordered = ordered = True
+            continue
+        if not block_lines and stripped.startswith("```"):
+            # Only a bare fence or one with an info string opens a code
+            # block; "```x``` text" is a paragraph starting with inline code
+            fenced = "```" not in stripped[3:]
+        if quote or unordered or ordered:
+            quote, unordered, ordered = _line_flags(stripped, len(block_lines) + 1, quote, unordered, ordered)
+        block_lines.append(line)
+    if block_lines:
+        block = "\n".join(block_lines).strip()
+        # A fence left open runs to the end of the document
+        yield block, block_type_code if fenced else _classify_block(block, quote, unordered, ordered)
+
+def _line_flags(stripped, number, quote, unordered, ordered):
+    first = stripped[:1]
+    if ordered:
+        match = _ORDERED_ITEM_PATTERN.match(stripped) if first.isdigit() else None
+        ordered = match is not None and int(match.group(1)) == number
+    return (
+        quote and first == ">",
+        unordered and (first == "*" or first == "-"),
+        ordered,
+    )
+
+def _classify_block(block, quote, unordered, ordered):
+    if _HEADING_PATTERN.match(block):
         return block_type_heading
-    
-    # Check for code block
-    if block.startswith('```') and block.endswith('```'):
+    if block.startswith("```") and block.endswith("```"):
         return block_type_code
-    
-    # Check for quote block
-    if all(line.strip().startswith('>') for line in block.split('\n')):
+    if quote:
         return block_type_quote
-    
-    # Check for unordered list
-    if all(line.strip().startswith(('*', '-')) for line in block.split('\n')):
+    if unordered:
         return block_type_unordered_list
-    
-    # Check for ordered list
-    lines = block.split('\n')
-    if all(re.match(r'^\d+\.\s', line.strip()) for line in lines):
-        numbers = [int(line.split('.')[0]) for line in lines]
-        if numbers == list(range(1, len(numbers) + 1)):
-            return block_type_ordered_list
-    
-    # If none of the above conditions are met, it's a paragraph
-    return block_type_paragraph
\ No newline at end of file
+    if ordered:
+        return block_type_ordered_list
+    for block_type, matches in _CUSTOM_BLOCK_TYPES:
+        if matches(block):
+            return block_type
+    return block_type_paragraph
+
+_BLOCK_SEPARATOR_PATTERN = re.compile(r"\n\s*\n")
+
+def markdown_to_blocks(markdown):
+    # Split the markdown into blocks based on one or more blank lines,
+    # stripping each block once and dropping empty ones
+    return [
+        stripped for block in _BLOCK_SEPARATOR_PATTERN.split(markdown)
+        if (stripped := block.strip())
+    ]
+
+def block_to_block_type(block):
+    # Classify a single block with the same line flags as iter_blocks
+    quote = unordered = ordered = True
+    for number, line in enumerate(block.split("\n"), 1):
+        quote, unordered, ordered = _line_flags(line.strip(), number, quote, unordered, ordered)
+        if not (quote or unordered or ordered):
+            break
+    return _classify_block(block, quote, unordered, ordered)
@@ -0,0 +1,248 @@
+import os
+import re
+import logging
+from htmlnode import HTMLNode, LeafNode
+from inline_markdown import iter_file_blocks
+from manifest import metadata_node
+from metadata import read_front_matter
+from textnode import block_type_heading
+
+# Output directories of the generated listings, relative to the site root
+POSTS_DIR = "posts"
+TAGS_DIR = "tags"
+ARCHIVE_DIR = "archive"
+
+# Manifest keys of listings are this prefix and the listing's directory
+LISTING_KEY_PREFIX = "listing:"
+
+_SLUG_PATTERN = re.compile(r"[^\w]+")
+
+
+def slugify(text):
+    return _SLUG_PATTERN.sub("-", text.lower()).strip("-") or "-"
+
+
+def page_url(dest_path, site_dir):
+    # Pages named index.html are linked by their directory, as in content
+    prefix = os.path.join(site_dir, "")
+    rel_path = dest_path[len(prefix):] if dest_path.startswith(prefix) else os.path.relpath(dest_path, site_dir)
+    url = "/" + rel_path.replace(os.sep, "/")
+    return url[:-len("index.html")] if url.endswith("/index.html") else url
+
+
+def tag_slugs(tags):
+    """
+    Map a slug to each of `tags`, a {lowercase tag: (tag, entries)}
+    dict. Distinct tags with the same slug ("C" and "C++") are reported,
+    and all but the first in sorted order get a numbered slug ("c-2").
+    """
+    slugs = {}
+    natural = {slugify(key) for key in tags}
+    for key in sorted(tags):
+        slug = base = slugify(key)
+        if slug in slugs:
+            number = 2
+            while (slug := f"{base}-{number}") in natural or slug in slugs:
+                number += 1
+            logging.warning(f"Tags {slugs[base][0]!r} and {tags[key][0]!r} have the same slug {base!r}; "
+                            f"listing {tags[key][0]!r} under {TAGS_DIR}/{slug}")
+        slugs[slug] = tags[key]
+    return slugs
+
+
+class ListingEntry:
+    """
+    What a listing shows of one page: its title, URL, date and tags.
+    """
+
+    __slots__ = ("source", "url", "title", "date", "tags")
+
+    def __init__(self, source, url, title, date=None, tags=()):
+        self.source = source
+        self.url = url
+        self.title = title
+        self.date = date
+        self.tags = tags
+
+    def to_value(self):
+        # What listings depend on, for manifest.set_metadata
+        return [self.url, self.title, self.date, list(self.tags)]
+
+    def __repr__(self):
+        return f"ListingEntry({self.url}, {self.title}, {self.date}, {list(self.tags)})"
+
+
+def read_listing_entry(from_path, dest_path, site_dir):
+    """
+    Read a page's front matter and its blocks up to the first h1, without
+    the rest of the body. The title is the front matter title, else the
+    first h1, else the file name; tags may be a list or a comma-separated
+    string.
+    """
+    with open(from_path, "r") as file:
+        variables = read_front_matter(file)
+        title = variables.get("title")
+        if not title:
+            for block, block_type in iter_file_blocks(file):
+                if block_type == block_type_heading and block.startswith("# "):
+                    title = block.split("\n", 1)[0][1:].strip()
+                    break
+    tags = variables.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    date = variables.get("date") or None
+    title = title or os.path.splitext(os.path.basename(from_path))[0]
+    return ListingEntry(from_path, page_url(dest_path, site_dir), title, date, tuple(tags))
+
+
+class Listing:
+    """
+    A sorted list of entries published as numbered pages under
+    `directory` of the site: directory/index.html, then
+    directory/page/2/index.html and so on.
+    """
+
+    def __init__(self, key, title, directory, entries):
+        self.key = key
+        self.title = title
+        self.directory = directory
+        self.entries = entries
+
+    def page_count(self, per_page):
+        return max(1, -(-len(self.entries) // per_page))
+
+    def page_path(self, site_dir, number):
+        if number == 1:
+            return os.path.join(site_dir, self.directory, "index.html")
+        return os.path.join(site_dir, self.directory, "page", str(number), "index.html")
+
+    def page_url(self, number):
+        return f"/{self.directory}/" if number == 1 else f"/{self.directory}/page/{number}/"
+
+    def outputs(self, site_dir, per_page):
+        return [self.page_path(site_dir, number) for number in range(1, self.page_count(per_page) + 1)]
+
+    def iter_pages(self, site_dir, per_page):
+        """
+        Yield (output path, template context) for each page in turn; the
+        HTML of a page is only built when it is reached.
+        """
+        count = self.page_count(per_page)
+        for number in range(1, count + 1):
+            entries = self.entries[(number - 1) * per_page:number * per_page]
+            title = self.title if number == 1 else f"{self.title} (page {number} of {count})"
+            context = {
+                'Title': title,
+                'Content': self.page_node(title, entries, number, count),
+                'Page': number,
+                'PageCount': count,
+            }
+            yield self.page_path(site_dir, number), context
+
+    def page_node(self, title, entries, number, count):
+        items = []
+        for entry in entries:
+            children = [LeafNode("a", entry.title, {"href": entry.url})]
+            if entry.date:
+                children += [LeafNode(None, " "), LeafNode("time", entry.date, {"datetime": entry.date})]
+            items.append(HTMLNode("li", None, children))
+        children = [LeafNode("h1", title)]
+        if items:
+            children.append(HTMLNode("ul", None, items))
+        links = []
+        if number > 1:
+            links.append(LeafNode("a", "Newer", {"href": self.page_url(number - 1), "rel": "prev"}))
+        if number < count:
+            links.append(LeafNode("a", "Older", {"href": self.page_url(number + 1), "rel": "next"}))
+        if links:
+            children.append(HTMLNode("nav", None, links))
+        return HTMLNode("div", None, children)
+
+
+def build_listings(entries):
+    """
+    Group entries into listings: every dated page under posts/, each tag
+    under tags/<tag>/ and each year under archive/<year>/. Entries are
+    sorted newest first in each listing.
+    """
+    # Newest first and undated pages last, by title within a date (sorts
+    # are stable)
+    entries = sorted(entries, key=lambda entry: entry.title.lower())
+    entries.sort(key=lambda entry: entry.date or "", reverse=True)
+    posts = [entry for entry in entries if entry.date]
+    tags, years = {}, {}
+    for entry in entries:
+        # Tags differing only in case are one tag, listing each page once
+        for key, tag in {tag.lower(): tag for tag in reversed(entry.tags)}.items():
+            tags.setdefault(key, (tag, []))[1].append(entry)
+        if entry.date:
+            years.setdefault(entry.date[:4], []).append(entry)
+    listings = []
+    if posts:
+        listings.append(Listing(LISTING_KEY_PREFIX + POSTS_DIR, "Posts", POSTS_DIR, posts))
+    for slug, (tag, tagged) in sorted(tag_slugs(tags).items()):
+        listings.append(Listing(f"{LISTING_KEY_PREFIX}{TAGS_DIR}/{slug}", f"Tagged {tag}", f"{TAGS_DIR}/{slug}", tagged))
+    for year, dated in sorted(years.items(), reverse=True):
+        listings.append(Listing(f"{LISTING_KEY_PREFIX}{ARCHIVE_DIR}/{year}", year, f"{ARCHIVE_DIR}/{year}", dated))
+    return listings
+
+
+def generate_listings(pages, site_dir, template, template_path=None, manifest=None, per_page=20,
+                      compressor=None):
+    """
+    Generate the listing pages for a work list of (markdown path, html
+    path) pairs from each page's metadata only (see read_listing_entry).
+
+    With a BuildManifest, each page's entry is recorded as metadata and
+    each listing as a step reading the entries it shows and the template,
+    so a listing is only regenerated when one of them changes, and the
+    pages of listings that no longer exist (a tag nobody uses any more)
+    are deleted. A listing whose pages would overwrite a content page is
+    reported and not written. Returns the number of listing pages written.
+    """
+    entries = []
+    for from_path, dest_path in pages:
+        entry = read_listing_entry(from_path, dest_path, site_dir)
+        entries.append(entry)
+        if manifest is not None:
+            manifest.set_metadata('listing', from_path, entry.to_value())
+
+    written = 0
+    listings = build_listings(entries)
+    page_outputs = {dest_path for _, dest_path in pages}
+    skipped = set()
+    for listing in listings:
+        outputs = listing.outputs(site_dir, per_page)
+        clashes = [path for path in outputs if path in page_outputs]
+        if clashes:
+            # Never overwrite a content page; its manifest entry would
+            # still claim the file
+            logging.error(f"Listing {listing.title!r} not written: {clashes[0]} is generated from a page")
+            skipped.add(listing.key)
+            continue
+        if compressor is not None:
+            outputs += [path for output in outputs for path in compressor.outputs(output)]
+        inputs = [metadata_node('listing', entry.source) for entry in listing.entries]
+        if template_path is not None:
+            inputs.append(template_path)
+        reasons = None
+        if manifest is not None:
+            reasons = manifest.stale_reasons(listing.key, inputs, outputs)
+            if not reasons:
+                continue
+        for dest_path, context in listing.iter_pages(site_dir, per_page):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, 'w') if compressor is None else compressor.open(dest_path) as file:
+                template.stream(file, context)
+            written += 1
+        if manifest is not None:
+            manifest.record(listing.key, inputs, outputs, reasons)
+    if manifest is not None:
+        keys = {listing.key for listing in listings} - skipped
+        for key in [key for key in manifest.entries if key.startswith(LISTING_KEY_PREFIX) and key not in keys]:
+            # Outputs a page has taken over are the page's to keep
+            entry = manifest.entries[key]
+            entry['outputs'] = [path for path in entry['outputs'] if path not in page_outputs]
+            manifest.remove(key)
+    logging.info(f"Listings: {len(listings)} listings of {len(entries)} pages, {written} pages written")
+    return written
@@ -1,118 +1,851 @@
 import os
+import json
 import shutil
 import logging
+import argparse
+import cProfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from inline_markdown import markdown_to_html_node
+from assets import sync_asset, sync_assets
+from compress import Compressor
+from inline_markdown import StreamedDocument, blocks_to_html_node, iter_blocks, iter_file_blocks, markdown_to_html_node
+from listings import generate_listings
+from manifest import BuildManifest
+from metadata import PageMetadata, read_metadata, scan_metadata, split_front_matter
+from parse_cache import ParseCache
+from pipeline import run_pipeline, write_text
+from profiling import BuildProfiler, StageTimer, profile_stage
+from render_cache import BlockCache
+from renderer import page_context
+from search_index import PageTermStore, SearchIndexBuilder, node_tokens, read_page_tokens
+from shard import merge_shards, parse_shard, shard_pages, shard_paths
+from template import TEMPLATE_NAME, Template, TemplateLoader
+from walker import IGNORE_FILE, Walker
+from watch import Watcher, serve
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
-def copy_directory(src, dest):
+# Site layout, relative to the repository root
+CONTENT_DIR = "content"
+DEST_DIR = "src/public"
+
+# Build manifest and dependency graph, kept between runs
+MANIFEST_PATH = ".cache/manifest.json"
+
+# Parsed page trees, kept between runs when --parse-cache is set
+PARSE_CACHE_DIR = ".cache/parse"
+
+# Markdown files larger than this are rendered block by block straight
+# from the file (see write_page_streamed) instead of being read whole
+STREAM_THRESHOLD = 16 << 20
+
+# What a build does besides writing pages, and the caches and helpers it
+# shares between pages:
+#   manifest      BuildManifest skipping unchanged pages and recording the rest
+#   jobs          worker processes rendering pages
+#   block_cache   BlockCache of rendered blocks
+#   profiler      BuildProfiler timing each stage of each page
+#   pipeline      overlap reading, rendering and writing (see generate_pages_pipelined)
+#   prefetch      pages read ahead by the pipeline
+#   search_index  build the search index (see generate_pages_recursive)
+#   compressor    Compressor writing precompressed siblings of each output
+#   shard         (i, N) to generate shard i of N of the pages
+#   parse_cache   ParseCache of parsed page bodies
+#   walker        Walker listing the content tree
+#   listings      entries per listing page, 0 for no listings
+BuildOptions = namedtuple(
+    'BuildOptions',
+    ['manifest', 'jobs', 'block_cache', 'profiler', 'pipeline', 'prefetch', 'search_index', 'compressor',
+     'shard', 'parse_cache', 'walker', 'listings'],
+    defaults=[None, 1, None, None, False, 16, False, None, None, None, None, 0],
+)
+
+def copy_file(src, dest, manifest=None, hardlink=False, compressor=None):
+    if sync_asset(src, dest, manifest, hardlink, compressor=compressor):
+        logging.info(f"Copied file: {src} to {dest}")
+
+def copy_directory(src, dest, manifest=None, hardlink=False, compressor=None, walker=None):
     if not os.path.exists(src):
         logging.warning(f"Source directory does not exist: {src}")
-        return
+        return None
 
-    if not os.path.exists(dest):
-        os.mkdir(dest)
-        logging.info(f"Created directory: {dest}")
-    
-    for item in os.listdir(src):
-        s = os.path.join(src, item)
-        d = os.path.join(dest, item)
-        if os.path.isfile(s):
-            shutil.copy2(s, d)
-            logging.info(f"Copied file: {s} to {d}")
-        elif os.path.isdir(s):
-            copy_directory(s, d)
+    report = sync_assets(src, dest, manifest, hardlink, compressor=compressor, walker=walker)
+    logging.info(
+        f"Static files: copied {report.copied_files} ({report.copied_bytes} bytes), "
+        f"skipped {report.skipped_files} unchanged ({report.skipped_bytes} bytes)"
+    )
+    return report
 
-def extract_title(markdown):
+# Output directories this process has already created during the build
+_created_directories = set()
+
+def ensure_directory(directory):
+    if directory not in _created_directories:
+        os.makedirs(directory, exist_ok=True)
+        _created_directories.add(directory)
+
+def parse_page(markdown_body, variables, block_cache=None, parse_cache=None):
     """
-    Extract the title (h1) from a markdown string.
-    Raises an exception if no h1 is found.
+    Convert a page's markdown body to an HTML node tree, collecting the
+    title, outline and word count from the same pass over the blocks.
+    Returns (html node, PageMetadata); with a ParseCache, pages parsed in
+    an earlier build come from the cache instead.
     """
-    lines = markdown.split('\n')
-    for line in lines:
-        if line.startswith('# '):
-            return line[2:].strip()
-    raise ValueError("No h1 header found in the markdown file")
+    if parse_cache is not None:
+        return parse_cache.parse(markdown_body, variables, block_cache)
+    metadata = PageMetadata(variables)
+    return markdown_to_html_node(markdown_body, block_cache, metadata), metadata
 
-def generate_page(from_path, template_path, dest_path):
+def render_page_and_metadata(markdown_content, template, block_cache=None, search=False, parse_cache=None):
     """
-    Generate an HTML page from a markdown file and a template.
+    Render markdown through a compiled template and return the page HTML
+    and the page's PageMetadata, with the page's search terms as its
+    `tokens` when `search` is set.
     """
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    
+    variables, markdown_body = split_front_matter(markdown_content)
+    html_node, metadata = parse_page(markdown_body, variables, block_cache, parse_cache)
+    if search:
+        metadata.tokens = node_tokens(html_node)
+    return template.render(page_context(variables, metadata, html_node)), metadata
+
+def write_page(from_path, template, dest_path, options=BuildOptions(), timer=None, search=False):
+    """
+    Render a markdown file through a compiled template and write the HTML
+    page. Produces no output of its own so it can run in a worker process.
+    With a StageTimer the page is timed stage by stage instead. Returns the
+    page's PageMetadata, with the page's search terms as its `tokens` when
+    `search` is set. Of the BuildOptions, the block cache, compressor and
+    parse cache apply: with a compress.Compressor, the page is also written
+    precompressed from the text as it is streamed; with a ParseCache, an
+    unchanged page body is not parsed again (very large files, which are
+    streamed, are not cached).
+    """
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        metadata = write_page_streamed(from_path, template, dest_path, options, search)
+        if timer is not None:
+            timer.lap('write')
+        return metadata
+    if timer is not None:
+        return write_page_timed(from_path, template, dest_path, options, timer, search)
+
     # Read the markdown file
     with open(from_path, 'r') as file:
         markdown_content = file.read()
     
-    # Read the template file
-    with open(template_path, 'r') as file:
-        template_content = file.read()
+    # Separate front matter variables from the markdown body
+    variables, markdown_body = split_front_matter(markdown_content)
     
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
-    
-    # Extract the title
-    title = extract_title(markdown_content)
-    
-    # Replace placeholders in the template
-    final_html = template_content.replace('{{ Title }}', title).replace('{{ Content }}', html_content)
+    # Convert markdown to HTML, collecting the title, outline and word
+    # count from the same pass over the blocks
+    html_node, metadata = parse_page(markdown_body, variables, options.block_cache, options.parse_cache)
+    context = page_context(variables, metadata, html_node)
+    if search:
+        metadata.tokens = node_tokens(html_node)
     
     # Ensure the destination directory exists
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    ensure_directory(os.path.dirname(dest_path))
     
-    # Write the final HTML to the destination file
+    # Stream the page into the destination file without building it in memory
+    compressor = options.compressor
+    with open(dest_path, 'w') if compressor is None else compressor.open(dest_path) as file:
+        template.stream(file, context)
+    return metadata
+
+def write_page_streamed(from_path, template, dest_path, options=BuildOptions(), search=False):
+    """
+    write_page for very large files, with memory use independent of the
+    file size: a first pass over the file's blocks collects the metadata
+    (the title must be known before the body is written), then a second
+    pass converts each block and streams it to the output as it is read,
+    compressing it into the precompressed siblings on the way.
+    """
+    with open(from_path, 'r') as source:
+        metadata = scan_metadata(source)
+        on_node = None
+        if search:
+            metadata.tokens = []
+            on_node = lambda node: metadata.tokens.extend(node_tokens(node))
+        document = StreamedDocument(iter_file_blocks(source), options.block_cache, on_node)
+        context = page_context(metadata.front_matter, metadata, document)
+        ensure_directory(os.path.dirname(dest_path))
+        compressor = options.compressor
+        with open(dest_path, 'w') if compressor is None else compressor.open(dest_path) as file:
+            template.stream(file, context)
+    return metadata
+
+def write_page_timed(from_path, template, dest_path, options, timer, search=False):
+    """
+    write_page with a lap of `timer` after each stage. Serialization,
+    templating and writing are interleaved when streaming, so this renders
+    the page to a string first to time them separately. With a ParseCache,
+    block splitting and inline parsing are timed together as 'parse'.
+    """
+    with open(from_path, 'r') as file:
+        markdown_content = file.read()
+    variables, markdown_body = split_front_matter(markdown_content)
+    timer.lap('read')
+
+    if options.parse_cache is not None:
+        html_node, metadata = options.parse_cache.parse(markdown_body, variables, options.block_cache)
+        timer.lap('parse')
+    else:
+        metadata = PageMetadata(variables)
+        blocks = list(metadata.observe(iter_blocks(markdown_body)))
+        timer.lap('blocks')
+
+        html_node = blocks_to_html_node(blocks, options.block_cache)
+        timer.lap('inline')
+        timer.count('blocks', len(blocks))
+
+    if search:
+        metadata.tokens = node_tokens(html_node)
+        timer.lap('search')
+
+    html_content = html_node.to_html()
+    timer.lap('serialize')
+
+    context = page_context(variables, metadata, html_content)
+    final_html = template.render(context)
+    timer.lap('template')
+
+    ensure_directory(os.path.dirname(dest_path))
     with open(dest_path, 'w') as file:
         file.write(final_html)
-    
-    logging.info(f"Generated page: {dest_path}")
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    for entry in os.listdir(dir_path_content):
-        entry_path = os.path.join(dir_path_content, entry)
-        if os.path.isfile(entry_path) and entry.endswith('.md'):
-            # Generate HTML file name
-            rel_path = os.path.relpath(entry_path, dir_path_content)
-            dest_file = os.path.join(dest_dir_path, Path(rel_path).with_suffix('.html'))
-            
-            # Ensure destination directory exists
-            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-            
-            # Generate the page
-            generate_page(entry_path, template_path, dest_file)
-            logging.info(f"Generated page: {dest_file}")
-        elif os.path.isdir(entry_path):
-            # Recursively process subdirectories
-            sub_dest_dir = os.path.join(dest_dir_path, entry)
-            generate_pages_recursive(entry_path, template_path, sub_dest_dir)
-
-def main():
+    timer.lap('write')
+
+    if options.compressor is not None:
+        options.compressor.submit(dest_path, final_html)
+        timer.lap('compress')
+
+    timer.count('markdown_bytes', len(markdown_content))
+    timer.count('html_bytes', len(final_html))
+    return metadata
+
+# Settings of a page generation worker process, set by init_worker
+_worker_options = BuildOptions()
+_worker_profile = False
+_worker_search = False
+_worker_templates = {}
+
+def init_worker(block_cache, profile=False, search=False, compress_formats=None, parse_cache=None, templates=None):
+    # `templates` maps template paths to the compiled templates of the
+    # pages the worker is sent by path (see generate_pages_pipelined)
+    global _worker_options, _worker_profile, _worker_search, _worker_templates
+    # Worker processes are the compression pool, so compress inline
+    compressor = Compressor(compress_formats, jobs=0) if compress_formats else None
+    if block_cache is not None:
+        block_cache.track_added()
+    _worker_options = BuildOptions(block_cache=block_cache, compressor=compressor, parse_cache=parse_cache)
+    _worker_profile = profile
+    _worker_search = search
+    _worker_templates = templates or {}
+
+def write_page_in_worker(from_path, template, dest_path):
+    """
+    write_page for worker processes: renders with the worker's copy of the
+    block cache and returns the page metadata, the (hits, misses) it added
+    and the fragments it rendered (see merge_block_cache), along with the
+    page's stage timings and counters when profiling.
+    """
+    cache = _worker_options.block_cache
+    timer = StageTimer() if _worker_profile else None
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    metadata = write_page(from_path, template, dest_path, _worker_options, timer, _worker_search)
+    added = None
+    if cache is not None:
+        hits, misses, added = cache.hits - hits, cache.misses - misses, cache.take_added()
+    if timer is None:
+        return metadata, (hits, misses, added), None, None
+    return metadata, (hits, misses, added), timer.timings, timer.counters
+
+def merge_block_cache(block_cache, worker_cache):
+    """
+    Add what a worker did with its copy of the block cache to the build's
+    cache: the (hits, misses, added fragments) a worker page returns.
+    """
+    hits, misses, added = worker_cache
+    if block_cache is not None:
+        block_cache.hits += hits
+        block_cache.misses += misses
+        for key, value in added or ():
+            block_cache.put(key, value)
+
+def generate_page(from_path, template_path, dest_path, template=None, options=BuildOptions(), search=False):
+    """
+    Generate an HTML page from a markdown file and a template. Returns the
+    page metadata.
+    """
+    logging.debug(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    if template is None:
+        template = Template.load(template_path)
+    profiler = options.profiler
+    timer = StageTimer() if profiler is not None else None
+    metadata = write_page(from_path, template, dest_path, options, timer, search)
+    if profiler is not None:
+        profiler.add_page(from_path, timer.timings, timer.counters)
+    logging.debug(f"Generated page: {dest_path}")
+    return metadata
+
+def collect_pages(dir_path_content, dest_dir_path, walker=None):
+    """
+    Walk the content tree and return a sorted work list of
+    (markdown path, html path) pairs for the markdown files that `walker`
+    (a walker.Walker, applying include/exclude globs) lists.
+    """
+    if walker is None:
+        walker = Walker()
+    pages = []
+    for path, rel_path, _ in walker.walk(dir_path_content):
+        if rel_path.endswith('.md'):
+            pages.append((path, os.path.join(dest_dir_path, Path(rel_path).with_suffix('.html'))))
+    return pages
+
+def generate_pages(pages, template_path, options=BuildOptions(), templates=None, search=None):
+    """
+    Generate every page in the work list, fanning out to `options.jobs`
+    worker processes when jobs > 1. Pages are logged and recorded in work
+    list order whatever order the workers finish in. Each worker renders
+    with its own copy of the block cache; their hit/miss counts are added
+    back. With `pipeline`, reads and writes overlap with rendering instead
+    (see generate_pages_pipelined). With a SearchIndexBuilder as `search`,
+    the terms of each page are added to it as it is rendered, and
+    unchanged pages are parsed (but not written) for theirs. With a
+    Compressor, each generated page also gets precompressed siblings. With
+    a ParseCache, pages whose body was parsed before skip parsing.
+    """
+    if templates is None:
+        templates = TemplateLoader(template_path)
+    _created_directories.clear()
+    manifest, compressor = options.manifest, options.compressor
+
+    def page_outputs(dest_path):
+        return [dest_path] + (compressor.outputs(dest_path) if compressor is not None else [])
+
+    # Resolve each page's template (once per directory) and skip pages
+    # whose markdown and template are unchanged
+    work = []
+    for from_path, dest_path in pages:
+        page_template_path = templates.resolve(os.path.dirname(from_path))
+        inputs = [from_path, page_template_path]
+        reasons = None
+        if manifest is not None:
+            reasons = manifest.stale_reasons(from_path, inputs, page_outputs(dest_path))
+            if not reasons:
+                continue
+        work.append((from_path, dest_path, page_template_path, inputs, reasons))
+
+    # Page ids of the search index follow the work list order
+    page_ids = {from_path: page_id for page_id, (from_path, _) in enumerate(pages)} if search is not None else None
+
+    def page_done(from_path, dest_path, inputs, reasons, metadata):
+        if manifest is not None:
+            manifest.record(from_path, inputs, page_outputs(dest_path), reasons)
+        if search is not None:
+            title = metadata.page_title()
+            search.add_page(page_ids.pop(from_path), dest_path, title, metadata.tokens)
+            if search.terms is not None:
+                search.terms.put(from_path, manifest.file_hash(from_path), title, metadata.tokens)
+
+    searching = search is not None
+    serial = work
+    if options.pipeline:
+        # The pipeline reads files whole, so very large ones are streamed
+        # separately afterwards
+        serial = [item for item in work if os.path.getsize(item[0]) > STREAM_THRESHOLD]
+        streamed = {item[0] for item in serial}
+        generate_pages_pipelined([item for item in work if item[0] not in streamed], templates, page_done, options,
+                                 searching)
+    elif options.jobs > 1 and len(work) > 1:
+        generate_pages_parallel(work, templates, page_done, options, searching)
+        serial = []
+    for from_path, dest_path, page_template_path, inputs, reasons in serial:
+        metadata = generate_page(from_path, page_template_path, dest_path, templates.get(page_template_path),
+                                 options, searching)
+        page_done(from_path, dest_path, inputs, reasons, metadata)
+    logging.info(f"Generated {len(work)} pages, {len(pages) - len(work)} unchanged")
+
+    if search is not None:
+        # Unchanged pages give the terms kept from the build that last
+        # rendered them, and are only parsed when those are missing
+        for from_path, dest_path in pages:
+            if from_path in page_ids:
+                terms = None
+                if search.terms is not None:
+                    digest = manifest.file_hash(from_path)
+                    terms = search.terms.get(from_path, digest)
+                if terms is None:
+                    terms = read_page_tokens(from_path)
+                    if search.terms is not None:
+                        search.terms.put(from_path, digest, *terms)
+                search.add_page(page_ids.pop(from_path), dest_path, *terms)
+
+def generate_pages_parallel(work, templates, page_done, options, search=False):
+    jobs, block_cache, profiler = options.jobs, options.block_cache, options.profiler
+    compress_formats = options.compressor.formats if options.compressor is not None else None
+    chunksize = max(1, len(work) // (jobs * 4))
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                   initargs=(block_cache, profiler is not None, search, compress_formats,
+                                             options.parse_cache))
+    try:
+        results = executor.map(
+            write_page_in_worker,
+            [from_path for from_path, _, _, _, _ in work],
+            [templates.get(page_template_path) for _, _, page_template_path, _, _ in work],
+            [dest_path for _, dest_path, _, _, _ in work],
+            chunksize=chunksize,
+        )
+        for from_path, dest_path, _, inputs, reasons in work:
+            try:
+                metadata, worker_cache, timings, counters = next(results)
+            except Exception:
+                logging.error(f"Failed to generate page: {from_path}")
+                raise
+            merge_block_cache(block_cache, worker_cache)
+            if profiler is not None:
+                profiler.add_page(from_path, timings, counters)
+            logging.debug(f"Generated page: {dest_path}")
+            page_done(from_path, dest_path, inputs, reasons, metadata)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+# What the pipeline carries for each page besides its paths: the page's
+# template (by path) to render with and its manifest inputs and reasons
+PipelinePage = namedtuple('PipelinePage', ['template_path', 'inputs', 'reasons'])
+
+def generate_pages_pipelined(work, templates, page_done, options, search=False):
+    """
+    Generate pages through pipeline.run_pipeline: markdown is prefetched
+    on I/O threads, rendered in this process (or on `options.jobs` worker
+    processes), and written on I/O threads while later pages render.
+    Worker processes get the templates and build-wide settings once, when
+    they start.
+    """
+    jobs, block_cache, prefetch = options.jobs, options.block_cache, options.prefetch
+    compressor, parse_cache = options.compressor, options.parse_cache
+    def on_done(item, result):
+        from_path, dest_path, page = item
+        metadata, worker_cache = result
+        if worker_cache is not None:
+            merge_block_cache(block_cache, worker_cache)
+        logging.debug(f"Generated page: {dest_path}")
+        page_done(from_path, dest_path, page.inputs, page.reasons, metadata)
+
+    def render(markdown_content, page):
+        template = templates.get(page.template_path)
+        html, metadata = render_page_and_metadata(markdown_content, template, block_cache, search, parse_cache)
+        return html, (metadata, None)
+
+    items = [
+        (from_path, dest_path, PipelinePage(page_template_path, inputs, reasons))
+        for from_path, dest_path, page_template_path, inputs, reasons in work
+    ]
+    def write(dest_path, html):
+        write_text(dest_path, html)
+        compressor.submit(dest_path, html)
+
+    if compressor is None:
+        write = write_text
+    if jobs <= 1:
+        run_pipeline(items, render, on_done, prefetch, write=write)
+        return
+    worker_templates = {path: templates.get(path) for path in {page.template_path for _, _, page in items}}
+    initializer = partial(init_worker, block_cache, search=search, parse_cache=parse_cache, templates=worker_templates)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer) as executor:
+        run_pipeline(items, render_page_in_worker, on_done, prefetch, render_executor=executor, write=write)
+
+def render_page_in_worker(markdown_content, page):
+    # render_page_and_metadata with the worker's settings and copy of the
+    # block cache, returning what it did with it as write_page_in_worker does
+    options = _worker_options
+    cache = options.block_cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    html, metadata = render_page_and_metadata(markdown_content, _worker_templates[page.template_path], cache,
+                                              _worker_search, options.parse_cache)
+    if cache is None:
+        return html, (metadata, None)
+    return html, (metadata, (cache.hits - hits, cache.misses - misses, cache.take_added()))
+
+# Manifest key of the search index build step
+SEARCH_INDEX_KEY = "search-index"
+
+def search_terms_dir(manifest):
+    return os.path.join(os.path.dirname(manifest.path), "search-terms")
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, options=BuildOptions()):
+    """
+    Generate every page under dir_path_content. With `search_index`, also
+    build the site's search index (see search_index.SearchIndexBuilder)
+    unless no page source changed since it was last built. With `shard`
+    as (i, N), only the pages of shard i of N are generated (see
+    shard.shard_of). With `listings` > 0, also generate listing pages of
+    that many entries each from every page's metadata (see
+    listings.generate_listings); sharded builds leave them to shard 1.
+    """
+    manifest, profiler, compressor = options.manifest, options.profiler, options.compressor
+    shard, walker, listings = options.shard, options.walker, options.listings
+    with profile_stage(profiler, 'walk'):
+        pages = collect_pages(dir_path_content, dest_dir_path, walker)
+    all_pages = pages
+    if shard is not None:
+        total = len(pages)
+        pages = shard_pages(pages, dir_path_content, *shard)
+        logging.info(f"Shard {shard[0]}/{shard[1]}: {len(pages)} of {total} pages")
+    templates = TemplateLoader(template_path, root=dir_path_content)
+
+    search = start_search_index(pages, dest_dir_path, manifest) if options.search_index else None
+
+    generate_pages(pages, template_path, options, templates, search)
+
+    if search is not None:
+        finish_search_index(search, pages, options)
+
+    if listings > 0 and (shard is None or shard[0] == 1):
+        with profile_stage(profiler, 'listings'):
+            write_listings(all_pages, dir_path_content, dest_dir_path, templates, manifest, listings, compressor)
+
+def start_search_index(pages, dest_dir, manifest):
+    # A SearchIndexBuilder for the index of `pages`, or None when no page
+    # source changed since it was last built
+    search_inputs = [from_path for from_path, _ in pages]
+    search_outputs = []
+    if manifest is not None:
+        search_outputs = manifest.entries.get(SEARCH_INDEX_KEY, {}).get('outputs', [])
+    if search_outputs and manifest.is_fresh(SEARCH_INDEX_KEY, search_inputs, search_outputs):
+        return None
+    # Pages' terms are kept next to the manifest
+    terms = PageTermStore(search_terms_dir(manifest)) if manifest is not None else None
+    return SearchIndexBuilder(dest_dir, terms=terms)
+
+def finish_search_index(search, pages, options):
+    manifest, compressor = options.manifest, options.compressor
+    search_inputs = [from_path for from_path, _ in pages]
+    with profile_stage(options.profiler, 'search-index'):
+        search_outputs = search.finish()
+    if compressor is not None:
+        for path in list(search_outputs):
+            compressor.submit_file(path)
+            search_outputs.extend(compressor.outputs(path))
+    if manifest is not None:
+        manifest.record(SEARCH_INDEX_KEY, search_inputs, search_outputs)
+    if search.terms is not None:
+        search.terms.prune(search_inputs)
+        logging.info(f"Search terms: {search.terms.hits} pages reused, {search.terms.misses} parsed")
+
+def write_listings(pages, content_dir, dest_dir, templates, manifest, per_page, compressor=None):
+    # Listings are rendered with the template of the content root
+    template_path = templates.resolve(content_dir)
+    return generate_listings(pages, dest_dir, templates.get(template_path), template_path, manifest, per_page,
+                             compressor)
+
+def write_metadata_index(pages, path):
+    """
+    Write the metadata of every page (title, outline, word count and front
+    matter) to `path` as JSON. Page bodies are classified into blocks but
+    not rendered.
+    """
+    index = [dict(read_metadata(from_path).to_dict(), path=from_path, output=dest_path) for from_path, dest_path in pages]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(index, file, indent=1)
+    logging.info(f"Wrote metadata of {len(index)} pages to {path}")
+
+def is_within(path, directory):
+    return os.path.normpath(path).startswith(os.path.normpath(directory) + os.sep)
+
+def rebuild_paths(paths, content_dir, static_dir, template_path, dest_dir, options, assets_walker=None):
+    """
+    Regenerate only the outputs affected by a set of changed, added or
+    removed source paths, as reported by the watcher; `options` must have
+    a manifest. Pages and assets the walkers exclude are treated as
+    removed. With `listings`, listings are brought up to date after any
+    page or template change, and with `search_index` so is the search
+    index: every page is then checked, and unchanged ones give the terms
+    kept from the build that last rendered them.
+    """
+    manifest, compressor, listings = options.manifest, options.compressor, options.listings
+    walker = options.walker
+    if walker is None:
+        walker = Walker()
+    if assets_walker is None:
+        assets_walker = Walker()
+    manifest.reset()
+    pages = []
+    for path in sorted(paths):
+        if path == template_path or (is_within(path, content_dir) and os.path.basename(path) == TEMPLATE_NAME):
+            # Every page the template may apply to is a candidate; the
+            # manifest skips those whose resolved template did not change
+            # (walked from the content root so patterns apply as in a build)
+            directory = content_dir if path == template_path else os.path.dirname(path)
+            if os.path.isdir(directory):
+                pages.extend(
+                    page for page in collect_pages(content_dir, dest_dir, walker)
+                    if directory == content_dir or is_within(page[0], directory)
+                )
+        elif is_within(path, content_dir) and path.endswith('.md'):
+            # Pages that read this page (or metadata such as its title) are
+            # candidates too; the manifest skips those whose inputs hash the same
+            for key in manifest.affected([path]) - {path}:
+                if is_within(key, content_dir) and os.path.isfile(key):
+                    pages.append((key, manifest.entries[key]['outputs'][0]))
+            if os.path.isfile(path) and walker.accepts(content_dir, path):
+                rel_path = Path(os.path.relpath(path, content_dir)).with_suffix('.html')
+                pages.append((path, os.path.join(dest_dir, rel_path)))
+            else:
+                manifest.remove(path)
+        elif is_within(path, static_dir):
+            if os.path.isfile(path) and assets_walker.accepts(static_dir, path):
+                copy_file(path, os.path.join(dest_dir, os.path.relpath(path, static_dir)), manifest,
+                          compressor=compressor)
+            else:
+                manifest.remove(path)
+
+    templates = TemplateLoader(template_path, root=content_dir)
+    pages = sorted(set(pages))
+    all_pages = search = None
+    if any(path == template_path or is_within(path, content_dir) for path in paths):
+        all_pages = collect_pages(content_dir, dest_dir, walker)
+        if options.search_index:
+            search = start_search_index(all_pages, dest_dir, manifest)
+    if search is not None:
+        # Page ids follow the order of a full build's work list; the
+        # manifest still skips pages that did not change
+        pages = all_pages
+    generate_pages(pages, template_path, options, templates, search)
+    if search is not None:
+        finish_search_index(search, all_pages, options)
+    if listings > 0 and all_pages is not None:
+        write_listings(all_pages, content_dir, dest_dir, templates, manifest, listings, compressor)
+    if compressor is not None:
+        compressor.wait()
+    manifest.save()
+
+def log_block_cache_stats(block_cache):
+    stats = block_cache.stats()
+    logging.info(
+        f"Block cache: {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries"
+    )
+
+def shard_argument(value):
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static site.")
+    parser.add_argument('--explain', metavar='PATH',
+                        help="show what a page or output was built from and why it was last "
+                             "rebuilt, then exit without building")
+    parser.add_argument('--metadata-index', metavar='PATH',
+                        help="write every page's title, outline, word count and front matter to "
+                             "PATH as JSON without rendering, then exit")
+    parser.add_argument('--include', action='append', default=[], metavar='GLOB',
+                        help="only generate pages whose path under the content directory matches "
+                             "GLOB (repeatable; a GLOB without a slash matches file names)")
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help="skip content and static files and directories matching GLOB "
+                             "(repeatable), in addition to the patterns of " + IGNORE_FILE + " files")
+    parser.add_argument('--walk-jobs', type=int, default=1, metavar='N',
+                        help="list directories on N threads, for content on network filesystems "
+                             "(default 1)")
+    parser.add_argument('--clean', action='store_true',
+                        help="remove the output directory and rebuild every page")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="number of worker processes for page generation "
+                             "(0 uses every CPU, default 1)")
+    parser.add_argument('--watch', action='store_true',
+                        help="serve the site and rebuild changed pages as sources change")
+    parser.add_argument('--port', type=int, default=8888,
+                        help="port for the --watch development server (default 8888)")
+    parser.add_argument('--block-cache', type=int, default=0, metavar='SIZE',
+                        help="cache up to SIZE rendered blocks and reuse them for identical "
+                             "blocks across pages (default 0, disabled)")
+    parser.add_argument('--block-cache-file', metavar='PATH',
+                        help="load the block cache from PATH and save it back after the build")
+    parser.add_argument('--parse-cache', type=int, default=0, metavar='MB',
+                        help="keep parsed pages in up to MB megabytes under " + PARSE_CACHE_DIR + " so "
+                             "pages whose markdown is unchanged are not parsed again, e.g. after a "
+                             "template change (default 0, disabled)")
+    parser.add_argument('--link-assets', action='store_true',
+                        help="hardlink static files into the output instead of copying them")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="overlap reading, rendering and writing pages with asyncio "
+                             "(pages are not timed by --profile in this mode)")
+    parser.add_argument('--prefetch', type=int, default=16, metavar='N',
+                        help="pages read ahead and rendered ahead in --pipeline mode (default 16)")
+    parser.add_argument('--search-index', action='store_true',
+                        help="build a client-side search index under search/ in the output "
+                             "from the pages as they are rendered")
+    parser.add_argument('--compress', action='store_true',
+                        help="write precompressed .gz (and .br, if brotli is installed) copies of "
+                             "generated pages and copied assets for gzip_static-style serving")
+    parser.add_argument('--listings', type=int, default=0, metavar='N',
+                        help="generate paginated listings of N pages each from the pages' front matter: "
+                             "dated pages under posts/, each tag under tags/ and each year under archive/")
+    parser.add_argument('--shard', type=shard_argument, metavar='I/N',
+                        help="generate only shard I of N of the pages (chosen by a stable hash of "
+                             "each page's path) into the output directory suffixed .shard-I-of-N; "
+                             "shard 1 also copies the static files")
+    parser.add_argument('--merge-shards', type=int, metavar='N',
+                        help="merge the outputs and manifests of shards 1..N into the output "
+                             "directory, failing on outputs written by more than one page, then exit")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="log every generated page and copied file")
+    parser.add_argument('--profile', action='store_true',
+                        help="time each build stage per page and log a report")
+    parser.add_argument('--profile-top', type=int, default=0, metavar='N',
+                        help="include the N slowest pages in the report (implies --profile)")
+    parser.add_argument('--profile-out', metavar='PATH',
+                        help="run the build under cProfile and write pstats data to PATH")
+    args = parser.parse_args(argv)
+    if args.shard and (args.watch or args.search_index):
+        parser.error("--shard cannot be combined with --watch or --search-index")
+    if args.merge_shards is not None and args.merge_shards < 1:
+        parser.error("--merge-shards needs at least one shard")
+    return args
+
+def page_walker(args):
+    return Walker(args.include, args.exclude, args.walk_jobs)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    if args.explain:
+        for line in BuildManifest(MANIFEST_PATH).explain(os.path.normpath(args.explain)):
+            print(line)
+        return
+    if args.metadata_index:
+        write_metadata_index(collect_pages(CONTENT_DIR, DEST_DIR, page_walker(args)), args.metadata_index)
+        return
+    if args.merge_shards:
+        try:
+            merge_shards(DEST_DIR, MANIFEST_PATH, args.merge_shards, args.link_assets)
+        except ValueError as e:
+            logging.error(f"Cannot merge shards: {e}")
+            raise SystemExit(1)
+        return
+    if args.profile_out:
+        profile = cProfile.Profile()
+        try:
+            profile.runcall(build, args)
+        finally:
+            profile.dump_stats(args.profile_out)
+            logging.info(f"Wrote cProfile stats to {args.profile_out}")
+    else:
+        build(args)
+
+def build(args):
+    jobs = args.jobs or os.cpu_count() or 1
     src_dir = "src/static"
-    dest_dir = "src/public"
+    dest_dir = DEST_DIR
     template_path = "template.html"
-    content_dir = "content"
+    content_dir = CONTENT_DIR
+    manifest_path = MANIFEST_PATH
+    if args.shard:
+        # Each shard keeps its own output tree and manifest for --merge-shards
+        dest_dir, manifest_path = shard_paths(dest_dir, manifest_path, *args.shard)
 
-    # Remove existing public directory if it exists
-    if os.path.exists(dest_dir):
-        shutil.rmtree(dest_dir)
-        logging.info(f"Removed existing directory: {dest_dir}")
+    # Remove existing public directory and build manifest for a clean build
+    if args.clean:
+        if os.path.exists(dest_dir):
+            shutil.rmtree(dest_dir)
+            logging.info(f"Removed existing directory: {dest_dir}")
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+    manifest = BuildManifest(manifest_path)
+
+    profiler = None
+    if args.profile or args.profile_top:
+        profiler = BuildProfiler(args.profile_top)
+
+    block_cache = None
+    if args.block_cache > 0:
+        block_cache = BlockCache(args.block_cache)
+        if args.block_cache_file:
+            block_cache.load(args.block_cache_file)
+
+    compressor = Compressor() if args.compress else None
+
+    parse_cache = ParseCache(PARSE_CACHE_DIR, args.parse_cache << 20) if args.parse_cache > 0 else None
+
+    # --include selects pages; exclusions apply to static files as well
+    walker = page_walker(args)
+    assets_walker = Walker(exclude=args.exclude, jobs=args.walk_jobs)
+
+    # Take the watch snapshot before building so edits made during the
+    # initial build are picked up
+    if args.watch:
+        watcher = Watcher([content_dir, src_dir, template_path])
 
     # Ensure public directory exists
     os.makedirs(dest_dir, exist_ok=True)
 
-    # Copy static files to public directory if static directory exists
-    if os.path.exists(src_dir):
-        copy_directory(src_dir, dest_dir)
+    # Copy static files to public directory if static directory exists;
+    # sharded builds leave them to shard 1
+    if args.shard and args.shard[0] != 1:
+        logging.info("Static files are copied by shard 1")
+    elif os.path.exists(src_dir):
+        with profile_stage(profiler, 'assets'):
+            copy_directory(src_dir, dest_dir, manifest, args.link_assets, compressor, assets_walker)
         logging.info("Static files copied.")
     else:
         logging.warning(f"Static directory not found: {src_dir}")
 
     # Generate pages recursively
-    generate_pages_recursive(content_dir, template_path, dest_dir)
+    options = BuildOptions(
+        manifest=manifest, jobs=jobs, block_cache=block_cache, profiler=profiler, pipeline=args.pipeline,
+        prefetch=args.prefetch, search_index=args.search_index, compressor=compressor, shard=args.shard,
+        parse_cache=parse_cache, walker=walker, listings=args.listings,
+    )
+    generate_pages_recursive(content_dir, template_path, dest_dir, options)
+
+    # Wait for the precompressed copies still being written
+    if compressor is not None:
+        with profile_stage(profiler, 'compress-wait'):
+            compressor.wait()
+
+    # Delete outputs whose sources no longer exist and persist the manifest
+    manifest.prune()
+    manifest.save()
+
+    if parse_cache is not None:
+        parse_cache.evict()
+
+    if block_cache is not None:
+        log_block_cache_stats(block_cache)
+        if args.block_cache_file:
+            block_cache.save(args.block_cache_file)
+
+    if profiler is not None:
+        profiler.log_report()
 
     logging.info("Static site generation complete.")
 
+    if args.watch:
+        server = serve(dest_dir, args.port)
+        # Rebuilds are a few pages: render them here, untimed
+        options = options._replace(jobs=1, pipeline=False, profiler=None)
+        try:
+            for paths in watcher:
+                try:
+                    rebuild_paths(paths, content_dir, src_dir, template_path, dest_dir, options, assets_walker)
+                except Exception:
+                    logging.exception("Rebuild failed")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+            server.shutdown()
+
+    if compressor is not None:
+        compressor.close()
+
 if __name__ == "__main__":
     main()
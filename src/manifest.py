@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import logging
+
+
+def hash_file(path):
+    """
+    Return the sha256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def metadata_node(name, source):
+    """
+    Name the graph node for a piece of metadata (e.g. a listing entry)
+    extracted from a source file, so other steps can depend on just that
+    value.
+    """
+    return f"meta:{name}:{source}"
+
+
+def hash_value(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+class BuildManifest:
+    """
+    Persistent dependency graph of what each build step read and wrote.
+
+    Every entry is keyed by a source path and stores the content hash of
+    each input the step consumed plus the outputs it produced. Inputs are
+    files or metadata nodes (see metadata_node) whose value is set during
+    the build with set_metadata. A step is fresh when all of its inputs
+    hash the same as last time and all of its outputs still exist. Hashes
+    are cached against (size, mtime) so an unchanged file is only stat'ed,
+    not re-read. Each entry also keeps the reasons it was last rebuilt.
+    """
+
+    version = 2
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.files = {}
+        self.values = {}
+        self._hashes = {}
+        self._seen = set()
+        self._dependents = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable build manifest {self.path}: {e}")
+            return
+        if data.get('version') != self.version:
+            logging.info(f"Build manifest {self.path} is from another version, rebuilding")
+            return
+        self.entries = data.get('entries', {})
+        self.files = data.get('files', {})
+        self.values = data.get('values', {})
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {'version': self.version, 'entries': self.entries, 'files': self.files, 'values': self.values}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def file_hash(self, path):
+        """
+        Hash a file at most once per build, reusing the stored hash when
+        its size and mtime have not changed since the last build.
+        """
+        if path in self._hashes:
+            return self._hashes[path]
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._hashes[path] = None
+            return None
+        cached = self.files.get(path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            digest = cached['hash']
+        else:
+            digest = hash_file(path)
+            self.files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+        self._hashes[path] = digest
+        return digest
+
+    def input_hash(self, path):
+        if path.startswith('meta:'):
+            return self.values.get(path)
+        return self.file_hash(path)
+
+    def set_metadata(self, name, source, value):
+        """
+        Record the current value of a metadata node. Returns True if it
+        differs from the value recorded by the previous build.
+        """
+        node = metadata_node(name, source)
+        digest = hash_value(value)
+        changed = self.values.get(node) != digest
+        self.values[node] = digest
+        return changed
+
+    def stale_reasons(self, key, inputs, outputs):
+        """
+        Return why the step recorded under `key` must run again, as a list
+        of human-readable reasons; an empty list means it can be skipped.
+        """
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            return ["never built"]
+        reasons = []
+        recorded = entry['inputs']
+        for path in inputs:
+            if path not in recorded:
+                reasons.append(f"new input {path}")
+            elif recorded[path] != self.input_hash(path):
+                reasons.append(f"{path} changed")
+        # A set, since listings and indexes read thousands of inputs
+        current = set(inputs)
+        for path in recorded:
+            if path not in current:
+                reasons.append(f"no longer reads {path}")
+        if entry['outputs'] != list(outputs):
+            reasons.append("outputs changed")
+        reasons.extend(f"{path} is missing" for path in outputs if not os.path.exists(path))
+        return reasons
+
+    def is_fresh(self, key, inputs, outputs):
+        """
+        Return True if the step recorded under `key` can be skipped.
+        """
+        return not self.stale_reasons(key, inputs, outputs)
+
+    def record(self, key, inputs, outputs, reasons=None):
+        """
+        Record that the step `key` read `inputs` and wrote `outputs`.
+        Outputs it wrote last time but no longer does are deleted.
+        """
+        self._seen.add(key)
+        self._dependents = None
+        previous = self.entries.get(key)
+        if previous is not None:
+            for output in previous['outputs']:
+                if output not in outputs and os.path.exists(output):
+                    os.remove(output)
+                    logging.info(f"Removed stale output: {output}")
+        entry = {
+            'inputs': {path: self.input_hash(path) for path in inputs},
+            'outputs': list(outputs),
+        }
+        if reasons:
+            entry['reasons'] = list(reasons)
+        self.entries[key] = entry
+
+    def dependents(self, node):
+        """
+        Return the keys of the entries that read `node` directly.
+        """
+        if self._dependents is None:
+            self._dependents = {}
+            for key, entry in self.entries.items():
+                for path in entry['inputs']:
+                    self._dependents.setdefault(path, set()).add(key)
+        return self._dependents.get(node, set())
+
+    def affected(self, paths):
+        """
+        Return the keys of every entry that transitively depends on any of
+        `paths`: entries reading them, entries reading those entries'
+        outputs, and entries reading metadata derived from them.
+        """
+        affected = set()
+        frontier = list(paths)
+        seen = set(frontier)
+        derived = {}
+        for node in self.values:
+            derived.setdefault(node.split(':', 2)[2], []).append(node)
+        while frontier:
+            node = frontier.pop()
+            for key in self.dependents(node):
+                if key in affected:
+                    continue
+                affected.add(key)
+                for output in self.entries[key]['outputs']:
+                    if output not in seen:
+                        seen.add(output)
+                        frontier.append(output)
+            for meta in derived.get(node, ()):
+                if meta not in seen:
+                    seen.add(meta)
+                    frontier.append(meta)
+        return affected
+
+    def find(self, path):
+        """
+        Return the key of the entry for a source or output path, or None.
+        """
+        if path in self.entries:
+            return path
+        for key, entry in self.entries.items():
+            if path in entry['outputs']:
+                return key
+        return None
+
+    def explain(self, path):
+        """
+        Describe the entry for a source or output path: what it reads, what
+        it writes, why it was last rebuilt and what depends on it. Returns
+        a list of lines.
+        """
+        key = self.find(path)
+        if key is None:
+            return [f"{path} is not part of the last build"]
+        entry = self.entries[key]
+        lines = [f"{key}"]
+        lines.append("  reads:")
+        lines.extend(f"    {input_path}" for input_path in sorted(entry['inputs']))
+        lines.append("  writes:")
+        lines.extend(f"    {output}" for output in entry['outputs'])
+        lines.append("  last rebuilt because:")
+        lines.extend(f"    {reason}" for reason in entry.get('reasons', ["unknown (no rebuild recorded)"]))
+        dependents = sorted(self.affected([key]) - {key})
+        if dependents:
+            lines.append("  rebuilt when it changes:")
+            lines.extend(f"    {dependent}" for dependent in dependents)
+        return lines
+
+    def reset(self):
+        """
+        Start a new build in the same process (e.g. in watch mode): forget
+        per-build hash memos and which entries were visited.
+        """
+        self._hashes = {}
+        self._seen = set()
+
+    def remove(self, key):
+        """
+        Delete the outputs recorded for `key` and forget the entry. Returns
+        the list of removed output paths.
+        """
+        removed = []
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return removed
+        self._dependents = None
+        for output in entry['outputs']:
+            if os.path.exists(output):
+                os.remove(output)
+                removed.append(output)
+                logging.info(f"Removed stale output: {output}")
+        self.files.pop(key, None)
+        return removed
+
+    def prune(self):
+        """
+        Delete the outputs of every entry that was not visited during this
+        build (its source is gone) and forget the entry. Returns the list of
+        removed output paths.
+        """
+        removed = []
+        for key in sorted(set(self.entries) - self._seen):
+            removed.extend(self.remove(key))
+        live = {path for entry in self.entries.values() for path in entry['inputs']}
+        self.files = {path: info for path, info in self.files.items() if path in live}
+        self.values = {node: value for node, value in self.values.items() if node.split(':', 2)[2] in self.entries}
+        return removed
@@ -0,0 +1,178 @@
+import logging
+from inline_markdown import iter_blocks, iter_file_blocks
+from textnode import (
+    block_type_heading,
+    block_type_quote,
+    block_type_unordered_list,
+    block_type_ordered_list,
+    block_type_code,
+)
+
+FRONT_MATTER_DELIMITER = "---"
+
+
+def parse_front_matter_value(value):
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_front_matter_value(item) for item in value[1:-1].split(",") if item.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def split_front_matter(markdown):
+    """
+    Split YAML-style front matter off the top of a markdown document.
+
+    Front matter is a block of `key: value` lines between two `---` lines
+    at the very start of the file. Values are strings, or lists of strings
+    when written as `[a, b]`. Returns (variables, remaining markdown). A
+    delimited block with lines that are not `key: value` is not front
+    matter: it is left in the markdown, with a warning.
+    """
+    if not markdown.startswith(FRONT_MATTER_DELIMITER):
+        return {}, markdown
+    lines = markdown.split("\n")
+    if lines[0].strip() != FRONT_MATTER_DELIMITER:
+        return {}, markdown
+    for end in range(1, len(lines)):
+        if lines[end].strip() == FRONT_MATTER_DELIMITER:
+            break
+    else:
+        return {}, markdown
+    try:
+        variables = parse_front_matter_lines(lines[1:end])
+    except ValueError as e:
+        logging.warning(f"Treating the first --- block as text, it is not front matter: {e}")
+        return {}, markdown
+    return variables, "\n".join(lines[end + 1:])
+
+
+def parse_front_matter_lines(lines):
+    variables = {}
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        key, separator, value = line.partition(":")
+        if not separator or not key.strip():
+            raise ValueError(f"Invalid front matter line: {line}")
+        variables[key.strip()] = parse_front_matter_value(value)
+    return variables
+
+
+def read_front_matter(file):
+    """
+    split_front_matter for a text file object: returns the variables and
+    leaves the file positioned at the start of the markdown body.
+    """
+    start = file.tell()
+    first = file.readline()
+    if not first.startswith(FRONT_MATTER_DELIMITER) or first.strip() != FRONT_MATTER_DELIMITER:
+        file.seek(start)
+        return {}
+    lines = []
+    while True:
+        line = file.readline()
+        if not line:
+            file.seek(start)
+            return {}
+        if line.strip() == FRONT_MATTER_DELIMITER:
+            try:
+                return parse_front_matter_lines(lines)
+            except ValueError as e:
+                logging.warning(f"Treating the first --- block as text, it is not front matter: {e}")
+                file.seek(start)
+                return {}
+        lines.append(line.rstrip("\n"))
+
+
+
+class PageMetadata:
+    """
+    Document metadata gathered while the block parser runs: the front
+    matter, the title (first h1), the outline of headings and a word
+    count. Pass it to markdown_to_html_node, or run extract_metadata to
+    collect it without rendering the body. Page rendering may also attach
+    the page's search terms as `tokens`.
+    """
+
+    def __init__(self, front_matter=None):
+        self.front_matter = front_matter or {}
+        self.title = None
+        self.headings = []
+        self.word_count = 0
+        self.tokens = None
+
+    def observe(self, blocks):
+        # Pass (block, block type) pairs through, noting each one
+        for block, block_type in blocks:
+            self.add_block(block, block_type)
+            yield block, block_type
+
+    def add_block(self, block, block_type):
+        if block_type == block_type_heading:
+            level = len(block.split()[0])
+            text = block.lstrip('#').strip()
+            self.headings.append((level, text))
+            if self.title is None and level == 1:
+                self.title = block.split('\n', 1)[0][1:].strip()
+            self.word_count += len(text.split())
+        elif block_type == block_type_code:
+            return
+        elif block_type == block_type_quote:
+            self.word_count += sum(len(line.lstrip('>').split()) for line in block.split('\n'))
+        elif block_type == block_type_unordered_list:
+            self.word_count += sum(len(line.lstrip('*-').split()) for line in block.split('\n'))
+        elif block_type == block_type_ordered_list:
+            self.word_count += sum(len(line.split('.', 1)[1].split()) for line in block.split('\n'))
+        else:
+            self.word_count += len(block.split())
+
+    def page_title(self):
+        """
+        Return the front matter title, else the first h1. Raises an
+        exception if there is neither.
+        """
+        title = self.front_matter.get('title') or self.title
+        if not title:
+            raise ValueError("No h1 header found in the markdown file")
+        return title
+
+    def to_dict(self):
+        return {
+            'title': self.front_matter.get('title') or self.title,
+            'headings': [list(heading) for heading in self.headings],
+            'word_count': self.word_count,
+            'front_matter': self.front_matter,
+        }
+
+
+def extract_metadata(markdown):
+    """
+    Collect a document's PageMetadata by classifying its blocks, without
+    rendering any inline markup.
+    """
+    variables, body = split_front_matter(markdown)
+    metadata = PageMetadata(variables)
+    for block, block_type in iter_blocks(body):
+        metadata.add_block(block, block_type)
+    return metadata
+
+
+def scan_metadata(file):
+    """
+    extract_metadata for a text file object, reading it block by block.
+    Leaves the file positioned at the start of the markdown body, so the
+    body can be read again to render it.
+    """
+    metadata = PageMetadata(read_front_matter(file))
+    start = file.tell()
+    for block, block_type in iter_file_blocks(file):
+        metadata.add_block(block, block_type)
+    file.seek(start)
+    return metadata
+
+
+def read_metadata(path):
+    with open(path, "r") as file:
+        return scan_metadata(file)
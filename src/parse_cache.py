@@ -0,0 +1,165 @@
+import os
+import hashlib
+import logging
+import marshal
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawHTMLNode
+from inline_markdown import markdown_to_html_node, parser_signature
+from metadata import PageMetadata
+from textnode import text_leaf
+
+# Bump when parsing or the node classes change so stored trees are
+# discarded; registered node types are part of the key as well
+PARSE_CACHE_VERSION = 3
+
+# Node classes by the code stored in the first field of an encoded node
+_NODE_CLASSES = (HTMLNode, LeafNode, ParentNode, RawHTMLNode)
+_NODE_CODES = {cls: code for code, cls in enumerate(_NODE_CLASSES)}
+_LEAF_CODE = _NODE_CODES[LeafNode]
+_RAW_HTML_CODE = _NODE_CODES[RawHTMLNode]
+
+
+def encode_node(node):
+    """
+    Flatten an HTML node tree into nested tuples of plain values that
+    marshal can store: (class code, tag, value, props, children). A
+    RawHTMLNode keeps its text where the children would be.
+    """
+    if isinstance(node, str):
+        return node
+    if type(node) is RawHTMLNode:
+        return (_RAW_HTML_CODE, None, node.value, None, node.text)
+    props = dict(node.props) if node.props else None
+    return (_NODE_CODES[type(node)], node.tag, node.value, props, tuple(encode_node(child) for child in node.children))
+
+
+def decode_node(data):
+    if isinstance(data, str):
+        return data
+    code, tag, value, props, children = data
+    if code == _RAW_HTML_CODE:
+        return RawHTMLNode(value, children)
+    if code == _LEAF_CODE:
+        # Plain text leaves go back through the flyweight
+        if tag is None and props is None:
+            return text_leaf(value)
+        return LeafNode(tag, value, props)
+    node = _NODE_CLASSES[code].__new__(_NODE_CLASSES[code])
+    HTMLNode.__init__(node, tag, value, [decode_node(child) for child in children], props)
+    return node
+
+
+class ParseCache:
+    """
+    Content-addressed on-disk cache of parsed pages: the node tree built by
+    markdown_to_html_node and the metadata collected while parsing, keyed
+    by the hash of the markdown body and the parser version. Pages whose
+    body is unchanged skip parsing when only the template or another
+    output setting changed.
+
+    Entries are marshal files under `directory`, one per page body, read
+    and written by any number of processes. A hit refreshes the entry's
+    mtime, and evict() deletes the least recently used entries until the
+    cache fits in `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=256 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._signature = f"{PARSE_CACHE_VERSION}:{marshal.version}:{parser_signature()}".encode()
+
+    def key(self, markdown):
+        digest = hashlib.sha256(self._signature)
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, markdown, front_matter=None):
+        """
+        Return the stored (html node, PageMetadata) for a markdown body, or
+        None if it has not been parsed before.
+        """
+        path = self.entry_path(self.key(markdown))
+        try:
+            # marshal.loads on the whole file is many times faster than
+            # marshal.load reading from it
+            with open(path, 'rb') as file:
+                data = marshal.loads(file.read())
+            tree, title, headings, word_count = data
+            node = decode_node(tree)
+            headings = [tuple(heading) for heading in headings]
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, ValueError, TypeError, IndexError) as e:
+            logging.warning(f"Ignoring unreadable parse cache entry {path}: {e}")
+            self.misses += 1
+            return None
+        metadata = PageMetadata(front_matter)
+        metadata.title = title
+        metadata.headings = headings
+        metadata.word_count = word_count
+        self.hits += 1
+        return node, metadata
+
+    def put(self, markdown, html_node, metadata):
+        path = self.entry_path(self.key(markdown))
+        data = (encode_node(html_node), metadata.title, metadata.headings, metadata.word_count)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per process so concurrent writers of one entry don't clash
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(marshal.dumps(data))
+        os.replace(tmp_path, path)
+
+    def parse(self, markdown, front_matter=None, block_cache=None):
+        """
+        markdown_to_html_node with metadata: return (html node,
+        PageMetadata) from the cache, or parse and store them.
+        """
+        cached = self.get(markdown, front_matter)
+        if cached is not None:
+            return cached
+        metadata = PageMetadata(front_matter)
+        html_node = markdown_to_html_node(markdown, block_cache, metadata)
+        self.put(markdown, html_node, metadata)
+        return html_node, metadata
+
+    def entries(self):
+        # (mtime, size, path) of every stored entry
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in
+        max_bytes. Returns the number of entries removed.
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            logging.info(f"Parse cache: evicted {removed} entries, {total} bytes kept")
+        return removed
@@ -0,0 +1,111 @@
+import os
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def read_text(path):
+    with open(path, 'r') as file:
+        return file.read()
+
+
+def write_text(path, text):
+    with open(path, 'w') as file:
+        file.write(text)
+
+
+def run_pipeline(items, render, on_done=None, prefetch=16, io_threads=8, render_executor=None, write=write_text):
+    """
+    Build pages through three overlapping stages connected by bounded
+    queues: a reader that keeps up to `prefetch` source reads in flight on
+    an I/O thread pool, a render stage, and a writer that flushes output on
+    the same pool while later pages render.
+
+    `items` are (source path, destination path, extra) tuples. `render` is
+    called as render(source text, extra) and returns an (output text,
+    result) pair; it runs in the event loop thread, or on `render_executor`
+    (a process pool, say) with up to `prefetch` pages in flight.
+    `on_done(item, result)` is called in item order after each write
+    completes. Each output directory is created once. Output is written
+    with write(destination path, text) on the I/O pool.
+    """
+    return asyncio.run(_pipeline(list(items), render, on_done, prefetch, io_threads, render_executor, write))
+
+
+async def _pipeline(items, render, on_done, prefetch, io_threads, render_executor, write):
+    loop = asyncio.get_running_loop()
+    read_queue = asyncio.Queue(prefetch)
+    write_queue = asyncio.Queue(prefetch)
+    io = ThreadPoolExecutor(max_workers=io_threads)
+
+    async def reader():
+        pending = deque()
+        for item in items:
+            pending.append((item, loop.run_in_executor(io, read_text, item[0])))
+            if len(pending) >= prefetch:
+                item, text = pending.popleft()
+                await read_queue.put((item, await text))
+        while pending:
+            item, text = pending.popleft()
+            await read_queue.put((item, await text))
+        await read_queue.put(None)
+
+    async def rendered(item, html):
+        try:
+            return await html
+        except Exception:
+            logging.error(f"Failed to generate page: {item[0]}")
+            raise
+
+    async def renderer():
+        pending = deque()
+        while (entry := await read_queue.get()) is not None:
+            item, text = entry
+            if render_executor is None:
+                try:
+                    html = render(text, item[2])
+                except Exception:
+                    logging.error(f"Failed to generate page: {item[0]}")
+                    raise
+                await write_queue.put((item, html))
+                continue
+            pending.append((item, loop.run_in_executor(render_executor, render, text, item[2])))
+            if len(pending) >= prefetch:
+                item, html = pending.popleft()
+                await write_queue.put((item, await rendered(item, html)))
+        while pending:
+            item, html = pending.popleft()
+            await write_queue.put((item, await rendered(item, html)))
+        await write_queue.put(None)
+
+    async def writer():
+        created = set()
+        pending = deque()
+        while (entry := await write_queue.get()) is not None:
+            item, (html, result) = entry
+            directory = os.path.dirname(item[1])
+            if directory not in created:
+                await loop.run_in_executor(io, lambda: os.makedirs(directory, exist_ok=True))
+                created.add(directory)
+            pending.append((item, result, loop.run_in_executor(io, write, item[1], html)))
+            if len(pending) >= io_threads:
+                done, result, written = pending.popleft()
+                await written
+                if on_done is not None:
+                    on_done(done, result)
+        while pending:
+            done, result, written = pending.popleft()
+            await written
+            if on_done is not None:
+                on_done(done, result)
+
+    tasks = [asyncio.ensure_future(stage()) for stage in (reader, renderer, writer)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        io.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,117 @@
+import time
+import heapq
+import logging
+from contextlib import contextmanager, nullcontext
+
+# Stages timed for every page, in pipeline order; a page is either
+# parsed through the parse cache or split into blocks and then inline
+# parsed, and only searched and compressed when the build does so.
+# Build-wide stages (BuildProfiler.stage) must use other names.
+PAGE_STAGES = ("read", "parse", "blocks", "inline", "search", "serialize", "template", "write", "compress")
+
+
+def profile_stage(profiler, name):
+    # profiler.stage(name) with a BuildProfiler, a no-op without one
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+class StageTimer:
+    """
+    Collects the time spent in each stage of rendering one page. Call
+    lap(stage) at the end of each stage.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+
+class BuildProfiler:
+    """
+    Aggregates per-page stage timings and counters over a build, keeps the
+    `top` slowest pages and formats a timing report.
+    """
+
+    def __init__(self, top=0):
+        self.top = top
+        self.timings = {}
+        self.counters = {}
+        self.pages = 0
+        self._slowest = []
+
+    @contextmanager
+    def stage(self, name):
+        # Time a build-wide stage such as walking the tree or copying assets
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_page(self, path, timings, counters=None):
+        self.pages += 1
+        for stage, seconds in timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        for name, amount in (counters or {}).items():
+            self.count(name, amount)
+        if self.top > 0:
+            entry = (sum(timings.values()), path, timings)
+            if len(self._slowest) < self.top:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def slowest_pages(self):
+        return sorted(self._slowest, reverse=True)
+
+    def to_dict(self):
+        return {
+            'pages': self.pages,
+            'seconds': dict(self.timings),
+            'counters': dict(self.counters),
+            'slowest_pages': [
+                {'path': path, 'seconds': total, 'stages': timings}
+                for total, path, timings in self.slowest_pages()
+            ],
+        }
+
+    def report(self):
+        """
+        Return the timing report as a list of lines.
+        """
+        total = sum(self.timings.get(stage, 0.0) for stage in PAGE_STAGES)
+        lines = [f"{'stage':<13} {'total s':>9} {'ms/page':>9} {'share':>7}"]
+        stages = list(PAGE_STAGES) + sorted(set(self.timings) - set(PAGE_STAGES))
+        for stage in stages:
+            if stage not in self.timings:
+                continue
+            seconds = self.timings[stage]
+            per_page = share = ""
+            if stage in PAGE_STAGES:
+                per_page = f"{seconds * 1000 / self.pages:9.3f}" if self.pages else ""
+                share = f"{seconds / total:7.1%}" if total else ""
+            lines.append(f"{stage:<13} {seconds:9.3f} {per_page:>9} {share:>7}")
+        for name, amount in sorted(self.counters.items()):
+            lines.append(f"{name}: {amount}")
+        if self.top > 0:
+            lines.append(f"slowest {len(self._slowest)} pages:")
+            for seconds, path, _ in self.slowest_pages():
+                lines.append(f"  {seconds * 1000:9.2f} ms  {path}")
+        return lines
+
+    def log_report(self):
+        logging.info(f"Build profile ({self.pages} pages):")
+        for line in self.report():
+            logging.info(line)
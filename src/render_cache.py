@@ -0,0 +1,128 @@
+import json
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+# Bump when block rendering changes so persisted fragments are discarded
+RENDER_CACHE_VERSION = 3
+
+
+class BlockCache:
+    """
+    Bounded LRU cache from (block type, block text) to the block's rendered
+    HTML fragment and the plain text it was rendered from, shared by every
+    page in a build and optionally persisted between builds. Values are
+    opaque to the cache and must be JSON-serializable to be saved.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Entries put since the last take_added, once track_added is called
+        self._added = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        if self._added is not None:
+            self._added.append((key, value))
+
+    def track_added(self):
+        """
+        Start collecting the entries put from now on, e.g. in a worker
+        process whose new fragments must be sent back to the build's cache.
+        """
+        self._added = []
+
+    def take_added(self):
+        # The (key, value) pairs put since the last call
+        added = self._added or []
+        if self._added is not None:
+            self._added = []
+        return added
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+        }
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable block cache {path}: {e}")
+            return
+        if data.get('version') != RENDER_CACHE_VERSION:
+            return
+        for block_type, block, value in data.get('entries', []):
+            self.put((block_type, block), value)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = [[block_type, block, value] for (block_type, block), value in self._entries.items()]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({'version': RENDER_CACHE_VERSION, 'entries': entries}, file)
+        os.replace(tmp_path, path)
+
+
+class SharedBlockCache(BlockCache):
+    """
+    BlockCache that can be used from several threads at once, e.g. by a
+    renderer serving concurrent requests. Blocks rendered by two threads
+    at the same time are rendered twice; the second put wins.
+    """
+
+    def __init__(self, maxsize=4096):
+        super().__init__(maxsize)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return super().__len__()
+
+    def get(self, key):
+        with self._lock:
+            return super().get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            super().put(key, value)
+
+    def take_added(self):
+        with self._lock:
+            return super().take_added()
+
+    def stats(self):
+        with self._lock:
+            return super().stats()
+
+    def save(self, path):
+        with self._lock:
+            super().save(path)
@@ -0,0 +1,65 @@
+from inline_markdown import markdown_to_html_node
+from metadata import PageMetadata, split_front_matter
+from render_cache import SharedBlockCache
+from template import Template
+
+
+def page_context(variables, metadata, html_node):
+    # Template variables: front matter plus what the parser learned
+    return dict(variables, Title=metadata.page_title(), WordCount=metadata.word_count, Content=html_node)
+
+
+class Renderer:
+    """
+    Reusable markdown renderer for embedding the generator in another
+    program, such as a preview server. It holds the compiled page template
+    and a block cache shared by every call, and one instance can be used
+    from any number of threads at once.
+
+    render() takes markdown as str or bytes (decoded as `encoding`) and
+    returns HTML of the same type. Front matter is split off first. Without
+    a template the result is the document's HTML, the <div> built by
+    markdown_to_html_node; with one it is the full page, which like every
+    site page needs an h1 for its title. `template` is a Template or its
+    source text. cache_size=0 disables the block cache.
+    """
+
+    def __init__(self, template=None, cache_size=1024, encoding='utf-8'):
+        if isinstance(template, str):
+            template = Template(template)
+        self.template = template
+        self.encoding = encoding
+        self.cache = SharedBlockCache(cache_size) if cache_size > 0 else None
+
+    @classmethod
+    def from_template_file(cls, path, **options):
+        return cls(Template.load(path), **options)
+
+    def render_with_metadata(self, markdown):
+        """
+        Render markdown text (str) and return (html, PageMetadata).
+        """
+        variables, body = split_front_matter(markdown)
+        metadata = PageMetadata(variables)
+        html_node = markdown_to_html_node(body, self.cache, metadata)
+        if self.template is None:
+            return html_node.to_html(), metadata
+        return self.template.render(page_context(variables, metadata, html_node)), metadata
+
+    def render(self, markdown):
+        if isinstance(markdown, (bytes, bytearray, memoryview)):
+            html, _ = self.render_with_metadata(bytes(markdown).decode(self.encoding))
+            return html.encode(self.encoding)
+        return self.render_with_metadata(markdown)[0]
+
+    def render_many(self, documents):
+        """
+        Render an iterable of documents lazily, in order, sharing the
+        block cache between them.
+        """
+        for markdown in documents:
+            yield self.render(markdown)
+
+    def stats(self):
+        # Block cache statistics, or None without a cache
+        return self.cache.stats() if self.cache is not None else None
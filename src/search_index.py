@@ -0,0 +1,319 @@
+import os
+import re
+import json
+import heapq
+import hashlib
+import marshal
+import shutil
+import logging
+import tempfile
+from htmlnode import iter_text
+from inline_markdown import markdown_to_html_node, parser_signature
+from metadata import PageMetadata, split_front_matter
+
+# Bump when the shard layout changes so clients can tell formats apart
+SEARCH_INDEX_VERSION = 1
+
+# Directory of the index inside the site, and its table of contents
+SEARCH_INDEX_DIR = "search"
+SEARCH_INDEX_FILE = "index.json"
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return [term.lower() for term in _TERM_PATTERN.findall(text)]
+
+
+def node_tokens(node):
+    """
+    Return the terms of a rendered page tree in document order. Blocks
+    from the block cache contribute the text they were rendered from, so
+    markup never becomes terms and text such as "x < 10" is kept whole.
+    """
+    tokens = []
+    for text in iter_text(node):
+        tokens.extend(tokenize(text))
+    return tokens
+
+
+def read_page_tokens(path):
+    """
+    Parse a markdown page without writing it and return (title, terms),
+    for pages the build did not need to regenerate.
+    """
+    with open(path, 'r') as file:
+        variables, body = split_front_matter(file.read())
+    metadata = PageMetadata(variables)
+    node = markdown_to_html_node(body, metadata=metadata)
+    return metadata.page_title(), node_tokens(node)
+
+
+class PageTermStore:
+    """
+    Each page's title and terms saved between builds, so that rebuilding
+    the index after a change reuses the terms of unchanged pages instead
+    of parsing them again. Entries are marshal files under `directory`,
+    one per source path, holding the content hash of the source they were
+    read from; an entry whose hash or parser differs is a miss.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._signature = f"{SEARCH_INDEX_VERSION}:{marshal.version}:{parser_signature()}"
+
+    def entry_path(self, source):
+        key = hashlib.sha256(source.encode()).hexdigest()
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, source, digest):
+        """
+        Return the stored (title, terms) of `source` if its contents still
+        hash to `digest`, else None.
+        """
+        path = self.entry_path(source)
+        try:
+            with open(path, 'rb') as file:
+                signature, stored_digest, title, tokens = marshal.loads(file.read())
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable search terms {path}: {e}")
+            self.misses += 1
+            return None
+        if signature != self._signature or stored_digest != digest:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return title, tokens
+
+    def put(self, source, digest, title, tokens):
+        path = self.entry_path(source)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(marshal.dumps((self._signature, digest, title, list(tokens))))
+        os.replace(tmp_path, path)
+
+    def prune(self, sources):
+        """
+        Delete the entries of pages other than `sources`. Returns the number
+        of entries removed.
+        """
+        keep = {self.entry_path(source) for source in sources}
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.path not in keep:
+                    os.remove(entry.path)
+                    removed += 1
+        return removed
+
+
+def delta_encode(numbers):
+    previous = 0
+    deltas = []
+    for number in numbers:
+        deltas.append(number - previous)
+        previous = number
+    return deltas
+
+
+def delta_decode(deltas):
+    total = 0
+    numbers = []
+    for delta in deltas:
+        total += delta
+        numbers.append(total)
+    return numbers
+
+
+def front_code(terms):
+    """
+    Prefix-compress a sorted list of terms into [shared prefix length,
+    suffix] pairs, each relative to the previous term.
+    """
+    coded = []
+    previous = ""
+    for term in terms:
+        shared = 0
+        limit = min(len(previous), len(term))
+        while shared < limit and previous[shared] == term[shared]:
+            shared += 1
+        coded.append([shared, term[shared:]])
+        previous = term
+    return coded
+
+
+def front_decode(coded):
+    terms = []
+    previous = ""
+    for shared, suffix in coded:
+        previous = previous[:shared] + suffix
+        terms.append(previous)
+    return terms
+
+
+def encode_postings(postings):
+    # [(page id, positions), ...] -> [page id delta, [position deltas], ...]
+    # flattened, with page ids ascending
+    encoded = []
+    previous = 0
+    for page_id, positions in sorted(postings):
+        encoded.append(page_id - previous)
+        encoded.append(delta_encode(positions))
+        previous = page_id
+    return encoded
+
+
+def decode_postings(encoded):
+    postings = []
+    page_id = 0
+    for index in range(0, len(encoded), 2):
+        page_id += encoded[index]
+        postings.append((page_id, delta_decode(encoded[index + 1])))
+    return postings
+
+
+class SearchIndexBuilder:
+    """
+    Streams pages' terms into an inverted index from term to the pages and
+    positions it occurs at, written under `site_dir`/search as JSON shards.
+
+    Postings are held in memory until `max_postings` term occurrences have
+    been added, then spilled to a sorted run on disk; finish() merges the
+    runs term by term, so memory stays bounded however many pages there
+    are. Each shard holds up to `shard_terms` terms, prefix-compressed,
+    with delta-encoded page ids and positions. Pages may be added in any
+    order; page ids index pages.json, which lists each page's URL and title.
+    `terms` is an optional PageTermStore for the build to keep pages'
+    terms in.
+    """
+
+    def __init__(self, site_dir, shard_terms=4096, max_postings=1_000_000, terms=None):
+        self.site_dir = site_dir
+        self.terms = terms
+        self.directory = os.path.join(site_dir, SEARCH_INDEX_DIR)
+        self.shard_terms = shard_terms
+        self.max_postings = max_postings
+        self.pages = {}
+        self._postings = {}
+        self._size = 0
+        self._runs = []
+        self._spill_dir = None
+
+    def add_page(self, page_id, dest_path, title, tokens):
+        url = "/" + os.path.relpath(dest_path, self.site_dir).replace(os.sep, "/")
+        self.pages[page_id] = [url, title]
+        positions = {}
+        for position, term in enumerate(tokens):
+            positions.setdefault(term, []).append(position)
+        for term, term_positions in positions.items():
+            self._postings.setdefault(term, []).append((page_id, term_positions))
+        self._size += len(tokens)
+        if self._size >= self.max_postings:
+            self._spill()
+
+    def _spill(self):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="search-")
+        path = os.path.join(self._spill_dir, f"run-{len(self._runs):04d}.jsonl")
+        with open(path, 'w') as file:
+            for term in sorted(self._postings):
+                file.write(json.dumps([term, self._postings[term]]) + "\n")
+        self._runs.append(path)
+        self._postings = {}
+        self._size = 0
+
+    def _iter_run(self, path):
+        with open(path, 'r') as file:
+            for line in file:
+                # JSON gives postings back as lists; make them tuples like
+                # those still in memory so a term's postings sort together
+                term, postings = json.loads(line)
+                yield term, [tuple(posting) for posting in postings]
+
+    def _merged_terms(self):
+        # Yield (term, postings) in term order across the spilled runs and
+        # what is still in memory
+        runs = [self._iter_run(path) for path in self._runs]
+        runs.append([term, self._postings[term]] for term in sorted(self._postings))
+        current, postings = None, []
+        for term, run_postings in heapq.merge(*runs, key=lambda entry: entry[0]):
+            if term != current:
+                if current is not None:
+                    yield current, postings
+                current, postings = term, []
+            postings.extend(run_postings)
+        if current is not None:
+            yield current, postings
+
+    def finish(self):
+        """
+        Write the shards, the page table and index.json, replacing any
+        previous index. Returns the list of files written.
+        """
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory)
+        shards = []
+        terms, postings = [], []
+        try:
+            for term, term_postings in self._merged_terms():
+                terms.append(term)
+                postings.append(encode_postings(term_postings))
+                if len(terms) >= self.shard_terms:
+                    shards.append(self._write_shard(len(shards), terms, postings))
+                    terms, postings = [], []
+            if terms:
+                shards.append(self._write_shard(len(shards), terms, postings))
+        finally:
+            if self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+            self._runs = []
+            self._postings = {}
+
+        pages_path = os.path.join(self.directory, "pages.json")
+        with open(pages_path, 'w') as file:
+            pages = [self.pages.get(page_id) for page_id in range(max(self.pages, default=-1) + 1)]
+            json.dump(pages, file, separators=(',', ':'))
+        index = {'version': SEARCH_INDEX_VERSION, 'pages': 'pages.json', 'shards': shards}
+        index_path = os.path.join(self.directory, SEARCH_INDEX_FILE)
+        with open(index_path, 'w') as file:
+            json.dump(index, file, separators=(',', ':'))
+        logging.info(f"Search index: {len(self.pages)} pages, {sum(shard['terms'] for shard in shards)} terms, "
+                     f"{len(shards)} shards")
+        return [index_path, pages_path] + [os.path.join(self.directory, shard['file']) for shard in shards]
+
+    def _write_shard(self, number, terms, postings):
+        name = f"terms-{number:04d}.json"
+        with open(os.path.join(self.directory, name), 'w') as file:
+            json.dump({'terms': front_code(terms), 'postings': postings}, file, separators=(',', ':'))
+        return {'file': name, 'first': terms[0], 'last': terms[-1], 'terms': len(terms)}
+
+
+def load_search_index(directory):
+    """
+    Read a written index back into {term: [(page id, positions), ...]} and
+    the page table. Meant for tests and debugging; clients read the shards
+    they need directly.
+    """
+    with open(os.path.join(directory, SEARCH_INDEX_FILE), 'r') as file:
+        index = json.load(file)
+    with open(os.path.join(directory, index['pages']), 'r') as file:
+        pages = json.load(file)
+    terms = {}
+    for shard in index['shards']:
+        with open(os.path.join(directory, shard['file']), 'r') as file:
+            data = json.load(file)
+        for term, encoded in zip(front_decode(data['terms']), data['postings']):
+            terms[term] = decode_postings(encoded)
+    return terms, pages
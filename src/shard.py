@@ -0,0 +1,106 @@
+import os
+import hashlib
+import logging
+from assets import copy_asset, is_unchanged
+from manifest import BuildManifest
+
+
+def parse_shard(spec):
+    """
+    Parse a shard spec "i/N" into (i, N), where shards are numbered 1..N.
+    """
+    index, sep, count = spec.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard: {spec} (expected i/N)") from None
+    if not sep or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard: {spec} (expected i/N with 1 <= i <= N)")
+    return index, count
+
+
+def shard_of(path, count):
+    """
+    Return the shard (1..count) a source path belongs to. The path should
+    be relative to the content directory so every machine agrees; the
+    hash is sha256 rather than hash(), which is salted per process.
+    """
+    key = path.replace(os.sep, '/').encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], 'big') % count + 1
+
+
+def shard_pages(pages, content_dir, index, count):
+    """
+    Keep the (markdown path, html path) pairs of the work list that
+    belong to shard `index` of `count`, in work list order.
+    """
+    return [page for page in pages if shard_of(os.path.relpath(page[0], content_dir), count) == index]
+
+
+def shard_paths(dest_dir, manifest_path, index, count):
+    """
+    Return the output directory and build manifest of one shard, kept
+    apart from the full build's so shards can run side by side.
+    """
+    suffix = f".shard-{index}-of-{count}"
+    root, ext = os.path.splitext(manifest_path)
+    return os.path.normpath(dest_dir) + suffix, root + suffix + ext
+
+
+def merge_shards(dest_dir, manifest_path, count, hardlink=False):
+    """
+    Combine the outputs and manifests of shards 1..count into dest_dir and
+    the manifest at manifest_path, as if one machine had built everything.
+
+    Only the outputs each shard's manifest records are taken, so leftovers
+    of earlier shard builds are ignored. Raises ValueError when a shard is
+    missing, when two shards built the same source (e.g. they were run
+    with different N) or when two sources write the same output. Outputs
+    of the previous merge that no shard produces any more are deleted.
+    Returns the merged BuildManifest.
+    """
+    merged = BuildManifest(manifest_path)
+    previous = {output for entry in merged.entries.values() for output in entry['outputs']}
+    entries, files, values = {}, {}, {}
+    owners = {}
+    copies = {}
+    for index in range(1, count + 1):
+        shard_dir, shard_manifest_path = shard_paths(dest_dir, manifest_path, index, count)
+        if not os.path.exists(shard_manifest_path):
+            raise ValueError(f"Shard {index}/{count} has no build manifest at {shard_manifest_path}")
+        shard = BuildManifest(shard_manifest_path)
+        for key, entry in shard.entries.items():
+            if key in owners:
+                raise ValueError(f"{key} was built by shard {owners[key]} and shard {index}")
+            owners[key] = index
+            outputs = []
+            for output in entry['outputs']:
+                dest = os.path.join(dest_dir, os.path.relpath(output, shard_dir))
+                if dest in copies:
+                    raise ValueError(f"{dest} is written by both {copies[dest][1]} and {key}")
+                if not os.path.exists(output):
+                    raise ValueError(f"Output {output} of shard {index}/{count} is missing")
+                copies[dest] = (output, key)
+                outputs.append(dest)
+            entries[key] = dict(entry, outputs=outputs)
+        files.update(shard.files)
+        values.update(shard.values)
+
+    copied = 0
+    for dest, (output, _) in copies.items():
+        stat = os.stat(output)
+        if not is_unchanged(stat, dest):
+            copy_asset(output, dest, stat, hardlink)
+            copied += 1
+    removed = 0
+    for output in sorted(previous - set(copies)):
+        if os.path.exists(output):
+            os.remove(output)
+            removed += 1
+            logging.info(f"Removed stale output: {output}")
+
+    merged.entries, merged.files, merged.values = entries, files, values
+    merged.save()
+    logging.info(f"Merged {count} shards into {dest_dir}: {len(copies)} files ({copied} copied, "
+                 f"{len(copies) - copied} unchanged), {removed} stale removed")
+    return merged
@@ -0,0 +1,115 @@
+import os
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# A template.html inside a content directory overrides the default
+# template for the pages in that directory and its subdirectories.
+TEMPLATE_NAME = "template.html"
+
+
+def value_to_str(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(value_to_str(item) for item in value)
+    return str(value)
+
+
+class Template:
+    """
+    A template compiled into a list of (literal, placeholder name) segments,
+    where exactly one side of each pair is None.
+    """
+
+    def __init__(self, source):
+        self.segments = []
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > pos:
+                self.segments.append((source[pos:match.start()], None))
+            self.segments.append((None, match.group(1)))
+            pos = match.end()
+        if pos < len(source):
+            self.segments.append((source[pos:], None))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as file:
+            return cls(file.read())
+
+    @property
+    def placeholders(self):
+        return [name for literal, name in self.segments if name is not None]
+
+    def render(self, context):
+        parts = []
+        for literal, name in self.segments:
+            if name is None:
+                parts.append(literal)
+                continue
+            value = context.get(name)
+            if hasattr(value, "to_html"):
+                parts.append(value.to_html())
+            else:
+                parts.append(value_to_str(value))
+        return "".join(parts)
+
+    def stream(self, fp, context):
+        # Values with a write_html method (HTML nodes) are streamed into fp
+        # instead of being rendered to a string first.
+        for literal, name in self.segments:
+            if name is None:
+                fp.write(literal)
+                continue
+            value = context.get(name)
+            if hasattr(value, "write_html"):
+                value.write_html(fp)
+            else:
+                fp.write(value_to_str(value))
+
+    def __eq__(self, other):
+        return isinstance(other, Template) and self.segments == other.segments
+
+    def __repr__(self):
+        return f"Template({self.placeholders})"
+
+
+class TemplateLoader:
+    """
+    Compiles each template file once per build and resolves which template
+    applies to each content directory. Overrides are only looked up below
+    `root`; without a root every page uses the default template.
+    """
+
+    def __init__(self, default_path, root=None):
+        self.default_path = default_path
+        self.root = os.path.normpath(root) if root is not None else None
+        self._templates = {}
+        self._resolved = {}
+
+    def get(self, path):
+        template = self._templates.get(path)
+        if template is None:
+            template = self._templates[path] = Template.load(path)
+        return template
+
+    def resolve(self, directory):
+        """
+        Return the template path for pages in `directory`.
+        """
+        directory = os.path.normpath(directory)
+        if directory in self._resolved:
+            return self._resolved[directory]
+        if self.root is None or not (directory + os.sep).startswith(self.root + os.sep):
+            path = self.default_path
+        else:
+            candidate = os.path.join(directory, TEMPLATE_NAME)
+            if os.path.isfile(candidate):
+                path = candidate
+            elif directory == self.root:
+                path = self.default_path
+            else:
+                path = self.resolve(os.path.dirname(directory))
+        self._resolved[directory] = path
+        return path
@@ -0,0 +1,78 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from assets import sync_assets
+from compress import Compressor
+from manifest import BuildManifest
+
+
+class TestSyncAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.css = self.write(os.path.join("static", "index.css"), "body {}")
+        self.image = self.write(os.path.join("static", "images", "a.png"), "png" * 100)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_copies_then_skips_unchanged(self):
+        report = sync_assets(self.static, self.public)
+        self.assertEqual((report.copied_files, report.copied_bytes), (2, 307))
+        with open(os.path.join(self.public, "images", "a.png")) as file:
+            self.assertEqual(file.read(), "png" * 100)
+
+        report = sync_assets(self.static, self.public)
+        self.assertEqual((report.copied_files, report.skipped_files), (0, 2))
+        self.assertEqual(report.skipped_bytes, 307)
+
+    def test_recopies_changed_file(self):
+        sync_assets(self.static, self.public)
+        self.write(os.path.join("static", "index.css"), "body { margin: 0 }")
+        report = sync_assets(self.static, self.public)
+        self.assertEqual((report.copied_files, report.skipped_files), (1, 1))
+        with open(os.path.join(self.public, "index.css")) as file:
+            self.assertEqual(file.read(), "body { margin: 0 }")
+
+    def test_hardlink(self):
+        sync_assets(self.static, self.public, hardlink=True)
+        self.assertTrue(
+            os.path.samefile(self.css, os.path.join(self.public, "index.css"))
+        )
+
+    def test_hardlinked_asset_edited_in_place_is_recompressed(self):
+        compressor = Compressor(("gz",), jobs=0)
+        sync_assets(self.static, self.public, hardlink=True, compressor=compressor)
+        sibling = os.path.join(self.public, "index.css.gz")
+        stat = os.stat(sibling)
+        os.utime(sibling, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+
+        # The link shows the edit too, so only the sibling is out of date
+        with open(self.css, "r+") as file:
+            file.write("p {}   ")
+        report = sync_assets(self.static, self.public, hardlink=True, compressor=compressor)
+        self.assertEqual(report.copied_files, 0)
+        with open(sibling, "rb") as file:
+            self.assertEqual(gzip.decompress(file.read()), b"p {}   ")
+
+    def test_removed_asset_is_pruned(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        sync_assets(self.static, self.public, manifest)
+        os.remove(self.image)
+        manifest.reset()
+        sync_assets(self.static, self.public, manifest)
+        manifest.prune()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "a.png")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.css")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from assets import sync_assets
+from compress import Compressor, compressed_paths, is_compressible
+
+
+class TestCompressor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def read_gz(self, path):
+        with gzip.open(path + ".gz", "rb") as file:
+            return file.read()
+
+    def test_already_compressed_types_are_skipped(self):
+        self.assertTrue(is_compressible("site/index.html"))
+        self.assertFalse(is_compressible("site/logo.PNG"))
+        self.assertEqual(compressed_paths("a.css", ("gz", "br")), ["a.css.gz", "a.css.br"])
+        self.assertEqual(compressed_paths("a.woff2", ("gz",)), [])
+
+    def test_open_compresses_streamed_text(self):
+        for jobs in (0, 2):
+            path = self.path(f"page{jobs}.html")
+            compressor = Compressor(("gz",), jobs=jobs)
+            with compressor.open(path) as file:
+                file.write("<h1>Héllo</h1>")
+                file.writelines(["<p>", "text", "</p>"])
+            compressor.close()
+            with open(path, "rb") as file:
+                self.assertEqual(self.read_gz(path), file.read())
+
+    def test_output_is_deterministic(self):
+        compressor = Compressor(("gz",))
+        compressor.submit(self.path("a.html"), "same")
+        compressor.submit(self.path("b.html"), b"same")
+        compressor.submit(self.path("c.png"), b"not compressed")
+        compressor.close()
+        with open(self.path("a.html.gz"), "rb") as a, open(self.path("b.html.gz"), "rb") as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertFalse(os.path.exists(self.path("c.png.gz")))
+        self.assertEqual(compressor.files, 2)
+
+    def test_only_re_emitted_assets_are_compressed(self):
+        static, public = self.path("static"), self.path("public")
+        os.makedirs(static)
+        for name in ("site.css", "logo.png"):
+            with open(os.path.join(static, name), "w") as file:
+                file.write("body {}")
+        compressor = Compressor(("gz",))
+        sync_assets(static, public, compressor=compressor)
+        compressor.wait()
+        self.assertEqual(self.read_gz(os.path.join(public, "site.css")), b"body {}")
+        self.assertFalse(os.path.exists(os.path.join(public, "logo.png.gz")))
+        sync_assets(static, public, compressor=compressor)
+        compressor.close()
+        self.assertEqual(compressor.files, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode
 
@@ -67,6 +68,28 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "ul",
+            [ParentNode("li", [LeafNode("b", f"item {i}")]) for i in range(3)],
+        )
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_write_html(self):
+        node = HTMLNode(
+            "pre", None, [HTMLNode("code", None, ["print('hi')"])], {"class": "py"}
+        )
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(
+            buffer.getvalue(), "<pre class=\"py\"><code>print('hi')</code></pre>"
+        )
+
+    def test_write_html_invalid_leaf(self):
+        node = ParentNode("p", [LeafNode("b", None)])
+        with self.assertRaises(ValueError):
+            node.write_html(io.StringIO())
+
 
 if __name__ == "__main__":
     unittest.main()
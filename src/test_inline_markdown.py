@@ -1,3 +1,6 @@
+import io
+import random
+import time
 import unittest
 from inline_markdown import (
     split_nodes_delimiter,
@@ -8,10 +11,21 @@ from inline_markdown import (
     text_to_textnodes,
     markdown_to_blocks,
     block_to_block_type,
-    markdown_to_html_node
+    iter_blocks,
+    iter_file_blocks,
+    markdown_to_html_node,
+    parser_signature,
+    StreamedDocument,
+    register_block_type,
+    register_delimiter,
+    restore_registries,
+    save_registries,
+    text_to_children,
 )
+from htmlnode import HTMLNode, LeafNode
 from textnode import (
     TextNode,
+    register_text_type,
     text_type_text,
     text_type_bold,
     text_type_italic,
@@ -195,6 +209,39 @@ class TestInlineMarkdown(unittest.TestCase):
         result = text_to_textnodes(text)
         self.assertEqual(result, expected_nodes)
 
+    def test_text_to_textnodes_plain(self):
+        self.assertEqual(
+            text_to_textnodes("Just plain text"),
+            [TextNode("Just plain text", text_type_text)],
+        )
+
+    def test_text_to_textnodes_link_after_image(self):
+        text = "![alt](/a.png)[Back Home](/) done"
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("alt", text_type_image, "/a.png"),
+                TextNode("Back Home", text_type_link, "/"),
+                TextNode(" done", text_type_text),
+            ],
+        )
+
+    def test_text_to_textnodes_unmatched_brackets(self):
+        text = "a [note] and ![not an image and [link](/x)"
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("a [note] and ![not an image and ", text_type_text),
+                TextNode("link", text_type_link, "/x"),
+            ],
+        )
+
+    def test_text_to_textnodes_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is `not closed")
+
     def test_markdown_to_blocks(self):
         markdown = """
 This is **bolded** paragraph
@@ -225,6 +272,70 @@ This is the same paragraph on a new line
         self.assertEqual(block_to_block_type("1. First\n2. Second"), block_type_ordered_list)
 
 
+    def test_iter_blocks(self):
+        markdown = "# Title\n\n  \n1. one\n2. two\n\n1. one\n3. three\n\n> quote\n> more\n"
+        self.assertEqual(
+            list(iter_blocks(markdown)),
+            [
+                ("# Title", block_type_heading),
+                ("1. one\n2. two", block_type_ordered_list),
+                ("1. one\n3. three", block_type_paragraph),
+                ("> quote\n> more", block_type_quote),
+            ],
+        )
+
+    def test_iter_blocks_keeps_blank_lines_in_fences(self):
+        markdown = "Intro\n\n```\ndef f():\n\n    return 1\n```\n\n```inline```\n\nAfter"
+        self.assertEqual(
+            list(iter_blocks(markdown)),
+            [
+                ("Intro", block_type_paragraph),
+                ("```\ndef f():\n\n    return 1\n```", block_type_code),
+                ("```inline```", block_type_code),
+                ("After", block_type_paragraph),
+            ],
+        )
+
+    def test_inline_code_at_paragraph_start_is_not_a_fence(self):
+        markdown = "# T\n\n```x``` is inline.\n\nSecond.\n\n## Next\n\n* item"
+        self.assertEqual(
+            [block_type for _, block_type in iter_blocks(markdown)],
+            [block_type_heading, block_type_paragraph, block_type_paragraph, block_type_heading,
+             block_type_unordered_list],
+        )
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            "<div><h1>T</h1><p><code>x</code> is inline.</p><p>Second.</p><h2>Next</h2>"
+            "<ul><li>item</li></ul></div>",
+        )
+
+    def test_unclosed_fence_is_code_to_the_end(self):
+        markdown = "Intro\n\n```python\ndef f():\n\n    return *1"
+        self.assertEqual(
+            list(iter_blocks(markdown)),
+            [("Intro", block_type_paragraph), ("```python\ndef f():\n\n    return *1", block_type_code)],
+        )
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            "<div><p>Intro</p><pre><code>python\ndef f():\n\n    return *1</code></pre></div>",
+        )
+
+    def test_iter_file_blocks_matches_iter_blocks(self):
+        markdown = "# Title\n\n```\na\n\n\nb\n```\n- one\n- two\n\n  \n> quote\n"
+        self.assertEqual(list(iter_file_blocks(io.StringIO(markdown))), list(iter_blocks(markdown)))
+
+    def test_streamed_document_matches_tree(self):
+        markdown = "# Title\n\nSome **bold** text\n\n```\ncode\n\nmore\n```"
+        nodes = []
+        document = StreamedDocument(iter_file_blocks(io.StringIO(markdown)), on_node=nodes.append)
+        self.assertEqual(document.to_html(), markdown_to_html_node(markdown).to_html())
+        self.assertEqual(len(nodes), 3)
+
+    def test_block_to_block_type_mixed_lines(self):
+        self.assertEqual(block_to_block_type("> Quote\nnot a quote"), block_type_paragraph)
+        self.assertEqual(block_to_block_type("* Item\n1. Item"), block_type_paragraph)
+        self.assertEqual(block_to_block_type("  # Not a heading"), block_type_paragraph)
+
     def test_markdown_to_html_node(self):
         markdown = """
 # Heading
@@ -263,8 +374,134 @@ This is a code block
         self.assertEqual(len(html_node.children[3].children), 2)  # 2 ordered list items
         self.assertEqual(html_node.children[6].children[0].tag, "code")
 
-if __name__ == "__main__":
-    unittest.main()
+
+class TestCustomTypes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The registries are global: put them back for the other tests
+        cls.addClassCleanup(restore_registries, save_registries())
+        cls.text_type_strike = register_text_type("strikethrough", lambda node: LeafNode("s", node.text))
+        register_delimiter("~~", cls.text_type_strike)
+        cls.block_type_table = register_block_type(
+            "table",
+            lambda block: HTMLNode("table", None, [
+                HTMLNode("tr", None, [HTMLNode("td", None, text_to_children(cell.strip()))
+                                      for cell in line.strip("|").split("|")])
+                for line in block.split("\n")
+            ]),
+            lambda block: all(line.startswith("|") for line in block.split("\n")),
+        )
+
+    def test_custom_delimiter(self):
+        self.assertEqual(
+            text_to_textnodes("keep ~~drop~~ **and ~ tilde**"),
+            [
+                TextNode("keep ", text_type_text),
+                TextNode("drop", self.text_type_strike),
+                TextNode(" ", text_type_text),
+                TextNode("and ~ tilde", text_type_bold),
+            ],
+        )
+        self.assertEqual(text_to_textnodes("[a~b](/u)"), [TextNode("a~b", text_type_link, "/u")])
+        self.assertEqual(text_to_textnodes("[a~~b~~](/u)")[0], TextNode("[a", text_type_text))
+        with self.assertRaises(ValueError):
+            text_to_textnodes("~~open")
+        with self.assertRaises(ValueError):
+            register_delimiter("![", self.text_type_strike)
+
+    def test_custom_block_type(self):
+        markdown = "| a | *b* |\n| c | d |\n\n| not a table\nbecause of this line"
+        self.assertEqual([block_type for _, block_type in iter_blocks(markdown)],
+                         [self.block_type_table, block_type_paragraph])
+        self.assertEqual(block_to_block_type("| x |"), self.block_type_table)
+        self.assertEqual(str(self.block_type_table), "table")
+        self.assertEqual(
+            markdown_to_html_node(markdown).children[0].to_html(),
+            "<table><tr><td>a</td><td><i>b</i></td></tr><tr><td>c</td><td>d</td></tr></table>",
+        )
+
+    def test_restore_registries(self):
+        saved = save_registries()
+        signature = parser_signature()
+        register_delimiter("^^", register_text_type("sup", lambda node: LeafNode("sup", node.text)))
+        register_block_type("rule", lambda block: LeafNode("hr", ""), lambda block: block == "+++")
+        restore_registries(saved)
+        self.assertEqual(parser_signature(), signature)
+        self.assertEqual(text_to_textnodes("a ^^b^^"), [TextNode("a ^^b^^", text_type_text)])
+        self.assertEqual(block_to_block_type("+++"), block_type_paragraph)
+        self.assertEqual(text_to_textnodes("~~b~~"), [TextNode("b", self.text_type_strike)])
+
+
+def adversarial_inputs(size):
+    # Inputs that made the regex-based extraction backtrack or the
+    # splitters re-copy the remaining text once per match
+    return [
+        "[" * size,
+        "[" + "a" * size,
+        "[a](" * (size // 4),
+        "![a](" * (size // 5),
+        "[a]" * (size // 3),
+        "[" * (size // 2) + "a" + "]" * (size // 2) + "(b)",
+        "[a](b) " * (size // 7),
+        "![a](b) " * (size // 8),
+        "[a](b" * (size // 5),
+    ]
+
+
+class TestPathologicalInlineInput(unittest.TestCase):
+    functions = [
+        text_to_textnodes,
+        lambda text: split_nodes_link(split_nodes_image([TextNode(text, text_type_text)])),
+        extract_markdown_links,
+        extract_markdown_images,
+    ]
+
+    def best_time(self, func, text):
+        best = None
+        for _ in range(5):
+            start = time.perf_counter()
+            func(text)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def test_adversarial_input_costs_no_more_than_valid_markup(self):
+        # Compared with well-formed links and images of the same length,
+        # timed in the same run: a linear parser is within a small factor
+        # (about 3x at worst), one that backtracks or re-copies the text
+        # per match is hundreds of times slower. The baseline is floored
+        # so sub-millisecond timings don't decide the outcome. Growth
+        # with input size is reported by bench/bench_adversarial.py.
+        size = 32000
+        unit = "[a](b) ![c](d) "
+        baseline_text = unit * (size // len(unit))
+        for func in self.functions:
+            baseline = max(self.best_time(func, baseline_text), 0.001)
+            for text in adversarial_inputs(size):
+                self.assertLess(self.best_time(func, text), baseline * 10, (text[:12], func))
+
+    def test_many_links_parse_in_order(self):
+        text = "".join(f"[l{i}](/u{i}) and ![i{i}](/p{i}) " for i in range(3000))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 4 * 3000)
+        self.assertEqual(nodes[-4], TextNode("l2999", text_type_link, "/u2999"))
+        self.assertEqual(nodes[-2], TextNode("i2999", text_type_image, "/p2999"))
+        self.assertEqual(split_nodes_link(split_nodes_image([TextNode(text, text_type_text)])), nodes)
+
+    def test_fuzz(self):
+        # Random input over the markup characters parses (or is rejected as
+        # unclosed) without losing or inventing plain text
+        rng = random.Random(19)
+        for _ in range(2000):
+            text = "".join(rng.choice("[]()!*` a\n") for _ in range(rng.randint(0, 40)))
+            try:
+                nodes = text_to_textnodes(text)
+            except ValueError:
+                continue
+            for node in nodes:
+                self.assertTrue(node.text or node.text_type in (text_type_image, text_type_link))
+                if node.text_type == text_type_text:
+                    self.assertIn(node.text, text)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import listings
+from listings import build_listings, generate_listings, read_listing_entry
+from manifest import BuildManifest
+from template import Template
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def post(title, date=None, tags=None, body="Some text."):
+    front_matter = []
+    if date:
+        front_matter.append(f"date: {date}")
+    if tags:
+        front_matter.append(f"tags: {tags}")
+    header = "---\n" + "\n".join(front_matter) + "\n---\n" if front_matter else ""
+    return f"{header}# {title}\n\n{body}\n"
+
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "public")
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        write(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+        self.template = Template.load(self.template_path)
+        self.pages = []
+        self.add("index.md", post("Home"))
+        self.add("blog/a.md", post("Alpha", "2023-05-01", "[python, web]"))
+        self.add("blog/b.md", post("Beta", "2024-01-10", "python"))
+        self.add("blog/c.md", post("Gamma", "2024-01-10", "[Web]"))
+        self.add("blog/d/index.md", post("Delta", "2022-12-31"))
+
+    def add(self, name, content):
+        path = os.path.join(self.content, name)
+        write(path, content)
+        dest = os.path.join(self.dest, os.path.splitext(name)[0] + ".html")
+        self.pages.append((path, dest))
+
+    def entries(self):
+        return [read_listing_entry(path, dest, self.dest) for path, dest in self.pages]
+
+    def read(self, name):
+        with open(os.path.join(self.dest, name)) as file:
+            return file.read()
+
+    def test_entry_reads_only_up_to_the_first_h1(self):
+        path = os.path.join(self.content, "long.md")
+        write(path, "---\ntags: a, b\n---\nIntro.\n\n# Long\n\n" + "More text.\n\n" * 1000)
+        consumed = []
+        iter_file_blocks = listings.iter_file_blocks
+
+        def counting(file):
+            for block in iter_file_blocks(file):
+                consumed.append(block)
+                yield block
+
+        with mock.patch.object(listings, "iter_file_blocks", counting):
+            entry = read_listing_entry(path, os.path.join(self.dest, "long.html"), self.dest)
+        self.assertEqual(len(consumed), 2)
+        self.assertEqual((entry.title, entry.url, entry.date, entry.tags), ("Long", "/long.html", None, ("a", "b")))
+
+        write(path, "---\ntitle: From front matter\n---\n# Heading\n")
+        with mock.patch.object(listings, "iter_file_blocks") as blocks:
+            entry = read_listing_entry(path, os.path.join(self.dest, "long.html"), self.dest)
+        blocks.assert_not_called()
+        self.assertEqual(entry.title, "From front matter")
+
+    def test_grouping_and_order(self):
+        found = {listing.directory: [entry.title for entry in listing.entries] for listing in build_listings(self.entries())}
+        self.assertEqual(found, {
+            "posts": ["Beta", "Gamma", "Alpha", "Delta"],
+            "tags/python": ["Beta", "Alpha"],
+            "tags/web": ["Gamma", "Alpha"],
+            "archive/2024": ["Beta", "Gamma"],
+            "archive/2023": ["Alpha"],
+            "archive/2022": ["Delta"],
+        })
+
+    def test_pagination(self):
+        written = generate_listings(self.pages, self.dest, self.template, per_page=3)
+        self.assertEqual(written, 7)
+        first = self.read("posts/index.html")
+        self.assertIn("<title>Posts</title>", first)
+        self.assertIn('<a href="/blog/b.html">Beta</a> <time datetime="2024-01-10">2024-01-10</time>', first)
+        self.assertIn('<a href="/posts/page/2/" rel="next">Older</a>', first)
+        self.assertNotIn("Delta", first)
+        second = self.read("posts/page/2/index.html")
+        self.assertIn("<title>Posts (page 2 of 2)</title>", second)
+        self.assertIn('<a href="/blog/d/">Delta</a>', second)
+        self.assertIn('<a href="/posts/" rel="prev">Newer</a>', second)
+        self.assertNotIn('rel="next"', second)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "tags", "web", "page")))
+
+    def test_tags_with_the_same_slug_stay_apart(self):
+        self.add("blog/e.md", post("Epsilon", "2024-03-01", "[C++]"))
+        self.add("blog/f.md", post("Zeta", "2024-03-02", "[C, c]"))
+        with self.assertLogs(level="WARNING") as logs:
+            found = {listing.directory: [entry.title for entry in listing.entries]
+                     for listing in build_listings(self.entries())}
+        self.assertEqual((found["tags/c"], found["tags/c-2"]), (["Zeta"], ["Epsilon"]))
+        self.assertIn("Tags 'C' and 'C++' have the same slug 'c'", logs.output[0])
+
+    def test_listing_never_overwrites_a_page(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_listings(self.pages, self.dest, self.template, self.template_path, manifest, 3)
+
+        # A page now generates posts/index.html; the listing is reported
+        # and its stale entry leaves the page's file alone
+        self.add("posts/index.md", post("My posts"))
+        page_output = os.path.join(self.dest, "posts", "index.html")
+        write(page_output, "the page")
+        manifest.reset()
+        with self.assertLogs(level="ERROR") as logs:
+            generate_listings(self.pages, self.dest, self.template, self.template_path, manifest, 3)
+        self.assertIn(f"Listing 'Posts' not written: {page_output} is generated from a page", logs.output[0])
+        self.assertEqual(self.read("posts/index.html"), "the page")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "posts", "page", "2", "index.html")))
+        self.assertNotIn("listing:posts", manifest.entries)
+
+    def test_unchanged_listings_are_skipped(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.assertEqual(generate_listings(self.pages, self.dest, self.template, self.template_path, manifest, 3), 7)
+
+        # A body edit leaves every entry as it was
+        manifest.reset()
+        self.add("blog/a.md", post("Alpha", "2023-05-01", "[python, web]", body="Rewritten."))
+        self.pages.pop()
+        self.assertEqual(generate_listings(self.pages, self.dest, self.template, self.template_path, manifest, 3), 0)
+
+        # Retagging rebuilds the listings the entry leaves and joins, and
+        # the listings it is shown in
+        manifest.reset()
+        self.add("blog/c.md", post("Gamma", "2024-01-10", "python"))
+        self.pages.pop()
+        self.assertEqual(generate_listings(self.pages, self.dest, self.template, self.template_path, manifest, 3), 5)
+        self.assertIn("Gamma", self.read("tags/python/index.html"))
+        self.assertNotIn("Gamma", self.read("tags/web/index.html"))
+        self.assertIn(f"meta:listing:{self.pages[3][0]} changed", manifest.entries["listing:posts"]["reasons"])
+
+        # A tag listing left empty is deleted
+        manifest.reset()
+        self.add("blog/a.md", post("Alpha", "2023-05-01", "python"))
+        self.pages.pop()
+        generate_listings(self.pages, self.dest, self.template, self.template_path, manifest, 3)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "tags", "web", "index.html")))
+        self.assertNotIn("listing:tags/web", manifest.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,402 @@
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from main import (
+    BuildOptions,
+    collect_pages,
+    generate_pages,
+    generate_pages_recursive,
+    rebuild_paths,
+    write_page,
+    write_page_streamed,
+)
+from template import Template
+from compress import Compressor
+from manifest import BuildManifest
+from parse_cache import ParseCache
+from render_cache import BlockCache
+from search_index import SearchIndexBuilder, load_search_index
+from walker import Walker
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def read_tree(root):
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as file:
+                files[os.path.relpath(path, root)] = file.read()
+    return files
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(6):
+            write(
+                os.path.join(self.content, f"section{i % 2}", f"page{i}.md"),
+                f"# Page {i}\n\nSome **bold** text and a [link](/page{i}).",
+            )
+        write(os.path.join(self.content, "index.md"), "# Home")
+
+    def test_collect_pages_is_sorted(self):
+        dest = os.path.join(self.tmp.name, "public")
+        pages = collect_pages(self.content, dest)
+        self.assertEqual(len(pages), 7)
+        self.assertEqual(
+            pages[0],
+            (os.path.join(self.content, "index.md"), os.path.join(dest, "index.html")),
+        )
+        self.assertEqual(pages, sorted(pages))
+
+    def test_excluded_pages_are_skipped_and_removed(self):
+        dest = os.path.join(self.tmp.name, "public")
+        static = os.path.join(self.tmp.name, "static")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest))
+        draft = os.path.join(dest, "section1", "page3.html")
+        self.assertTrue(os.path.exists(draft))
+
+        write(os.path.join(self.content, "section1", ".ignore"), "page3.md\n")
+        walker = Walker(exclude=["section0/"])
+        pages = collect_pages(self.content, dest, walker)
+        self.assertEqual([os.path.basename(path) for path, _ in pages], ["index.md", "page1.md", "page5.md"])
+        manifest.reset()
+        generate_pages(pages, self.template, BuildOptions(manifest))
+        manifest.prune()
+        self.assertFalse(os.path.exists(draft))
+        self.assertFalse(os.path.exists(os.path.join(dest, "section0", "page0.html")))
+
+        # The watcher's rebuilds skip excluded pages too
+        write(os.path.join(self.content, "section1", "page3.md"), "# Still a draft")
+        rebuild_paths({os.path.join(self.content, "section1", "page3.md")}, self.content, static, self.template,
+                      dest, BuildOptions(manifest, walker=walker))
+        self.assertFalse(os.path.exists(draft))
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages(collect_pages(self.content, serial), self.template)
+        generate_pages(collect_pages(self.content, parallel), self.template, BuildOptions(jobs=3))
+        self.assertEqual(read_tree(serial), read_tree(parallel))
+
+    def test_pipelined_output_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        generate_pages(collect_pages(self.content, serial), self.template)
+        for jobs in (1, 2):
+            pipelined = os.path.join(self.tmp.name, f"pipelined{jobs}")
+            generate_pages(
+                collect_pages(self.content, pipelined), self.template, BuildOptions(jobs=jobs, pipeline=True)
+            )
+            self.assertEqual(read_tree(serial), read_tree(pipelined))
+
+    def test_search_index_matches_across_modes_and_incremental_builds(self):
+        indexes = []
+        for name, options in [("serial", {}), ("parallel", {"jobs": 2}), ("pipelined", {"pipeline": True})]:
+            dest = os.path.join(self.tmp.name, name)
+            search = SearchIndexBuilder(dest)
+            generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(**options), search=search)
+            search.finish()
+            indexes.append(load_search_index(search.directory))
+        self.assertEqual(indexes[0], indexes[1])
+        self.assertEqual(indexes[0], indexes[2])
+        terms, pages = indexes[0]
+        self.assertEqual(pages[0], ["/index.html", "Home"])
+        self.assertEqual(len(terms["bold"]), 6)
+
+        # Only one page is rendered; the rest are parsed for their terms
+        dest = os.path.join(self.tmp.name, "serial")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest))
+        write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome back")
+        search = SearchIndexBuilder(dest)
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest), search=search)
+        search.finish()
+        terms, pages = load_search_index(search.directory)
+        self.assertEqual(terms["welcome"], [(0, [1])])
+        self.assertEqual(len(terms["bold"]), 6)
+
+    def test_search_index_reuses_terms_of_unchanged_pages(self):
+        dest = os.path.join(self.tmp.name, "public")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages_recursive(self.content, self.template, dest, BuildOptions(manifest, search_index=True))
+        expected = load_search_index(os.path.join(dest, "search"))
+
+        # A changed page is rendered; the others are not parsed again
+        changed = os.path.join(self.content, "section0", "page0.md")
+        write(changed, "# Page 0\n\nSome **bold** text and a [link](/page0). Edited")
+        manifest.reset()
+        with mock.patch("main.read_page_tokens") as read_page_tokens:
+            generate_pages_recursive(self.content, self.template, dest, BuildOptions(manifest, search_index=True))
+        read_page_tokens.assert_not_called()
+        terms, pages = load_search_index(os.path.join(dest, "search"))
+        self.assertEqual(pages, expected[1])
+        self.assertEqual(terms["edited"], [(1, [8])])
+        self.assertEqual(terms["bold"], expected[0]["bold"])
+
+        terms_dir = os.path.join(self.tmp.name, "search-terms")
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(terms_dir)), 7)
+
+    def test_compressed_siblings_in_every_mode(self):
+        trees = []
+        for name, options in [("serial", {}), ("parallel", {"jobs": 2}), ("pipelined", {"pipeline": True})]:
+            dest = os.path.join(self.tmp.name, name)
+            compressor = Compressor(("gz",))
+            generate_pages(collect_pages(self.content, dest), self.template,
+                           BuildOptions(compressor=compressor, **options))
+            compressor.close()
+            trees.append(read_tree(dest))
+        self.assertEqual(trees[0], trees[1])
+        self.assertEqual(trees[0], trees[2])
+        self.assertEqual(len(trees[0]), 14)
+        self.assertEqual(gzip.decompress(trees[0]["index.html.gz"]), trees[0]["index.html"])
+
+    def test_parse_cache_output_matches_in_every_mode(self):
+        expected = os.path.join(self.tmp.name, "expected")
+        generate_pages(collect_pages(self.content, expected), self.template)
+        cache_dir = os.path.join(self.tmp.name, "parse")
+        for name, options in [("serial", {}), ("parallel", {"jobs": 2}), ("pipelined", {"pipeline": True})]:
+            dest = os.path.join(self.tmp.name, name)
+            generate_pages(collect_pages(self.content, dest), self.template,
+                           BuildOptions(parse_cache=ParseCache(cache_dir), **options))
+            self.assertEqual(read_tree(dest), read_tree(expected))
+
+        # A template change re-renders every page without parsing any
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        dest = os.path.join(self.tmp.name, "serial")
+        parse_cache = ParseCache(cache_dir)
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(parse_cache=parse_cache))
+        self.assertEqual((parse_cache.hits, parse_cache.misses), (7, 0))
+        with open(os.path.join(dest, "index.html")) as file:
+            self.assertEqual(file.read(), "<h1>Home</h1><div><h1>Home</h1></div>")
+
+    def test_block_cache_is_filled_in_every_mode(self):
+        serial = BlockCache(1000)
+        generate_pages(collect_pages(self.content, os.path.join(self.tmp.name, "serial")), self.template,
+                       BuildOptions(block_cache=serial))
+        for name, options in [("parallel", {"jobs": 2}), ("pipelined", {"jobs": 2, "pipeline": True})]:
+            cache = BlockCache(1000)
+            dest = os.path.join(self.tmp.name, name)
+            generate_pages(collect_pages(self.content, dest), self.template,
+                           BuildOptions(block_cache=cache, **options))
+            self.assertEqual(len(cache), len(serial), name)
+
+            # What the workers rendered is reused by the next build
+            cache.hits = cache.misses = 0
+            generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(block_cache=cache))
+            self.assertEqual(cache.misses, 0, name)
+
+    def test_siblings_are_tracked_by_the_manifest(self):
+        dest = os.path.join(self.tmp.name, "public")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        compressor = Compressor(("gz",))
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest, compressor=compressor))
+        compressor.wait()
+        sibling = os.path.join(dest, "index.html.gz")
+        os.remove(sibling)
+        manifest.reset()
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest, compressor=compressor))
+        compressor.close()
+        self.assertTrue(os.path.exists(sibling))
+
+        # Building without compression removes the siblings
+        manifest.reset()
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest))
+        self.assertEqual([name for name in read_tree(dest) if name.endswith(".gz")], [])
+
+    def test_rebuild_paths_only_touches_affected_pages(self):
+        dest = os.path.join(self.tmp.name, "public")
+        static = os.path.join(self.tmp.name, "static")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest))
+
+        changed = os.path.join(self.content, "section0", "page0.md")
+        removed = os.path.join(self.content, "section1", "page1.md")
+        untouched = os.path.join(dest, "index.html")
+        write(changed, "# Changed")
+        os.remove(removed)
+        os.utime(untouched, (0, 0))
+
+        rebuild_paths({changed, removed}, self.content, static, self.template, dest, BuildOptions(manifest))
+        with open(os.path.join(dest, "section0", "page0.html")) as file:
+            self.assertIn("<title>Changed</title>", file.read())
+        self.assertFalse(os.path.exists(os.path.join(dest, "section1", "page1.html")))
+        self.assertEqual(os.stat(untouched).st_mtime, 0)
+
+        os.utime(untouched, (0, 0))
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        rebuild_paths({self.template}, self.content, static, self.template, dest, BuildOptions(manifest))
+        self.assertNotEqual(os.stat(untouched).st_mtime, 0)
+
+    def test_rebuild_paths_updates_listings(self):
+        dest = os.path.join(self.tmp.name, "public")
+        static = os.path.join(self.tmp.name, "static")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        post = os.path.join(self.content, "section0", "post.md")
+        write(post, "---\ndate: 2024-02-01\ntags: [news]\n---\n# Post")
+        rebuild_paths({post}, self.content, static, self.template, dest, BuildOptions(manifest, listings=10))
+        with open(os.path.join(dest, "tags", "news", "index.html")) as file:
+            self.assertIn('<a href="/section0/post.html">Post</a>', file.read())
+
+        write(post, "---\ndate: 2024-02-01\ntags: [events]\n---\n# Post")
+        rebuild_paths({post}, self.content, static, self.template, dest, BuildOptions(manifest, listings=10))
+        self.assertFalse(os.path.exists(os.path.join(dest, "tags", "news", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(dest, "tags", "events", "index.html")))
+
+        # A title edit rebuilds the listings showing the page through its
+        # listing metadata, which holds the title
+        write(post, "---\ndate: 2024-02-01\ntags: [events]\n---\n# Renamed")
+        rebuild_paths({post}, self.content, static, self.template, dest, BuildOptions(manifest, listings=10))
+        with open(os.path.join(dest, "tags", "events", "index.html")) as file:
+            self.assertIn('<a href="/section0/post.html">Renamed</a>', file.read())
+        self.assertEqual(manifest.entries["listing:tags/events"]["reasons"], [f"meta:listing:{post} changed"])
+
+    def test_rebuild_paths_updates_search_index(self):
+        dest = os.path.join(self.tmp.name, "public")
+        static = os.path.join(self.tmp.name, "static")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        options = BuildOptions(manifest, search_index=True)
+        generate_pages_recursive(self.content, self.template, dest, options)
+
+        changed = os.path.join(self.content, "section0", "page0.md")
+        removed = os.path.join(self.content, "section1", "page1.md")
+        write(changed, "# Page 0\n\nSome **bold** text and a [link](/page0). Edited")
+        os.remove(removed)
+        with mock.patch("main.read_page_tokens") as read_page_tokens:
+            rebuild_paths({changed, removed}, self.content, static, self.template, dest, options)
+        read_page_tokens.assert_not_called()
+        terms, pages = load_search_index(os.path.join(dest, "search"))
+        self.assertEqual(terms["edited"], [(1, [8])])
+        self.assertNotIn("/section1/page1.html", [url for url, _ in pages])
+
+        # The index is the one a full build writes
+        full = os.path.join(self.tmp.name, "full")
+        generate_pages_recursive(self.content, self.template, full, BuildOptions(search_index=True))
+        self.assertEqual((terms, pages), load_search_index(os.path.join(full, "search")))
+
+    def test_rebuild_reasons_are_recorded(self):
+        dest = os.path.join(self.tmp.name, "public")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest, jobs=2))
+        page = os.path.join(self.content, "index.md")
+        self.assertEqual(manifest.entries[page]["reasons"], ["never built"])
+
+        write(page, "# New home")
+        manifest.reset()
+        generate_pages(collect_pages(self.content, dest), self.template, BuildOptions(manifest, pipeline=True))
+        self.assertEqual(manifest.entries[page]["reasons"], [f"{page} changed"])
+        self.assertIn("    " + f"{page} changed", manifest.explain(os.path.join(dest, "index.html")))
+
+
+class TestStreamedPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}<p>{{ WordCount }} words</p>")
+        self.source = os.path.join(self.tmp.name, "reference.md")
+        sections = [
+            f"## Function {i}\n\nCall **f{i}** with a [link](/f{i}).\n\n```\nf{i}()\n\n# not a title\n```"
+            for i in range(500)
+        ]
+        write(self.source, "---\nauthor: me\n---\n# API Reference\n\n" + "\n\n".join(sections) + "\n")
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_streamed_page_matches_write_page(self):
+        whole = os.path.join(self.tmp.name, "whole.html")
+        streamed = os.path.join(self.tmp.name, "streamed.html")
+        expected = write_page(self.source, self.template, whole, search=True)
+        metadata = write_page_streamed(self.source, self.template, streamed, search=True)
+        self.assertEqual(self.read(streamed), self.read(whole))
+        self.assertTrue(self.read(streamed).startswith("<title>API Reference</title><div><h1>"))
+        self.assertEqual(metadata.to_dict(), expected.to_dict())
+        self.assertEqual(metadata.tokens, expected.tokens)
+
+    def test_streamed_page_memory_does_not_grow_with_the_file(self):
+        # Also when the page is compressed as it is written
+        for compressor in (None, Compressor(("gz",), jobs=0)):
+            peaks = []
+            out = os.path.join(self.tmp.name, "out.html")
+            for sections in (250, 4000):
+                write(self.source, "# Reference\n\n" + "\n\n".join(
+                    f"Call **f{i}** with a [link](/f{i}).\n\n```\nf{i}()\n\nreturns {i}\n```" for i in range(sections)
+                ))
+                tracemalloc.start()
+                try:
+                    write_page_streamed(self.source, self.template, out, BuildOptions(compressor=compressor))
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+            self.assertLess(peaks[1], peaks[0] * 1.5, compressor)
+            if compressor is not None:
+                with gzip.open(out + ".gz", "rt") as compressed:
+                    self.assertEqual(compressed.read(), self.read(out))
+
+
+class TestShardedBuild(unittest.TestCase):
+    main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+    def make_site(self, root):
+        write(os.path.join(root, "template.html"), "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join(root, "src", "static", "index.css"), "body {}")
+        for i in range(12):
+            write(os.path.join(root, "content", f"section{i % 3}", f"page{i}.md"), f"# Page {i}\n\nText *{i}*.")
+        write(os.path.join(root, "content", "index.md"), "# Home")
+
+    def run_main(self, root, *args):
+        return subprocess.Popen([sys.executable, self.main, *args], cwd=root,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    def wait(self, process):
+        _, stderr = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr)
+
+    def test_shards_merge_into_the_full_build(self):
+        with tempfile.TemporaryDirectory() as full, tempfile.TemporaryDirectory() as sharded:
+            self.make_site(full)
+            self.make_site(sharded)
+            self.wait(self.run_main(full))
+            shards = [self.run_main(sharded, "--shard", f"{index}/3") for index in (1, 2, 3)]
+            for process in shards:
+                self.wait(process)
+            self.wait(self.run_main(sharded, "--merge-shards", "3"))
+            self.assertEqual(read_tree(os.path.join(sharded, "src", "public")),
+                             read_tree(os.path.join(full, "src", "public")))
+
+            # The merged manifest serves a later unsharded incremental build
+            manifest = BuildManifest(os.path.join(sharded, ".cache", "manifest.json"))
+            self.assertEqual(len(manifest.entries), 14)
+            process = self.run_main(sharded)
+            _, stderr = process.communicate()
+            self.assertIn("Generated 0 pages, 13 unchanged", stderr)
+
+    def test_merge_fails_on_mismatched_shard_counts(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.make_site(root)
+            for process in [self.run_main(root, "--shard", f"{index}/2") for index in (1, 2)]:
+                self.wait(process)
+            process = self.run_main(root, "--merge-shards", "3")
+            _, stderr = process.communicate()
+            self.assertNotEqual(process.returncode, 0)
+            self.assertIn("Shard 1/3 has no build manifest", stderr)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest, metadata_node
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        self.src = self.write("index.md", "# Hello")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.out = self.write("index.html", "<h1>Hello</h1>")
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def record_and_reload(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src, [self.src, self.template], [self.out])
+        manifest.save()
+        return BuildManifest(self.manifest_path)
+
+    def test_unknown_entry_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.src, [self.src], [self.out]))
+
+    def test_fresh_after_record(self):
+        manifest = self.record_and_reload()
+        self.assertTrue(
+            manifest.is_fresh(self.src, [self.src, self.template], [self.out])
+        )
+
+    def test_changed_source_is_stale(self):
+        manifest = self.record_and_reload()
+        self.write("index.md", "# Hello, world")
+        self.assertFalse(
+            manifest.is_fresh(self.src, [self.src, self.template], [self.out])
+        )
+
+    def test_changed_template_is_stale(self):
+        manifest = self.record_and_reload()
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.assertFalse(
+            manifest.is_fresh(self.src, [self.src, self.template], [self.out])
+        )
+
+    def test_missing_output_is_stale(self):
+        manifest = self.record_and_reload()
+        os.remove(self.out)
+        self.assertFalse(
+            manifest.is_fresh(self.src, [self.src, self.template], [self.out])
+        )
+
+    def test_prune_removes_outputs_of_unvisited_sources(self):
+        manifest = self.record_and_reload()
+        removed = manifest.prune()
+        self.assertEqual(removed, [self.out])
+        self.assertFalse(os.path.exists(self.out))
+        self.assertEqual(manifest.entries, {})
+
+    def test_stale_reasons_name_the_changed_inputs(self):
+        manifest = self.record_and_reload()
+        self.write("template.html", "<main>{{ Content }}</main>")
+        os.remove(self.out)
+        self.assertEqual(
+            manifest.stale_reasons(self.src, [self.src, self.template], [self.out]),
+            [f"{self.template} changed", f"{self.out} is missing"],
+        )
+
+    def test_metadata_input_is_stale_only_when_its_value_changes(self):
+        listing = self.write("list.html", "")
+        title = metadata_node("title", self.src)
+        manifest = BuildManifest(self.manifest_path)
+        manifest.set_metadata("title", self.src, "Hello")
+        manifest.record(self.src, [self.src], [self.out])
+        manifest.record("list", [title], [listing])
+        manifest.save()
+
+        manifest = BuildManifest(self.manifest_path)
+        self.assertFalse(manifest.set_metadata("title", self.src, "Hello"))
+        self.assertTrue(manifest.is_fresh("list", [title], [listing]))
+        self.assertTrue(manifest.set_metadata("title", self.src, "Goodbye"))
+        self.assertEqual(manifest.stale_reasons("list", [title], [listing]), [f"{title} changed"])
+
+    def test_affected_follows_outputs_and_metadata(self):
+        feed = self.write("feed.xml", "")
+        archive = self.write("archive.html", "")
+        manifest = BuildManifest(self.manifest_path)
+        manifest.set_metadata("title", self.src, "Hello")
+        manifest.record(self.src, [self.src, self.template], [self.out])
+        manifest.record("feed", [self.out], [feed])
+        manifest.record("archive", [metadata_node("title", self.src)], [archive])
+        manifest.record("other", [self.template], [])
+        self.assertEqual(manifest.affected([self.src]), {self.src, "feed", "archive"})
+        self.assertEqual(manifest.affected([self.template]), {self.src, "feed", "other"})
+
+    def test_explain_reports_reasons_and_dependents(self):
+        feed = self.write("feed.xml", "")
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.src, [self.src, self.template], [self.out], ["never built"])
+        manifest.record("feed", [self.out], [feed])
+        manifest.save()
+        lines = BuildManifest(self.manifest_path).explain(self.out)
+        self.assertEqual(lines[0], self.src)
+        self.assertIn("    never built", lines)
+        self.assertEqual(lines[-1], "    feed")
+        self.assertIn("not part of the last build", manifest.explain("missing.html")[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import unittest
+
+from inline_markdown import markdown_to_html_node
+from metadata import PageMetadata, extract_metadata, read_front_matter, scan_metadata, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split_front_matter(self):
+        markdown = '---\ntitle: "Hello: World"\ntags: [lotr, books]\n---\n# Heading\n'
+        variables, body = split_front_matter(markdown)
+        self.assertEqual(variables, {"title": "Hello: World", "tags": ["lotr", "books"]})
+        self.assertEqual(body, "# Heading\n")
+
+    def test_no_front_matter(self):
+        markdown = "# Heading\n\n---\nnot: front matter\n---\n"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_unclosed_front_matter(self):
+        markdown = "---\ntitle: Hello\n# Heading"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_read_front_matter_from_file(self):
+        for markdown in [
+            '---\ntitle: "Hello: World"\n---\n# Heading\n',
+            "# Heading\n",
+            "---\ntitle: Hello\n# Heading",
+            "---\njust some text\n---\n# Heading\n",
+        ]:
+            file = io.StringIO(markdown)
+            variables = read_front_matter(file)
+            self.assertEqual((variables, file.read()), split_front_matter(markdown))
+
+    def test_invalid_front_matter_is_text(self):
+        # A page may open with a thematic break: the block stays in the body
+        markdown = "---\njust some text\n---\n# Heading\n"
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+
+class TestPageMetadata(unittest.TestCase):
+    markdown = (
+        "```\n# not a heading\n```\n\n"
+        "# The **Title**\n\n"
+        "Four words of text.\n\n"
+        "## Section one\n\n"
+        "> quoted words\n> here\n\n"
+        "- two items\n- three more items\n\n"
+        "1. first\n2. second item"
+    )
+
+    def test_extract_metadata(self):
+        metadata = extract_metadata("---\ntags: [a, b]\n---\n" + self.markdown)
+        self.assertEqual(metadata.title, "The **Title**")
+        self.assertEqual(metadata.headings, [(1, "The **Title**"), (2, "Section one")])
+        self.assertEqual(metadata.word_count, 2 + 4 + 2 + 3 + 5 + 3)
+        self.assertEqual(metadata.front_matter, {"tags": ["a", "b"]})
+        self.assertEqual(metadata.page_title(), "The **Title**")
+
+    def test_collected_while_rendering(self):
+        metadata = PageMetadata()
+        node = markdown_to_html_node(self.markdown, metadata=metadata)
+        self.assertEqual(node.to_html(), markdown_to_html_node(self.markdown).to_html())
+        self.assertEqual(metadata.to_dict(), extract_metadata(self.markdown).to_dict())
+
+    def test_scan_metadata_from_file(self):
+        markdown = "---\ntags: [a]\n---\n" + self.markdown
+        file = io.StringIO(markdown)
+        self.assertEqual(scan_metadata(file).to_dict(), extract_metadata(markdown).to_dict())
+        self.assertEqual(file.read(), self.markdown)
+
+    def test_front_matter_title_wins(self):
+        metadata = extract_metadata("---\ntitle: Override\n---\n# Heading")
+        self.assertEqual(metadata.page_title(), "Override")
+        self.assertEqual(metadata.to_dict()["title"], "Override")
+
+    def test_missing_title(self):
+        with self.assertRaises(ValueError):
+            extract_metadata("## Only a subheading").page_title()
+
+
+if __name__ == "__main__":
+    unittest.main()
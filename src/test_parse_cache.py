@@ -0,0 +1,104 @@
+import marshal
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import parse_cache
+from inline_markdown import markdown_to_html_node
+from metadata import PageMetadata
+from parse_cache import ParseCache, decode_node, encode_node
+from render_cache import BlockCache
+
+
+MARKDOWN = """# Title
+
+A paragraph with **bold**, a [link](/a) and ![an image](/b.png).
+
+## Section
+
+* one
+* two
+
+```
+code
+```
+"""
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = os.path.join(self.tmp.name, "parse")
+
+    def test_encode_round_trip(self):
+        for cache in (None, BlockCache()):
+            node = markdown_to_html_node(MARKDOWN, cache)
+            decoded = decode_node(encode_node(node))
+            self.assertEqual(decoded.to_html(), node.to_html())
+            self.assertEqual(type(decoded.children[0]), type(node.children[0]))
+
+    def test_hit_skips_parsing(self):
+        cache = ParseCache(self.directory)
+        node, metadata = cache.parse(MARKDOWN, {"author": "me"})
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        cache = ParseCache(self.directory)
+        with mock.patch.object(parse_cache, "markdown_to_html_node") as parse:
+            cached_node, cached = cache.parse(MARKDOWN, {"author": "you"})
+        parse.assert_not_called()
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(cached_node.to_html(), node.to_html())
+        self.assertEqual(cached.headings, [(1, "Title"), (2, "Section")])
+        self.assertEqual(cached.word_count, metadata.word_count)
+        # Front matter is the caller's, not the stored page's
+        self.assertEqual(cached.page_title(), "Title")
+        self.assertEqual(cached.front_matter, {"author": "you"})
+
+    def test_parser_version_is_part_of_the_key(self):
+        cache = ParseCache(self.directory)
+        cache.parse(MARKDOWN)
+        with mock.patch.object(parse_cache, "PARSE_CACHE_VERSION", parse_cache.PARSE_CACHE_VERSION + 1):
+            cache = ParseCache(self.directory)
+        self.assertIsNone(cache.get(MARKDOWN))
+
+    def test_unreadable_entry_is_a_miss(self):
+        cache = ParseCache(self.directory)
+        cache.parse(MARKDOWN)
+        with open(cache.entry_path(cache.key(MARKDOWN)), "wb") as file:
+            file.write(b"\x00garbage")
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(cache.get(MARKDOWN))
+        cache.parse(MARKDOWN)
+        self.assertIsNotNone(cache.get(MARKDOWN))
+
+    def test_malformed_entry_is_a_miss(self):
+        cache = ParseCache(self.directory)
+        cache.parse(MARKDOWN)
+        for data in [(1, 2), ((9, "p", None, None, ()), None, [], 0)]:
+            with open(cache.entry_path(cache.key(MARKDOWN)), "wb") as file:
+                file.write(marshal.dumps(data))
+            with self.assertLogs(level="WARNING"):
+                self.assertIsNone(cache.get(MARKDOWN))
+
+    def test_evicts_least_recently_used(self):
+        cache = ParseCache(self.directory)
+        pages = [f"# Page {i}\n\n" + "word " * 200 for i in range(3)]
+        for mtime, page in enumerate(pages):
+            cache.put(page, markdown_to_html_node(page), PageMetadata())
+            os.utime(cache.entry_path(cache.key(page)), (mtime, mtime))
+        size = os.path.getsize(cache.entry_path(cache.key(pages[0])))
+        cache.max_bytes = 2 * size + size // 2
+
+        # Reading the oldest entry makes the second one least recent
+        self.assertIsNotNone(cache.get(pages[0]))
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get(pages[1]))
+        self.assertIsNotNone(cache.get(pages[0]))
+        self.assertIsNotNone(cache.get(pages[2]))
+        self.assertEqual(cache.evict(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
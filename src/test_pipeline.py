@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from pipeline import run_pipeline
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.items = []
+        for i in range(25):
+            source = os.path.join(self.tmp.name, "src", f"{i}.txt")
+            os.makedirs(os.path.dirname(source), exist_ok=True)
+            with open(source, "w") as file:
+                file.write(f"page {i}")
+            dest = os.path.join(self.tmp.name, "out", f"dir{i % 3}", f"{i}.html")
+            self.items.append((source, dest, i))
+
+    def test_renders_writes_and_reports_in_order(self):
+        done = []
+        run_pipeline(
+            self.items,
+            lambda text, extra: (f"<p>{text.upper()} #{extra}</p>", extra * 2),
+            lambda item, result: done.append((item, result)),
+            prefetch=4,
+            io_threads=2,
+        )
+        self.assertEqual(done, [(item, item[2] * 2) for item in self.items])
+        with open(self.items[7][1]) as file:
+            self.assertEqual(file.read(), "<p>PAGE 7 #7</p>")
+
+    def test_render_error_propagates(self):
+        def render(text, extra):
+            if extra == 10:
+                raise ValueError("No h1 header found in the markdown file")
+            return text, None
+
+        done = []
+        with self.assertLogs(level="ERROR"), self.assertRaises(ValueError):
+            run_pipeline(self.items, render, lambda item, result: done.append(item), prefetch=4)
+        self.assertLessEqual(len(done), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
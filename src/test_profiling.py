@@ -0,0 +1,61 @@
+import unittest
+
+from profiling import BuildProfiler, StageTimer, profile_stage
+
+
+class TestStageTimer(unittest.TestCase):
+    def test_lap_and_count(self):
+        timer = StageTimer()
+        timer.lap("read")
+        timer.lap("blocks")
+        timer.lap("read")
+        timer.count("blocks", 3)
+        self.assertEqual(sorted(timer.timings), ["blocks", "read"])
+        self.assertTrue(all(seconds >= 0 for seconds in timer.timings.values()))
+        self.assertEqual(timer.counters, {"blocks": 3})
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_aggregate_and_slowest(self):
+        profiler = BuildProfiler(top=2)
+        profiler.add_page("a.md", {"read": 0.1, "write": 0.1}, {"blocks": 2})
+        profiler.add_page("b.md", {"read": 0.5, "write": 0.1}, {"blocks": 3})
+        profiler.add_page("c.md", {"read": 0.3, "write": 0.0}, {"blocks": 1})
+        self.assertEqual(profiler.pages, 3)
+        self.assertAlmostEqual(profiler.timings["read"], 0.9)
+        self.assertEqual(profiler.counters, {"blocks": 6})
+        self.assertEqual([path for _, path, _ in profiler.slowest_pages()], ["b.md", "c.md"])
+
+    def test_stage(self):
+        profiler = BuildProfiler()
+        with profiler.stage("walk"):
+            pass
+        self.assertIn("walk", profiler.timings)
+        with profile_stage(profiler, "assets"):
+            pass
+        self.assertIn("assets", profiler.timings)
+        with profile_stage(None, "assets"):
+            pass
+
+    def test_report(self):
+        profiler = BuildProfiler(top=1)
+        profiler.add_page("a.md", {"read": 0.25, "write": 0.75})
+        report = profiler.report()
+        self.assertTrue(report[1].startswith("read"))
+        self.assertIn("25.0%", report[1])
+        self.assertIn("a.md", report[-1])
+
+    def test_report_shares_cover_every_page_stage(self):
+        profiler = BuildProfiler()
+        profiler.add_page("a.md", {"read": 0.1, "parse": 0.2, "search": 0.3, "write": 0.1, "compress": 0.3})
+        with profiler.stage("search-index"):
+            pass
+        report = {line.split()[0]: line for line in profiler.report()[1:]}
+        self.assertIn("20.0%", report["parse"])
+        self.assertIn("30.0%", report["search"])
+        self.assertIn("30.0%", report["compress"])
+        self.assertNotIn("%", report["search-index"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from inline_markdown import markdown_to_html_node
+from render_cache import BlockCache
+
+
+MARKDOWN = """
+# Heading
+
+A paragraph with **bold** text.
+
+* item one
+* item two
+
+A paragraph with **bold** text.
+"""
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        cache.put("c", "<p>c</p>")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        self.assertEqual(cache.get("c"), "<p>c</p>")
+        self.assertEqual(len(cache), 2)
+
+    def test_rendering_with_cache_matches_uncached(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 3)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.stats()["hits"], 5)
+
+    def test_added_entries_are_tracked(self):
+        cache = BlockCache()
+        cache.put("a", "<p>a</p>")
+        self.assertEqual(cache.take_added(), [])
+        cache.track_added()
+        cache.put("b", "<p>b</p>")
+        self.assertEqual(cache.take_added(), [("b", "<p>b</p>")])
+        self.assertEqual(cache.take_added(), [])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "blocks.json")
+            cache = BlockCache()
+            markdown_to_html_node(MARKDOWN, cache)
+            cache.save(path)
+
+            loaded = BlockCache()
+            loaded.load(path)
+            self.assertEqual(len(loaded), len(cache))
+            markdown_to_html_node(MARKDOWN, loaded)
+            self.assertEqual(loaded.stats()["misses"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
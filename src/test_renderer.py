@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from inline_markdown import markdown_to_html_node
+from renderer import Renderer
+
+
+MARKDOWN = """---
+author: Ada
+---
+# Notes
+
+Some **bold** text with a [link](/home).
+
+* one
+* two
+"""
+
+
+class TestRenderer(unittest.TestCase):
+    def test_renders_document_without_template(self):
+        renderer = Renderer()
+        body = MARKDOWN.split("---\n", 2)[2]
+        self.assertEqual(renderer.render(MARKDOWN), markdown_to_html_node(body).to_html())
+
+    def test_renders_page_with_template(self):
+        renderer = Renderer("<title>{{ Title }}</title><p>{{ author }}, {{ WordCount }} words</p>{{ Content }}")
+        html = renderer.render(MARKDOWN)
+        self.assertTrue(html.startswith("<title>Notes</title><p>Ada, 9 words</p><div><h1>Notes</h1>"))
+        html, metadata = renderer.render_with_metadata(MARKDOWN)
+        self.assertEqual(metadata.title, "Notes")
+
+    def test_from_template_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as file:
+                file.write("<h2>{{ Title }}</h2>")
+            renderer = Renderer.from_template_file(path, cache_size=0)
+        self.assertEqual(renderer.render("# Hi"), "<h2>Hi</h2>")
+        self.assertIsNone(renderer.stats())
+
+    def test_bytes_in_bytes_out(self):
+        renderer = Renderer(encoding="latin-1")
+        html = renderer.render("# Café".encode("latin-1"))
+        self.assertEqual(html, "<div><h1>Café</h1></div>".encode("latin-1"))
+        self.assertEqual(renderer.render(memoryview(b"plain")), b"<div><p>plain</p></div>")
+
+    def test_render_many_shares_the_cache(self):
+        renderer = Renderer(cache_size=16)
+        documents = [f"# Page {i}\n\nShared paragraph." for i in range(3)]
+        pages = renderer.render_many(documents)
+        self.assertEqual(next(pages), "<div><h1>Page 0</h1><p>Shared paragraph.</p></div>")
+        self.assertEqual(len(list(pages)), 2)
+        self.assertEqual(renderer.stats()["hits"], 2)
+
+    def test_errors_propagate(self):
+        with self.assertRaises(ValueError):
+            Renderer().render("an *unclosed delimiter")
+        with self.assertRaises(ValueError):
+            Renderer("{{ Title }}").render("no heading")
+
+    def test_concurrent_rendering(self):
+        renderer = Renderer("<title>{{ Title }}</title>{{ Content }}", cache_size=8)
+        documents = [
+            f"# Page {i}\n\nParagraph {i % 5} with *emphasis*.\n\n* shared\n* list\n\n> quote {i % 3}"
+            for i in range(400)
+        ]
+        expected = [Renderer("<title>{{ Title }}</title>{{ Content }}", cache_size=0).render(doc)
+                    for doc in documents]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(renderer.render, documents)), expected)
+        stats = renderer.stats()
+        self.assertEqual(stats["hits"] + stats["misses"], 4 * len(documents))
+        self.assertLessEqual(stats["entries"], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
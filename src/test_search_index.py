@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+from inline_markdown import markdown_to_html_node
+from render_cache import BlockCache
+from search_index import (
+    PageTermStore,
+    SearchIndexBuilder,
+    decode_postings,
+    encode_postings,
+    front_code,
+    front_decode,
+    load_search_index,
+    node_tokens,
+)
+
+
+class TestEncoding(unittest.TestCase):
+    def test_front_code_round_trip(self):
+        terms = ["hobbit", "hobbits", "hold", "ring", "rings"]
+        self.assertEqual(
+            front_code(terms),
+            [[0, "hobbit"], [6, "s"], [2, "ld"], [0, "ring"], [4, "s"]],
+        )
+        self.assertEqual(front_decode(front_code(terms)), terms)
+
+    def test_postings_round_trip(self):
+        postings = [(7, [3, 9]), (2, [0, 1, 5])]
+        self.assertEqual(encode_postings(postings), [2, [0, 1, 4], 5, [3, 6]])
+        self.assertEqual(decode_postings(encode_postings(postings)), sorted(postings))
+
+
+class TestNodeTokens(unittest.TestCase):
+    markdown = "# The **One** Ring\n\nA [link](/url) and `code`.\n\n```\nprint it\n```"
+
+    def test_tokens_in_document_order(self):
+        self.assertEqual(
+            node_tokens(markdown_to_html_node(self.markdown)),
+            ["the", "one", "ring", "a", "link", "and", "code", "print", "it"],
+        )
+
+    def test_cached_blocks_give_the_same_tokens(self):
+        cache = BlockCache()
+        markdown_to_html_node(self.markdown, cache)
+        self.assertEqual(
+            node_tokens(markdown_to_html_node(self.markdown, cache)),
+            node_tokens(markdown_to_html_node(self.markdown)),
+        )
+
+    def test_angle_brackets_in_text_are_not_tags(self):
+        markdown = "If x < 10 and y > 3 then *stop*.\n\n```\na<b and c>d\n```"
+        expected = ["if", "x", "10", "and", "y", "3", "then", "stop", "a", "b", "and", "c", "d"]
+        cache = BlockCache()
+        self.assertEqual(node_tokens(markdown_to_html_node(markdown)), expected)
+        markdown_to_html_node(markdown, cache)
+        self.assertEqual(node_tokens(markdown_to_html_node(markdown, cache)), expected)
+
+
+class TestSearchIndexBuilder(unittest.TestCase):
+    def build(self, site_dir, **options):
+        builder = SearchIndexBuilder(site_dir, **options)
+        for page_id in reversed(range(20)):
+            tokens = ["common", f"page{page_id}", "common"] + ["even"] * (page_id % 2 == 0)
+            builder.add_page(page_id, os.path.join(site_dir, "posts", f"{page_id}.html"), f"Post {page_id}", tokens)
+        outputs = builder.finish()
+        return outputs, load_search_index(builder.directory)
+
+    def test_spilled_runs_merge_to_the_same_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            outputs, (terms, pages) = self.build(tmp)
+            self.assertEqual(len(outputs), 3)
+            spilled_outputs, spilled = self.build(tmp, max_postings=7, shard_terms=5)
+            self.assertEqual(len(spilled_outputs), 2 + 5)
+            self.assertEqual(spilled, (terms, pages))
+        self.assertEqual(pages[3], ["/posts/3.html", "Post 3"])
+        self.assertEqual(terms["common"], [(page_id, [0, 2]) for page_id in range(20)])
+        self.assertEqual(terms["page4"], [(4, [1])])
+        self.assertEqual([page_id for page_id, _ in terms["even"]], list(range(0, 20, 2)))
+
+    def test_spilled_and_in_memory_postings_merge(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            builder = SearchIndexBuilder(tmp, max_postings=5)
+            builder.add_page(0, os.path.join(tmp, "a.html"), "A", ["shared", "one", "two", "three", "four"])
+            builder.add_page(1, os.path.join(tmp, "b.html"), "B", ["shared", "five"])
+            self.assertEqual(len(builder._runs), 1)
+            self.assertIn("shared", builder._postings)
+            builder.finish()
+            terms, _ = load_search_index(builder.directory)
+        self.assertEqual(terms["shared"], [(0, [0]), (1, [0])])
+
+
+class TestPageTermStore(unittest.TestCase):
+    def test_entries_are_kept_per_source_and_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PageTermStore(tmp)
+            store.put("a.md", "hash1", "A", ["one", "two"])
+            store.put("b.md", "hash2", "B", ["three"])
+            self.assertEqual(store.get("a.md", "hash1"), ("A", ["one", "two"]))
+            self.assertIsNone(store.get("a.md", "changed"))
+            self.assertIsNone(store.get("c.md", "hash1"))
+            self.assertEqual((store.hits, store.misses), (1, 2))
+
+            self.assertEqual(store.prune(["b.md"]), 1)
+            self.assertIsNone(store.get("a.md", "hash1"))
+            self.assertEqual(store.get("b.md", "hash2"), ("B", ["three"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
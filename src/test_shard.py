@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+from shard import merge_shards, parse_shard, shard_of, shard_pages, shard_paths
+
+
+class TestShardAssignment(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        self.assertEqual(parse_shard("1/1"), (1, 1))
+        for spec in ("0/4", "5/4", "2", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+    def test_shard_of_is_stable(self):
+        # Fixed values: the assignment must not change between processes,
+        # machines or Python versions
+        self.assertEqual([shard_of(f"blog/post{i}.md", 4) for i in range(8)], [4, 4, 2, 4, 4, 1, 4, 2])
+        self.assertEqual(shard_of(os.path.join("blog", "post0.md"), 4), shard_of("blog/post0.md", 4))
+
+    def test_shard_pages_partition_the_work_list(self):
+        pages = [(os.path.join("content", f"page{i}.md"), f"page{i}.html") for i in range(50)]
+        shards = [shard_pages(pages, "content", index, 3) for index in (1, 2, 3)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(pages))
+        self.assertTrue(all(shards))
+        for shard in shards:
+            self.assertEqual(shard, [page for page in pages if page in shard])
+
+    def test_shard_paths(self):
+        self.assertEqual(
+            shard_paths("src/public/", ".cache/manifest.json", 2, 3),
+            ("src/public.shard-2-of-3", ".cache/manifest.shard-2-of-3.json"),
+        )
+
+
+class TestMergeShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dest = os.path.join(self.tmp.name, "public")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+
+    def build_shard(self, index, count, pages):
+        shard_dir, manifest_path = shard_paths(self.dest, self.manifest_path, index, count)
+        manifest = BuildManifest(manifest_path)
+        for source, output in pages.items():
+            path = os.path.join(shard_dir, output)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                file.write(f"built from {source}")
+            manifest.record(source, [], [path])
+        manifest.prune()
+        manifest.save()
+
+    def read(self, name):
+        with open(os.path.join(self.dest, name)) as file:
+            return file.read()
+
+    def test_merges_outputs_and_manifests(self):
+        self.build_shard(1, 2, {"index.md": "index.html", "blog/a.md": "blog/a.html"})
+        self.build_shard(2, 2, {"blog/b.md": "blog/b.html"})
+        merged = merge_shards(self.dest, self.manifest_path, 2)
+        self.assertEqual(self.read("blog/b.html"), "built from blog/b.md")
+        self.assertEqual(merged.entries["blog/b.md"]["outputs"], [os.path.join(self.dest, "blog/b.html")])
+        self.assertEqual(sorted(BuildManifest(self.manifest_path).entries), ["blog/a.md", "blog/b.md", "index.md"])
+
+        # A page that moved to the other shard is taken from there, one
+        # that is gone is removed from the merged tree
+        self.build_shard(1, 2, {"index.md": "index.html"})
+        self.build_shard(2, 2, {"blog/a.md": "blog/a.html"})
+        merge_shards(self.dest, self.manifest_path, 2)
+        self.assertEqual(self.read("blog/a.html"), "built from blog/a.md")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog/b.html")))
+
+    def test_output_written_by_two_shards_is_a_collision(self):
+        self.build_shard(1, 2, {"about.md": "about.html"})
+        self.build_shard(2, 2, {"about/index.md": "about.html"})
+        with self.assertRaisesRegex(ValueError, "written by both about.md and about/index.md"):
+            merge_shards(self.dest, self.manifest_path, 2)
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_source_built_by_two_shards(self):
+        self.build_shard(1, 2, {"index.md": "index.html"})
+        self.build_shard(2, 2, {"index.md": "index.html"})
+        with self.assertRaisesRegex(ValueError, "built by shard 1 and shard 2"):
+            merge_shards(self.dest, self.manifest_path, 2)
+
+    def test_missing_shard(self):
+        self.build_shard(1, 2, {"index.md": "index.html"})
+        with self.assertRaisesRegex(ValueError, "Shard 2/2 has no build manifest"):
+            merge_shards(self.dest, self.manifest_path, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, TemplateLoader
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_segments(self):
+        template = Template("<title>{{ Title }}</title>{{Content}}!")
+        self.assertEqual(
+            template.segments,
+            [
+                ("<title>", None),
+                (None, "Title"),
+                ("</title>", None),
+                (None, "Content"),
+                ("!", None),
+            ],
+        )
+        self.assertEqual(template.placeholders, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("{{ Title }} by {{ author }} [{{ tags }}]{{ missing }}")
+        self.assertEqual(
+            template.render({"Title": "Post", "author": "Sam", "tags": ["a", "b"]}),
+            "Post by Sam [a, b]",
+        )
+
+    def test_stream_matches_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}")
+        context = {
+            "Title": "Hello",
+            "Content": ParentNode("div", [LeafNode("p", "text")]),
+        }
+        buffer = io.StringIO()
+        template.stream(buffer, context)
+        self.assertEqual(buffer.getvalue(), "<h1>Hello</h1><div><p>text</p></div>")
+        self.assertEqual(buffer.getvalue(), template.render(context))
+
+
+class TestTemplateLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.default = self.write("template.html", "default {{ Content }}")
+        self.content = os.path.join(self.tmp.name, "content")
+        self.override = self.write(
+            os.path.join("content", "blog", "template.html"), "blog {{ Content }}"
+        )
+        os.makedirs(os.path.join(self.content, "blog", "2024"))
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_resolve_override(self):
+        loader = TemplateLoader(self.default, root=self.content)
+        self.assertEqual(loader.resolve(self.content), self.default)
+        self.assertEqual(loader.resolve(os.path.join(self.content, "blog")), self.override)
+        self.assertEqual(
+            loader.resolve(os.path.join(self.content, "blog", "2024")), self.override
+        )
+
+    def test_resolve_without_root_uses_default(self):
+        loader = TemplateLoader(self.default)
+        self.assertEqual(loader.resolve(os.path.join(self.content, "blog")), self.default)
+
+    def test_get_compiles_once(self):
+        loader = TemplateLoader(self.default)
+        self.assertIs(loader.get(self.default), loader.get(self.default))
+
+
+if __name__ == "__main__":
+    unittest.main()
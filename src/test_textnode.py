@@ -8,7 +8,14 @@ from textnode import (
     text_type_code,
     text_type_image,
     text_type_link,
+    text_node_to_html_node,
+    TextType,
+    BlockType,
+    register_text_type,
+    restore_text_types,
+    save_text_types,
 )
+from htmlnode import LeafNode
 
 
 class TestTextNode(unittest.TestCase):
@@ -40,6 +47,54 @@ class TestTextNode(unittest.TestCase):
             "TextNode(This is a text node, text, https://www.boot.dev)", repr(node)
         )
 
+    def test_types_are_ints_that_print_as_names(self):
+        self.assertIsInstance(text_type_text, int)
+        self.assertEqual(str(TextType.IMAGE), "image")
+        self.assertEqual(f"{BlockType.UNORDERED_LIST}", "unordered_list")
+        self.assertEqual(len({*TextType}), 6)
+
+    def test_slots(self):
+        node = TextNode("This is a text node", text_type_text)
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
+
+class TestTextNodeToHTMLNode(unittest.TestCase):
+    def test_bold_has_no_wrapper_node(self):
+        html_node = text_node_to_html_node(TextNode("bold", text_type_bold))
+        self.assertEqual(html_node.tag, "b")
+        self.assertEqual(html_node.value, "bold")
+        self.assertEqual(html_node.children, ())
+        self.assertEqual(html_node.to_html(), "<b>bold</b>")
+
+    def test_link(self):
+        html_node = text_node_to_html_node(TextNode("home", text_type_link, "/"))
+        self.assertEqual(html_node.to_html(), '<a href="/">home</a>')
+
+    def test_image(self):
+        html_node = text_node_to_html_node(
+            TextNode("alt text", text_type_image, "/a.png")
+        )
+        self.assertEqual(html_node.to_html(), '<img src="/a.png" alt="alt text"></img>')
+
+    def test_invalid_type(self):
+        for text_type in ("bold", 99, None):
+            with self.assertRaises(ValueError):
+                text_node_to_html_node(TextNode("x", text_type))
+
+    def test_register_text_type(self):
+        self.addCleanup(restore_text_types, save_text_types())
+        underline = register_text_type("underline", lambda node: LeafNode("u", node.text))
+        self.assertEqual(str(underline), "underline")
+        self.assertEqual(repr(TextNode("x", underline)), "TextNode(x, underline, None)")
+        self.assertEqual(text_node_to_html_node(TextNode("x", underline)).to_html(), "<u>x</u>")
+
+    def test_plain_text_is_shared(self):
+        first = text_node_to_html_node(TextNode(" and ", text_type_text))
+        second = text_node_to_html_node(TextNode(" and ", text_type_text))
+        self.assertIs(first, second)
+        self.assertEqual(first.to_html(), " and ")
+
 
 if __name__ == "__main__":
     unittest.main()
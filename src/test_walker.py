@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from walker import Pattern, Walker
+
+
+class TestPattern(unittest.TestCase):
+    def test_name_and_path_patterns(self):
+        self.assertTrue(Pattern("*.md").matches("blog/post.md"))
+        self.assertFalse(Pattern("*.md").matches("blog/post.html"))
+        self.assertTrue(Pattern("blog/*").matches("blog/2024/post.md"))
+        self.assertFalse(Pattern("blog/*").matches("news/blog/post.md"))
+        self.assertTrue(Pattern("/drafts").matches("drafts", True))
+        self.assertFalse(Pattern("/drafts").matches("blog/drafts", True))
+
+    def test_directory_only(self):
+        self.assertTrue(Pattern("vendor/").matches("js/vendor", True))
+        self.assertFalse(Pattern("vendor/").matches("js/vendor"))
+
+    def test_base(self):
+        pattern = Pattern("old/*", "blog")
+        self.assertTrue(pattern.matches("blog/old/post.md"))
+        self.assertFalse(pattern.matches("old/post.md"))
+        self.assertFalse(pattern.matches("blogs/old/post.md"))
+
+
+class TestWalker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        for name in [
+            "index.md", "about.md", "notes.txt",
+            "blog/a.md", "blog/b.md", "blog/draft-c.md", "blog/old/d.md",
+            "a-b/e.md", "a/f.md",
+            "vendor/lib/g.md", "docs/vendor/h.md",
+        ]:
+            self.write(name, name)
+        self.write("blog/.ignore", "# drafts are not published\ndraft-*\n/old/\n")
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+
+    def names(self, walker):
+        return [rel_path.replace(os.sep, "/") for _, rel_path, _ in walker.walk(self.root)]
+
+    def test_walk_is_sorted_by_component_and_honours_ignore_files(self):
+        self.assertEqual(self.names(Walker()), [
+            "a/f.md", "a-b/e.md", "about.md", "blog/a.md", "blog/b.md",
+            "docs/vendor/h.md", "index.md", "notes.txt", "vendor/lib/g.md",
+        ])
+
+    def test_include_and_exclude(self):
+        walker = Walker(include=["*.md"], exclude=["vendor/", "a*"])
+        self.assertEqual(self.names(walker), ["blog/b.md", "index.md"])
+        self.assertEqual(self.names(Walker(include=["blog/*"])), ["blog/a.md", "blog/b.md"])
+        self.assertEqual(len(self.names(Walker(ignore_file=None))), 12)
+
+    def test_concurrent_walk_matches(self):
+        walker = Walker(exclude=["notes.txt"], jobs=4)
+        self.assertEqual(self.names(walker), self.names(Walker(exclude=["notes.txt"])))
+
+    def test_paths_and_stat(self):
+        path, rel_path, stat = Walker().walk(self.root, stat=True)[0]
+        self.assertEqual(path, os.path.join(self.root, "a", "f.md"))
+        self.assertEqual(rel_path, os.path.join("a", "f.md"))
+        self.assertEqual(stat.st_size, len("a/f.md"))
+        self.assertIsNone(Walker().walk(self.root)[0][2])
+
+    def test_accepts_agrees_with_walk(self):
+        walker = Walker(include=["*.md"], exclude=["vendor/"])
+        listed = {path for path, _, _ in walker.walk(self.root)}
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                self.assertEqual(walker.accepts(self.root, path), path in listed, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import watch
+from watch import Inotify, Watcher, snapshot_paths
+
+
+class TestWatcher(unittest.TestCase):
+    inotify = False
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.page = self.write(os.path.join("content", "index.md"), "# Home")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.watcher = Watcher([os.path.join(self.tmp.name, "content"), self.template], inotify=self.inotify)
+        self.addCleanup(self.watcher.close)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_snapshot(self):
+        self.assertEqual(set(snapshot_paths(self.watcher.paths)), {self.page, self.template})
+
+    def test_poll_no_changes(self):
+        self.assertEqual(self.watcher.poll(), set())
+
+    def test_poll_added_modified_removed(self):
+        added = self.write(os.path.join("content", "blog", "post.md"), "# Post")
+        self.write("template.html", "<main>{{ Content }}</main>")
+        os.remove(self.page)
+        self.assertEqual(self.watcher.poll(), {added, self.template, self.page})
+        self.assertEqual(self.watcher.poll(), set())
+
+    def test_directory_moved_away_and_file_saved_by_rename(self):
+        post = self.write(os.path.join("content", "blog", "post.md"), "# Post")
+        self.watcher.poll()
+        shutil.move(os.path.join(self.tmp.name, "content", "blog"), os.path.join(self.tmp.name, "blog"))
+        saved = self.write("template.html.tmp", "<main>{{ Content }}</main>")
+        os.replace(saved, self.template)
+        self.write("other.html", "not watched")
+        self.assertEqual(self.watcher.poll(), {post, self.template})
+
+
+@unittest.skipUnless(watch._load_libc(), "inotify is not available")
+class TestInotifyWatcher(TestWatcher):
+    inotify = True
+
+    def test_uses_inotify(self):
+        self.assertIsInstance(self.watcher.inotify, Inotify)
+
+    def test_files_of_a_new_directory_are_reported(self):
+        # Files created before the directory's watch is added are found
+        # by scanning it
+        os.makedirs(os.path.join(self.tmp.name, "content", "a", "b"))
+        nested = self.write(os.path.join("content", "a", "b", "c.md"), "# C")
+        self.assertEqual(self.watcher.poll(), {nested})
+        edited = self.write(os.path.join("content", "a", "b", "c.md"), "# Changed")
+        self.assertEqual(self.watcher.poll(), {edited})
+
+
+class TestPolling(unittest.TestCase):
+    def test_never_waits_less_than_a_scan_takes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            watcher = Watcher([directory], interval=0.05, inotify=False)
+            watcher.scan_time = 0.3
+            with mock.patch.object(watch.time, "sleep") as sleep:
+                watcher.wait(watcher.interval)
+            sleep.assert_called_once_with(0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,72 @@
-from htmlnode import LeafNode, HTMLNode
+from enum import IntEnum
+from functools import lru_cache
 
-text_type_text = "text"
-text_type_bold = "bold"
-text_type_italic = "italic"
-text_type_code = "code"
-text_type_link = "link"
-text_type_image = "image"
+from htmlnode import LeafNode
+
+
+class NodeType(int):
+    """
+    Integer code of a node or block type registered at runtime (see
+    register_text_type); prints as its name like the built-in types.
+    """
+
+    def __new__(cls, code, name):
+        self = super().__new__(cls, code)
+        self.name = name
+        return self
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}: {int(self)}>"
+
+
+class TextType(IntEnum):
+    # Codes index the converter table below
+    TEXT = 0
+    BOLD = 1
+    ITALIC = 2
+    CODE = 3
+    LINK = 4
+    IMAGE = 5
+
+    def __str__(self):
+        return self.name.lower()
+
+
+class BlockType(IntEnum):
+    # Codes index inline_markdown's block converter table
+    PARAGRAPH = 0
+    HEADING = 1
+    CODE = 2
+    QUOTE = 3
+    UNORDERED_LIST = 4
+    ORDERED_LIST = 5
+
+    def __str__(self):
+        return self.name.lower()
+
+
+text_type_text = TextType.TEXT
+text_type_bold = TextType.BOLD
+text_type_italic = TextType.ITALIC
+text_type_code = TextType.CODE
+text_type_link = TextType.LINK
+text_type_image = TextType.IMAGE
 
 # Block types
-block_type_paragraph = "paragraph"
-block_type_heading = "heading"
-block_type_code = "code"
-block_type_quote = "quote"
-block_type_unordered_list = "unordered_list"
-block_type_ordered_list = "ordered_list"
+block_type_paragraph = BlockType.PARAGRAPH
+block_type_heading = BlockType.HEADING
+block_type_code = BlockType.CODE
+block_type_quote = BlockType.QUOTE
+block_type_unordered_list = BlockType.UNORDERED_LIST
+block_type_ordered_list = BlockType.ORDERED_LIST
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -33,17 +83,67 @@ class TextNode:
         return f"TextNode({self.text}, {self.text_type}, {self.url})"
 
 
+@lru_cache(maxsize=4096)
+def text_leaf(text):
+    # Flyweight for plain text: nodes are never mutated after parsing, so
+    # every occurrence of the same text can share one LeafNode.
+    return LeafNode(None, text)
+
+
+# Converters from TextNode to HTML node, indexed by text type
+_TEXT_CONVERTERS = [
+    lambda node: text_leaf(node.text),
+    lambda node: LeafNode("b", node.text),
+    lambda node: LeafNode("i", node.text),
+    lambda node: LeafNode("code", node.text),
+    lambda node: LeafNode("a", node.text, {"href": node.url}),
+    lambda node: LeafNode("img", "", {"src": node.url, "alt": node.text}),
+]
+
+
+def register_text_type(name, converter):
+    """
+    Add an inline node type converted to HTML by `converter(text_node)`
+    and return its type code. See inline_markdown.register_delimiter to
+    have the parser produce nodes of the new type.
+    """
+    text_type = NodeType(len(_TEXT_CONVERTERS), name)
+    _TEXT_CONVERTERS.append(converter)
+    return text_type
+
+
+def save_text_types():
+    """
+    Return the registered text types, to put back with restore_text_types.
+    """
+    return list(_TEXT_CONVERTERS)
+
+
+def restore_text_types(saved):
+    # Forget the text types registered since save_text_types
+    _TEXT_CONVERTERS[:] = saved
+
+
 def text_node_to_html_node(text_node):
-    if text_node.text_type == text_type_text:
-        return HTMLNode(None, text_node.text)
-    if text_node.text_type == text_type_bold:
-        return HTMLNode("b", None, [HTMLNode(None, text_node.text)])
-    if text_node.text_type == text_type_italic:
-        return HTMLNode("i", None, [HTMLNode(None, text_node.text)])
-    if text_node.text_type == text_type_code:
-        return HTMLNode("code", None, [HTMLNode(None, text_node.text)])
-    if text_node.text_type == text_type_link:
-        return HTMLNode("a", None, [HTMLNode(None, text_node.text)], {"href": text_node.url})
-    if text_node.text_type == text_type_image:
-        return HTMLNode("img", "", props={"src": text_node.url, "alt": text_node.text})
-    raise ValueError(f"Invalid text type: {text_node.text_type}")
\ No newline at end of file
+    # Plain text, most nodes by far, skips the table and its lambda call
+    if text_node.text_type is text_type_text:
+        return text_leaf(text_node.text)
+    try:
+        converter = _TEXT_CONVERTERS[text_node.text_type]
+    except (IndexError, TypeError):
+        raise ValueError(f"Invalid text type: {text_node.text_type}") from None
+    return converter(text_node)
+
+
+def text_nodes_to_html_nodes(text_nodes):
+    # text_node_to_html_node over a list, with the plain text check and
+    # the table lookup inlined
+    converters = _TEXT_CONVERTERS
+    text, leaf = text_type_text, text_leaf
+    try:
+        return [
+            leaf(node.text) if node.text_type is text else converters[node.text_type](node)
+            for node in text_nodes
+        ]
+    except (IndexError, TypeError):
+        return [text_node_to_html_node(node) for node in text_nodes]
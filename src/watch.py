@@ -0,0 +1,313 @@
+import os
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+import ctypes
+import ctypes.util
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# inotify(7) event masks
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+_EVENT = struct.Struct("iIII")
+
+
+def snapshot_paths(paths):
+    """
+    Return {file path: (mtime_ns, size)} for every file under the given
+    files and directories.
+    """
+    snapshot = {}
+    stack = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if os.path.isdir(path):
+            stack.append(path)
+        else:
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                else:
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                continue
+    return snapshot
+
+
+def _load_libc():
+    # The inotify calls of the C library, or None where there are none
+    if not hasattr(os, "O_NONBLOCK"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class Inotify:
+    """
+    Recursive change notifications from Linux inotify, read through ctypes.
+    Directories given are watched with all their subdirectories (new ones
+    are added as they appear); files given are watched through their
+    directory, so editors that save by renaming a new file over the old
+    one are seen. Raises OSError if inotify cannot be set up.
+    """
+
+    libc = None
+
+    def __init__(self, paths):
+        if Inotify.libc is None:
+            Inotify.libc = _load_libc()
+        if Inotify.libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = list(paths)
+        self.directories = {}
+        self.files = set()
+        # Directories watched only for some of their files:
+        # {directory: {name: path as given}}
+        self.filters = {}
+        roots = [os.path.join(os.path.abspath(path), "") for path in self.paths if os.path.isdir(path)]
+        try:
+            for path in self.paths:
+                if os.path.isdir(path):
+                    self._add_tree(path)
+                elif any(os.path.abspath(path).startswith(root) for root in roots):
+                    # Already watched with its directory tree
+                    continue
+                else:
+                    directory, name = os.path.split(os.path.abspath(path))
+                    self.filters.setdefault(directory, {})[name] = path
+                    self._add_watch(directory, directory)
+                    if os.path.exists(path):
+                        self.files.add(path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _add_watch(self, directory, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            raise OSError(error, f"Cannot watch {directory}")
+        self.directories[wd] = path
+        return True
+
+    def _add_tree(self, root):
+        # Watch a directory tree; returns the files found in it, which may
+        # have been created before the watch was in place
+        found = set()
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            if not self._add_watch(directory, directory):
+                continue
+            try:
+                entries = list(os.scandir(directory))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    found.add(entry.path)
+        self.files |= found
+        return found
+
+    def fileno(self):
+        return self.fd
+
+    def read(self):
+        """
+        Return the set of file paths changed since the last call, without
+        blocking.
+        """
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                self._handle(wd, mask, name, changed)
+
+    def _handle(self, wd, mask, name, changed):
+        if mask & IN_Q_OVERFLOW:
+            # Events were dropped: report every file as possibly changed
+            logging.warning("Change notifications overflowed, rescanning")
+            files = set(snapshot_paths(self.paths))
+            changed |= files | self.files
+            self.files = files
+            return
+        directory = self.directories.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            del self.directories[wd]
+            return
+        if not name:
+            return
+        path = os.path.join(directory, name)
+        filters = self.filters.get(directory)
+        if filters is not None:
+            # A directory watched for one of the given files only
+            if name in filters:
+                path = filters[name]
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self.files.discard(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    self.files.add(path)
+                changed.add(path)
+            return
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                changed |= self._add_tree(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                # The files of a directory moved away get no events of
+                # their own
+                prefix = path + os.sep
+                gone = {file for file in self.files if file.startswith(prefix)}
+                self.files -= gone
+                changed |= gone
+            return
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self.files.discard(path)
+        else:
+            self.files.add(path)
+        changed.add(path)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class Watcher:
+    """
+    Watches files and directories for changes. Iterating yields the set of
+    paths that were added, modified or removed, once a burst of changes
+    has been quiet for `debounce` seconds.
+
+    On Linux changes come from inotify, so an idle watcher does no work
+    and an edit is seen as soon as it happens. Elsewhere, or with
+    inotify=False, the tree is polled every `interval` seconds; since
+    every file has to be stat'ed (in-place edits don't touch the
+    directory), the pause between scans is never shorter than the last
+    scan took, so polling a large tree uses at most half a core.
+    """
+
+    def __init__(self, paths, interval=0.05, debounce=0.05, inotify=True):
+        self.paths = list(paths)
+        self.interval = interval
+        self.debounce = debounce
+        self.scan_time = 0.0
+        self.inotify = None
+        if inotify:
+            try:
+                self.inotify = Inotify(self.paths)
+            except OSError as e:
+                logging.info(f"Polling for changes, inotify is not available: {e}")
+        if self.inotify is None:
+            self.snapshot = self._scan()
+
+    def _scan(self):
+        start = time.monotonic()
+        snapshot = snapshot_paths(self.paths)
+        self.scan_time = time.monotonic() - start
+        return snapshot
+
+    def poll(self):
+        """
+        Return the set of paths changed since the last poll.
+        """
+        if self.inotify is not None:
+            return self.inotify.read()
+        snapshot = self._scan()
+        changed = {
+            path for path in set(snapshot) | set(self.snapshot)
+            if snapshot.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def wait(self, timeout):
+        # Sleep until changes may be ready to poll, at most `timeout`
+        if self.inotify is not None:
+            select.select([self.inotify], [], [], timeout)
+        else:
+            time.sleep(max(timeout, self.scan_time))
+
+    def __iter__(self):
+        while True:
+            changed = self.poll()
+            if not changed:
+                self.wait(self.interval)
+                continue
+            quiet_since = time.monotonic()
+            while time.monotonic() - quiet_since < self.debounce:
+                self.wait(self.debounce - (time.monotonic() - quiet_since))
+                more = self.poll()
+                if more:
+                    changed |= more
+                    quiet_since = time.monotonic()
+            yield changed
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+
+
+def serve(directory, port):
+    """
+    Serve `directory` over HTTP from a background thread and return the
+    server; call shutdown() on it to stop.
+    """
+    handler = partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logging.info(f"Serving {directory} at http://localhost:{port}/")
+    return server